@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Build the PROPFIND / REPORT / PROPPATCH request bodies of a listing workload.
+
+Compare the previous builders (fields dict and ElementTree built and
+serialized on each call) to the memoized bodies::
+
+  python benchmarks/bench_bodies.py -n 100000
+"""
+import argparse
+import time
+import xml.etree.ElementTree as ET
+
+from nextcloud.api.properties import NAMESPACES_MAP
+from nextcloud.api_wrappers.systemtags import Tag
+from nextcloud.api_wrappers.webdav import File
+from nextcloud.common.build_xml import (
+    XML_NAMESPACES_MAP,
+    _safe_xml_val,
+    _to_field_vals_list,
+    _to_fields_list
+)
+
+
+def legacy_build_propfind_datas(instr=None, filter_rules=None, fields=None):
+    """ build_propfind_datas before the memoized bodies """
+    if not instr:
+        instr = 'd:propfind'
+    _namespaces = XML_NAMESPACES_MAP
+    fields = fields or {}
+    filter_rules = filter_rules or {}
+    if fields or filter_rules:
+        _namespaces = {}
+        for k in XML_NAMESPACES_MAP:
+            _k = k.split(':')[-1]
+            if _k not in ['d', 'oc'] and bool(fields.get(_k, [])) and bool(filter_rules.get(_k, {})):
+                continue
+            _namespaces[k] = XML_NAMESPACES_MAP[k]
+    root = ET.Element(instr, _namespaces)
+    props = _to_fields_list(fields)
+    if props:
+        prop_group = ET.SubElement(root, 'd:prop')
+        for prop in props:
+            ET.SubElement(prop_group, prop)
+    rules = _to_field_vals_list(filter_rules or {})
+    if rules:
+        rule_group = ET.SubElement(root, 'oc:filter-rules')
+        for k in rules:
+            rule = ET.SubElement(rule_group, k)
+            rule.text = _safe_xml_val(rules[k])
+    return ET.tostring(root)
+
+
+def legacy_build_propupdate_datas(values):
+    """ build_propupdate_datas before the memoized bodies """
+    root = ET.Element('d:propertyupdate', XML_NAMESPACES_MAP)
+    vals = _to_field_vals_list(values)
+    if vals:
+        set_group = ET.SubElement(root, 'd:set')
+        val_group = ET.SubElement(set_group, 'd:prop')
+        for k in vals:
+            val = ET.SubElement(val_group, k)
+            val.text = vals[k]
+    return ET.tostring(root)
+
+
+def legacy_build_xml_propfind(cls, instr=None, filter_rules=None, use_default=False, fields=None):
+    """ Item.build_xml_propfind before the memoized bodies """
+    def _build_fields_dict(only_required=False, attr_name_list=None):
+        _fields = {k: [] for k in NAMESPACES_MAP}
+        for attr in cls._attrs:  # pylint: disable=protected-access
+            if only_required and not attr.required:
+                continue
+            if attr_name_list is not None and attr.attr_name not in attr_name_list:
+                continue
+            if attr.disabled:
+                continue
+            _fields[attr.ns].append(attr.xml_key)
+        return _fields
+
+    if not fields:
+        fields = _build_fields_dict(only_required=(not use_default))
+    elif isinstance(fields, list):
+        fields = _build_fields_dict(attr_name_list=fields)
+    if not (fields or filter_rules):
+        return None
+    return legacy_build_propfind_datas(instr=instr, filter_rules=filter_rules, fields=(fields or {}))
+
+
+WORKLOAD = [
+    # list_folders, all properties / default / columns
+    lambda propfind, _: propfind(File, use_default=True),
+    lambda propfind, _: propfind(File),
+    lambda propfind, _: propfind(File, fields=['href', 'file_id', 'size', 'last_modified', 'etag']),
+    # fetch_files_with_filter, values changing
+    lambda propfind, i: propfind(File, instr='oc:filter-files',
+                                 filter_rules={'oc': {'systemtag': i % 100}}),
+    lambda propfind, i: propfind(File, instr='oc:filter-files',
+                                 filter_rules={'oc': {'favorite': i % 2, 'systemtag': 'tag%d' % i}}),
+    # fetch_systemtags
+    lambda propfind, _: propfind(Tag, use_default=True),
+]
+
+
+def timed(propfind, propupdate, count):
+    """ bodies built and elapsed time """
+    start = time.time()
+    bodies = [build(propfind, i) for i in range(count) for build in WORKLOAD]
+    bodies += [propupdate({'oc': {'favorite': i % 2}}) for i in range(count)]
+    return bodies, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--calls', type=int, default=100000)
+    args = parser.parse_args()
+    reference, legacy = timed(legacy_build_xml_propfind, legacy_build_propupdate_datas, args.calls)
+    bodies, elapsed = timed(lambda cls, **kwargs: cls.build_xml_propfind(**kwargs),
+                            File.build_xml_propupdate, args.calls)
+    assert bodies == reference
+    print('{} bodies : legacy {:.2f} s ({:.1f} us/body), memoized {:.2f} s ({:.1f} us/body)  (x{:.1f})'.format(
+        len(bodies), legacy, legacy / len(bodies) * 1e6, elapsed, elapsed / len(bodies) * 1e6,
+        legacy / elapsed))
+
+
+if __name__ == '__main__':
+    main()
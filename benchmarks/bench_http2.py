@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Compare transports on many small concurrent PROPFIND requests.
+
+Run against a local Nextcloud (same environment variables as the tests)::
+
+  NEXTCLOUD_HOSTNAME=nextcloud.local python benchmarks/bench_http2.py -n 1000 -w 32
+
+HTTP/2 is only negotiated over TLS (hostname with a domain, see tests/base.py),
+otherwise the 'http2' transport falls back to HTTP/1.1.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from nextcloud import NextCloud
+
+NEXTCLOUD_HOSTNAME = os.environ.get('NEXTCLOUD_HOSTNAME', 'localhost')
+NEXTCLOUD_URL = ("https://{}" if '.' in NEXTCLOUD_HOSTNAME else "http://{}:80"
+                 ).format(NEXTCLOUD_HOSTNAME)
+NEXTCLOUD_USERNAME = os.environ.get('NEXTCLOUD_ADMIN_USER', 'admin')
+NEXTCLOUD_PASSWORD = os.environ.get('NEXTCLOUD_ADMIN_PASSWORD', 'admin')
+NEXTCLOUD_SSL_ENABLED = os.environ.get('NEXTCLOUD_SSL_ENABLED', '1') == '1'
+
+
+def run(transport, requests_count, workers, path):
+    """ Send requests_count Depth 0 PROPFIND with workers threads """
+    nxc = NextCloud(NEXTCLOUD_URL, user=NEXTCLOUD_USERNAME, password=NEXTCLOUD_PASSWORD,
+                    session_kwargs={'transport': transport,
+                                    'verify': NEXTCLOUD_SSL_ENABLED,
+                                    'pool_maxsize': workers})
+    # warm up (connection, authentication)
+    raw = nxc.list_folders(path, depth=0).raw
+    http_version = getattr(raw, 'http_version', 'HTTP/1.1')  # httpx response
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda _: nxc.list_folders(path, depth=0).is_ok,
+                                    range(requests_count)))
+    elapsed = time.time() - start
+    assert all(results)
+    stats = nxc.session.pool_stats if transport == 'requests' else '-'
+    print('{:<10} {:<9} {:>8.2f} s {:>10.1f} req/s  pool: {}'.format(
+        transport, http_version, elapsed, requests_count / elapsed, stats))
+    nxc.logout()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--requests', type=int, default=1000)
+    parser.add_argument('-w', '--workers', type=int, default=32)
+    parser.add_argument('-p', '--path', default='')
+    parser.add_argument('-t', '--transports', nargs='+',
+                        default=['requests', 'http2'])
+    args = parser.parse_args()
+    print('{} PROPFIND on {} with {} workers'.format(
+        args.requests, NEXTCLOUD_URL, args.workers))
+    for transport in args.transports:
+        run(transport, args.requests, args.workers, args.path)
+
+
+if __name__ == '__main__':
+    main()
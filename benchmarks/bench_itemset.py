@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Iterate over, index and look up large item sets.
+
+Compare the current ItemSet to the previous implementation
+(a list wrapping an other list, with __getattribute__ overridden)::
+
+  python benchmarks/bench_itemset.py -n 1000000
+"""
+import argparse
+import time
+
+from nextcloud.api.item_set import ItemSet
+
+
+class Entry(object):  # pylint: disable=useless-object-inheritance,too-few-public-methods
+    """ Item with a few attributes """
+    __slots__ = ('file_id', 'href')
+
+    def __init__(self, file_id):
+        self.file_id = file_id
+        self.href = '/remote.php/dav/files/admin/f%07d' % file_id
+
+
+class LegacyItemSet(list):
+    """ ItemSet before the redesign (the methods used here) """
+
+    def __init__(self, classobj, itemset):  # pylint: disable=super-init-not-called
+        self._itemset = itemset
+        self._class = classobj
+
+    def __getattribute__(self, name):
+        if name not in ['_class', '_itemset']:
+            if len(self._itemset) != 1:
+                return None
+            return object.__getattribute__(self._itemset[0], name)
+        return object.__getattribute__(self, name)
+
+    def __iter__(self):
+        for propset in self._itemset:
+            yield propset
+
+    def __len__(self): return len(self._itemset)
+    def __getitem__(self, idx): return self._itemset[idx]
+
+
+def iterate(items):
+    """ read an attribute of each item """
+    total = 0
+    for item in items:
+        total += item.file_id
+    return total
+
+
+def index(items):
+    """ read each item by index """
+    total = 0
+    for i in range(len(items)):
+        total += items[i].file_id
+    return total
+
+
+def timed(func, items):
+    start = time.time()
+    result = func(items)
+    return result, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--items', type=int, default=1000000)
+    args = parser.parse_args()
+    entries = [Entry(i) for i in range(args.items)]
+    current, legacy = ItemSet(Entry, entries), LegacyItemSet(Entry, entries)
+    print('{} items'.format(args.items))
+    for func in (iterate, index):
+        result, elapsed = timed(func, current)
+        legacy_result, legacy_elapsed = timed(func, legacy)
+        assert result == legacy_result
+        print('{:<8} current {:.3f} s  legacy {:.3f} s  (x{:.1f})'.format(
+            func.__name__, elapsed, legacy_elapsed, legacy_elapsed / elapsed))
+    by_href, elapsed = timed(lambda items: items.index_by('href'), current)
+    print('index_by current {:.3f} s'.format(elapsed))
+    assert by_href[entries[7].href] is entries[7]
+    _, elapsed = timed(lambda items: items.sort_by('href', reverse=True), current)
+    print('sort_by  current {:.3f} s'.format(elapsed))
+    for item in current[:1000:2]:
+        item.href = None
+    _, elapsed = timed(lambda items: items.sort_by('href'), current)
+    print('sort_by  current {:.3f} s (with None values)'.format(elapsed))
+    assert current[-1].href is None
+
+
+if __name__ == '__main__':
+    main()
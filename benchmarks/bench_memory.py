@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Memory used by the File objects of a large PROPFIND listing.
+
+Compare regular, lazy and compact items (list_folders 'lazy' / 'compact')
+and columnar sets (list_folders 'columnar')::
+
+  python benchmarks/bench_memory.py -n 200000
+
+The multistatus is parsed incrementally (as by iter_folders), only the
+items are measured (tracemalloc). Lazy items keep the xml elements :
+they are faster to build, but bigger.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from nextcloud import NextCloud
+from nextcloud.api.column_set import ColumnSet
+from nextcloud.api_wrappers.webdav import File, WebDAV
+from nextcloud.common.parse_xml import iter_elements
+
+from bench_parse import multistatus
+
+
+def build(data, columnar=False, **kwargs):
+    """ Items (or ColumnSet) of a multistatus """
+    elements = iter_elements([data], '{DAV:}response')
+    if columnar:
+        return ColumnSet.from_elements(File, elements)
+    build_item = File._item_builder(**kwargs)  # pylint: disable=protected-access
+    return [build_item(xml_data=element) for element in elements]
+
+
+def measure(data, **kwargs):
+    """ Items of a multistatus, with their memory (bytes) and build time """
+    start = time.time()
+    build(data, **kwargs)
+    elapsed = time.time() - start
+    gc.collect()
+    tracemalloc.start()
+    items = build(data, **kwargs)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return items, size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--entries', type=int, default=200000)
+    args = parser.parse_args()
+    data = multistatus(args.entries)
+    wrapper = WebDAV(NextCloud('http://localhost', user='admin', password='admin'))
+    reference = None
+    for label, kwargs in [('regular', {}), ('lazy', {'lazy': True}),
+                          ('compact', {'compact': True})]:
+        items, size, elapsed = measure(data, wrapper=wrapper, **kwargs)
+        print('{:<8} {:>8.1f} MB  {:>6.0f} bytes/item  {:.2f} s'.format(
+            label, size / 1e6, size / float(len(items)), elapsed))
+        values = [(item.as_dict(), item.get_relative_path(), item.basename(), item.isdir())
+                  for item in items[:100]]
+        if reference is None:
+            reference = values
+        assert values == reference
+        del items
+    columns, size, elapsed = measure(data, columnar=True)
+    print('{:<8} {:>8.1f} MB  {:>6.0f} bytes/item  {:.2f} s'.format(
+        'columnar', size / 1e6, size / float(len(columns)), elapsed))
+    assert columns['href'][:100] == [value[0]['href'] for value in reference]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Convert a large GroupFolders listing (OCS xml) to a dict.
+
+Compare the previous recursive conversion of the parsed tree to
+etree_to_dict (iterative) and iterparse_to_dict (converted while parsed,
+no element tree : used by the responses)::
+
+  python benchmarks/bench_ocs_xml.py -n 5000 -g 20
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+from nextcloud.common import parse_xml
+from nextcloud.common.parse_xml import XPATH_KEY_VALUE_DEF, etree_to_dict, iterparse_to_dict
+
+FOLDER = (
+    '<element><id>%(i)d</id><mount_point>folder%(i)d</mount_point>'
+    '<groups>%(groups)s</groups><quota>-3</quota><size>%(i)d</size><acl>1</acl>'
+    '<manage><element><type>group</type><id>admin</id><displayname>admin</displayname></element></manage>'
+    '</element>'
+)
+GROUP = '<element group_id="group%d" permissions="31"/>'
+
+
+def group_folders(count, groups):
+    """ a GroupFolders listing of count folders with groups ACL entries """
+    entries = ''.join(GROUP % i for i in range(groups))
+    return (
+        '<?xml version="1.0"?><ocs><meta><status>ok</status><statuscode>100</statuscode>'
+        '<message>OK</message></meta><data>'
+        + ''.join(FOLDER % {'i': i, 'groups': entries} for i in range(count)) + '</data></ocs>'
+    ).encode('utf-8')
+
+
+def legacy_etree_to_dict(element):
+    """ etree_to_dict before the iterative conversion """
+    return {element.tag: _legacy_etree_to_dict(element, element.tag)}
+
+
+def _legacy_etree_to_dict(element, xpath):
+    # pylint: disable=too-many-locals, too-many-branches, unnecessary-comprehension
+    node = dict()
+    text = getattr(element, 'text', None)
+    child_nodes = {}
+    element_childs = [k for k in element]
+    if not element_childs and element.tag == 'element':
+        return {k: v for k, v in element.items()}
+    for child in element_childs:  # element's children
+        child_path = xpath + '/' + child.tag
+        sub_node = _legacy_etree_to_dict(child, child_path)
+        if child.tag == 'element':
+            if isinstance(sub_node, dict):
+                cur_tag = element.tag
+                if child_path in XPATH_KEY_VALUE_DEF:
+                    id_tag, value_tag, _type = XPATH_KEY_VALUE_DEF[child_path]
+                    _key = sub_node.get(id_tag, False)
+                    _value = sub_node.get(value_tag, False)
+                    if _value:
+                        _value = _type(_value)
+                else:
+                    _key = sub_node.pop('id', False)
+                    if not _key:
+                        id_tag = cur_tag[:-1] if cur_tag.endswith('s') else cur_tag
+                        _key = sub_node.pop('%s_id' % id_tag, False)
+                    _value = sub_node
+                if not _key:
+                    _key = child.tag
+                child_nodes[_key] = _value
+            elif isinstance(sub_node, list):
+                child_nodes = sub_node
+        else:
+            child_nodes.setdefault(child.tag, []).append(sub_node)
+    if not element_childs:
+        if element.tag == 'data':
+            if text == '0' or not text:
+                text = False
+            elif text == '1':
+                text = True
+        if text is None:
+            text = []
+        return text
+    if isinstance(child_nodes, list):
+        if len(child_nodes) == 1:
+            return child_nodes[0]
+        return child_nodes
+    for key, value in child_nodes.items():
+        if isinstance(value, list):
+            if len(value) == 1:
+                child_nodes[key] = value[0]
+    node.update(child_nodes.items())
+    return node
+
+
+def timed(func, content, runs=3):
+    """ result and best time of some runs """
+    best = None
+    for _ in range(runs):
+        gc.collect()
+        start = time.time()
+        result = func(content)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def peak_memory(func, content):
+    """ memory peak while running func (bytes) """
+    gc.collect()
+    tracemalloc.start()
+    func(content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--folders', type=int, default=5000)
+    parser.add_argument('-g', '--groups', type=int, default=20)
+    args = parser.parse_args()
+    content = group_folders(args.folders, args.groups)
+    print('{} folders, {} groups each ({:.1f} MB)'.format(
+        args.folders, args.groups, len(content) / 1e6))
+
+    def _chunks(content):
+        return (content[i:i + parse_xml.CHUNK_SIZE]
+                for i in range(0, len(content), parse_xml.CHUNK_SIZE))
+
+    reference, legacy = timed(lambda content: legacy_etree_to_dict(ET.fromstring(content)), content)
+    print('{:<20} {:.2f} s  {:>5.0f} MB  (conversion {:.2f} s)'.format(
+        'legacy', legacy, peak_memory(lambda c: legacy_etree_to_dict(ET.fromstring(c)), content) / 1e6,
+        timed(legacy_etree_to_dict, ET.fromstring(content))[1]))
+    tree = ET.fromstring(content)
+    for label, func in [('etree_to_dict', lambda content: etree_to_dict(ET.fromstring(content))),
+                        ('iterparse_to_dict', lambda content: iterparse_to_dict(_chunks(content)))]:
+        result, elapsed = timed(func, content)
+        assert result == reference
+        conversion = ' (conversion {:.2f} s)'.format(
+            timed(etree_to_dict, tree)[1]) if label == 'etree_to_dict' else ''
+        print('{:<20} {:.2f} s  {:>5.0f} MB  (x{:.1f}){}'.format(
+            label, elapsed, peak_memory(func, content) / 1e6, legacy / elapsed, conversion))
+
+
+if __name__ == '__main__':
+    main()
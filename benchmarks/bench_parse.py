@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Parse a 50k entries PROPFIND multistatus into File objects.
+
+Compare the model dispatch tables (Item._parse_xml) with the previous
+generic parsing (regex on each tag, linear search of the properties),
+and lazy items (File.LAZY) when only the name and type are read::
+
+  python benchmarks/bench_parse.py -n 50000 --min-speedup 2
+
+Exits with an error if the results differ, or if the speedup is lower
+than --min-speedup (to guard against regressions).
+"""
+import argparse
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from nextcloud.api.properties import NAMESPACES_MAP
+from nextcloud.api_wrappers.webdav import File
+from nextcloud.compat import unquote, decode_string
+
+ENTRY = (
+    '<d:response><d:href>/remote.php/dav/files/admin/folder/file%(i)d.txt</d:href>'
+    '<d:propstat><d:prop>'
+    '<d:getlastmodified>Mon, 20 Jan 2020 20:41:00 GMT</d:getlastmodified>'
+    '<d:getetag>"5e2610dc6c8e%(i)d"</d:getetag>'
+    '<d:getcontenttype>text/plain</d:getcontenttype>'
+    '<d:resourcetype/>'
+    '<d:getcontentlength>%(i)d</d:getcontentlength>'
+    '<oc:id>%(i)08docy0zrqb9l3v</oc:id>'
+    '<oc:fileid>%(i)d</oc:fileid>'
+    '<oc:favorite>0</oc:favorite>'
+    '<oc:owner-id>admin</oc:owner-id>'
+    '<oc:owner-display-name>admin</oc:owner-display-name>'
+    '<oc:size>%(i)d</oc:size>'
+    '<nc:has-preview>false</nc:has-preview>'
+    '</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat>'
+    '<d:propstat><d:prop><oc:checksums/></d:prop>'
+    '<d:status>HTTP/1.1 404 Not Found</d:status></d:propstat>'
+    '</d:response>'
+)
+
+
+def multistatus(count):
+    """ A multistatus with count entries """
+    return (
+        '<?xml version="1.0"?><d:multistatus xmlns:d="DAV:" xmlns:s="http://sabredav.org/ns"'
+        ' xmlns:oc="http://owncloud.org/ns" xmlns:nc="http://nextcloud.org/ns">'
+        + ''.join(ENTRY % {'i': i} for i in range(count)) + '</d:multistatus>'
+    ).encode('utf-8')
+
+
+def legacy_parse_xml(item, xml_data):
+    """ Item._parse_xml before the dispatch tables """
+    for attr in item._attrs:
+        item[attr.attr_name] = None
+    item.href = decode_string(unquote(xml_data.find('d:href', NAMESPACES_MAP).text))
+    for propstat in xml_data.iter('{DAV:}propstat'):
+        if propstat.find('d:status', NAMESPACES_MAP).text != item.SUCCESS_STATUS:
+            continue
+        for xml_property in propstat.find('d:prop', NAMESPACES_MAP):
+            property_name = re.sub('{.*}', '', xml_property.tag)
+            for prop in type(item)._fetch_properties(property_name):
+                item[prop.attr_name] = prop.get_value(xml_property)
+
+
+def parse(elements):
+    """ Current parsing """
+    return [File(xml_data=element) for element in elements]
+
+
+def lazy_filter(elements):
+    """ Lazy parsing, then filter on name and type """
+    return [f for f in (File(xml_data=element, lazy=True) for element in elements)
+            if f.href.endswith('0.txt') and f.isfile()]
+
+
+def legacy_parse(elements):
+    """ Previous parsing """
+    files = []
+    for element in elements:
+        item = File()
+        legacy_parse_xml(item, element)
+        files.append(item)
+    return files
+
+
+def timed(func, elements, repeat):
+    """ Best time of repeat runs """
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.time()
+        result = func(elements)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--entries', type=int, default=50000)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    parser.add_argument('--min-speedup', type=float, default=None)
+    args = parser.parse_args()
+    elements = list(ET.fromstring(multistatus(args.entries)))
+    legacy_time, legacy_files = timed(legacy_parse, elements, args.repeat)
+    new_time, files = timed(parse, elements, args.repeat)
+    if [f.__dict__ for f in files] != [f.__dict__ for f in legacy_files]:
+        sys.exit('Parsed values differ')
+    lazy_time, lazy_files = timed(lazy_filter, elements, args.repeat)
+    if ([f.as_dict() for f in lazy_files] !=
+            [f.as_dict() for f in files if f.isfile() and f.href.endswith('0.txt')]):
+        sys.exit('Lazy values differ')
+    speedup = legacy_time / new_time
+    print('{} entries  legacy: {:.3f} s  dispatch tables: {:.3f} s  ({:.0f} entries/s)'
+          '  speedup: x{:.1f}'.format(args.entries, legacy_time, new_time,
+                                      args.entries / new_time, speedup))
+    print('lazy items, filtered on name and type: {:.3f} s'.format(lazy_time))
+    if args.min_speedup and speedup < args.min_speedup:
+        sys.exit('Speedup x{:.1f} lower than x{}'.format(speedup, args.min_speedup))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Decode large responses : get_users (OCS json) and PROPFIND (multistatus).
+
+Compare the previous pipeline (content decoded to str, then parsed again
+by requests' json() or from the str) to the current one (parsed once from
+bytes, with orjson / lxml when installed)::
+
+  python benchmarks/bench_responses.py -u 1000000 -n 100000 -q 200
+
+and the memory kept by a queue of PROPFIND responses, with and without
+lean responses (content released once parsed).
+
+Memory peaks are measured with tracemalloc, which doesn't see the memory
+of lxml trees (lazy listings are parsed with lxml when it is installed).
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+import requests
+
+from nextcloud.api_wrappers.webdav import File
+from nextcloud.codes import ProvisioningCode, WebDAVCode
+from nextcloud.common import parse_json, parse_xml
+from nextcloud.response import ProvisioningApiResponse, WebDAVResponse
+
+from bench_parse import multistatus
+
+
+def raw_response(content, content_type):
+    """ requests.Response of a content """
+    raw = requests.Response()
+    raw.status_code = 200 if 'json' in content_type else 207
+    raw.headers['Content-Type'] = content_type
+    raw._content = content  # pylint: disable=protected-access
+    return raw
+
+
+def legacy_ocs_data(raw):
+    """ get_users data before the rework """
+    data = raw.content.decode('UTF-8')
+    if data.startswith("<?xml"):
+        return parse_xml.etree_to_dict(ET.fromstring(data))
+    return raw.json()['ocs']['data']
+
+
+def legacy_propfind_data(raw):
+    """ list_folders data before the rework """
+    data = raw.content.decode('UTF-8')
+    return [File(xml_data=element) for element in ET.fromstring(data)]
+
+
+def timed(func, raw, digest, runs=3):
+    """ digest of the result and best time of some runs """
+    best = None
+    for _ in range(runs):
+        gc.collect()
+        start = time.time()
+        result = func(raw)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+        result_digest = digest(result)
+        del result  # not kept alive (garbage collection) while timing the next run
+    return result_digest, best
+
+
+def peak_memory(func, raw):
+    """ memory peak while running func (bytes) """
+    gc.collect()
+    tracemalloc.start()
+    func(raw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def retained_memory(build, count):
+    """ memory kept by count results of build (bytes) """
+    gc.collect()
+    tracemalloc.start()
+    queue = [build() for _ in range(count)]
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del queue
+    return current
+
+
+def compare(label, legacy, current, raw, digest=lambda data: data):
+    """ print the time and memory peak of both pipelines """
+    reference, legacy_elapsed = timed(legacy, raw, digest)
+    result, elapsed = timed(current, raw, digest)
+    assert result == reference
+    print('{:<22} legacy {:.2f} s {:>5.0f} MB  current {:.2f} s {:>5.0f} MB  (x{:.1f})'.format(
+        label, legacy_elapsed, peak_memory(legacy, raw) / 1e6,
+        elapsed, peak_memory(current, raw) / 1e6, legacy_elapsed / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-u', '--users', type=int, default=1000000)
+    parser.add_argument('-n', '--entries', type=int, default=100000)
+    parser.add_argument('-q', '--queued', type=int, default=200)
+    args = parser.parse_args()
+    print('json backend : {}, lxml : {}'.format(
+        parse_json.BACKEND, 'yes' if parse_xml.lxml_etree is not None else 'no'))
+
+    users = json.dumps({'ocs': {
+        'meta': {'status': 'ok', 'statuscode': 100, 'message': 'OK'},
+        'data': {'users': ['user%07d' % i for i in range(args.users)]}}}).encode('utf-8')
+    raw = raw_response(users, 'application/json; charset=utf-8')
+    compare('get_users ({:.0f} MB)'.format(len(users) / 1e6), legacy_ocs_data,
+            lambda raw: ProvisioningApiResponse(
+                raw, success_code=ProvisioningCode.SUCCESS).data, raw)
+
+    content = multistatus(args.entries)
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    raw = raw_response(content, 'application/xml; charset=utf-8')
+
+    def _propfind(raw, **kwargs):
+        resp = WebDAVResponse(raw, success_code=WebDAVCode.MULTISTATUS)
+        return File.from_response(resp, **kwargs).data
+
+    def _digest(files):
+        return len(files), [file_data.as_dict() for file_data in files[::1000]]
+
+    compare('PROPFIND ({:.0f} MB)'.format(len(content) / 1e6), legacy_propfind_data,
+            _propfind, raw, _digest)
+    # lazy items : only href is read
+    compare('PROPFIND lazy, href',
+            lambda raw: [file_data.href for file_data in legacy_propfind_data(raw)],
+            lambda raw: [file_data.href for file_data in _propfind(raw, lazy=True)], raw)
+
+    # responses kept in a queue : 100 entries PROPFIND, 1000 users get_users
+    content = multistatus(100)
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    users = json.dumps({'ocs': {
+        'meta': {'status': 'ok', 'statuscode': 100, 'message': 'OK'},
+        'data': {'users': ['user%07d' % i for i in range(1000)]}}}).encode('utf-8')
+
+    def _propfind_queued(lean):
+        # a content per response, as received
+        raw = raw_response(bytes(bytearray(content)), 'application/xml; charset=utf-8')
+        raw.request = requests.Request('PROPFIND', 'https://cloud.example/dav').prepare()
+        resp = WebDAVResponse(raw, success_code=WebDAVCode.MULTISTATUS, lean=lean)
+        return File.from_response(resp)
+
+    def _users_queued(lean):
+        raw = raw_response(bytes(bytearray(users)), 'application/json; charset=utf-8')
+        raw.request = requests.Request('GET', 'https://cloud.example/ocs').prepare()
+        return ProvisioningApiResponse(raw, success_code=ProvisioningCode.SUCCESS, lean=lean)
+
+    for label, build in [('PROPFIND', _propfind_queued), ('get_users', _users_queued)]:
+        kept = retained_memory(lambda: build(False), args.queued)
+        lean_kept = retained_memory(lambda: build(True), args.queued)
+        print('{} queued {:<10} : {:.1f} MB, lean {:.1f} MB  (-{:.0%})'.format(
+            args.queued, label, kept / 1e6, lean_kept / 1e6, 1 - lean_kept / kept))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Convert the DAV:getlastmodified dates of a large listing to epoch times.
+
+Compare the previous conversion (strptime with TZ environment changes)
+to timestamp_from_string (memo cache) and timestamps_from_strings (batch)::
+
+  python benchmarks/bench_timestamps.py -n 1000000 -d 20000
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime
+from email.utils import formatdate
+
+from nextcloud.compat import timestamp_from_datetime
+from nextcloud.common import timestamping
+from nextcloud.common.timestamping import (
+    DATETIME_FORMAT,
+    timestamp_from_string,
+    timestamps_from_strings
+)
+
+
+def legacy_timestamp_from_string(rfc1123_date):
+    """ timestamp_from_string before the dedicated parser """
+    _time = None
+    try:
+        _tz = os.environ.get('TZ', '')
+        os.environ['TZ'] = 'UTC'
+        _time = datetime.strptime(rfc1123_date, DATETIME_FORMAT)
+        os.environ['TZ'] = _tz
+    except ValueError:
+        pass
+    return timestamp_from_datetime(_time) if _time else None
+
+
+def dates(count, distinct):
+    """ count rfc1123-dates, among distinct values """
+    values = [formatdate(1500000000 + i * 3607, usegmt=True) for i in range(distinct)]
+    return [random.choice(values) for _ in range(count)]
+
+
+def timed(func, values):
+    timestamping._CACHE.clear()  # pylint: disable=protected-access
+    start = time.time()
+    result = func(values)
+    return result, time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', '--dates', type=int, default=1000000)
+    parser.add_argument('-d', '--distinct', type=int, default=20000)
+    args = parser.parse_args()
+    os.environ['TZ'] = 'UTC'  # the previous conversion was only right in UTC
+    values = dates(args.dates, args.distinct)
+    print('{} dates, {} distinct'.format(args.dates, args.distinct))
+    reference, legacy = timed(lambda dates: [legacy_timestamp_from_string(d) for d in dates],
+                              values)
+    print('{:<24} {:.2f} s'.format('legacy', legacy))
+    for label, func in [
+            ('timestamp_from_string', lambda dates: [timestamp_from_string(d) for d in dates]),
+            ('timestamps_from_strings', timestamps_from_strings)]:
+        result, elapsed = timed(func, values)
+        assert result == reference
+        print('{:<24} {:.2f} s  (x{:.1f})'.format(label, elapsed, legacy / elapsed))
+    distinct = sorted(set(values))
+    _, elapsed = timed(lambda dates: [legacy_timestamp_from_string(d) for d in dates], distinct)
+    _, parser_elapsed = timed(timestamps_from_strings, distinct)
+    print('{} distinct dates : legacy {:.3f} s, parser {:.3f} s  (x{:.1f})'.format(
+        len(distinct), elapsed, parser_elapsed, elapsed / parser_elapsed))
+
+
+if __name__ == '__main__':
+    main()
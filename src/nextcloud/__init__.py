@@ -3,6 +3,8 @@
 import logging
 from .session import Session
 from .api_wrappers import API_WRAPPER_CLASSES
+from . import deadline as _deadline
+from . import response as _response
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,6 +35,19 @@ class NextCloud(object):
       >>> with Nextcloud('https://nextcloud.mysite.com',
       ...                user='admin', password='admin') as nxc:
       ...     # some actions #
+
+    Thread safety::
+
+      A single client (and its pooled session) can be shared by many threads.
+      Size the connection pool for the number of workers, and use pool_block
+      to never open more connections than pool_maxsize:
+
+      >>> nxc = Nextcloud('https://nextcloud.mysite.com', user='admin', password='admin',
+      ...                 session_kwargs={'pool_maxsize': 32, 'pool_block': True})
+      >>> with ThreadPoolExecutor(max_workers=32) as executor:
+      ...     resps = list(executor.map(nxc.get_user, user_ids))
+
+      login() and logout() shall not be called while other threads are requesting.
     """
 
     # pylint: disable=too-many-arguments
@@ -51,6 +66,7 @@ class NextCloud(object):
             url=endpoint, user=user, password=password, auth=auth,
             session_kwargs=session_kwargs
         )
+        self._api_methods = {}
         for functionality_class in API_WRAPPER_CLASSES:
             functionality_instance = functionality_class(self)
             for potential_method in dir(functionality_instance):
@@ -58,8 +74,9 @@ class NextCloud(object):
                     if not callable(getattr(functionality_instance, potential_method)):
                         pass
                     else:
-                        setattr(self, potential_method, getattr(
-                            functionality_instance, potential_method))
+                        method = getattr(functionality_instance, potential_method)
+                        self._api_methods[potential_method] = method
+                        setattr(self, potential_method, method)
 
     @property
     def user(self):
@@ -88,6 +105,32 @@ class NextCloud(object):
         " Session logout() "
         self.session.logout()
 
+    @staticmethod
+    def deadline(seconds):
+        """
+        Context manager limiting the time spent by all the requests
+        made in the block (see nextcloud.deadline)
+
+        >>> with nxc.deadline(30):
+        ...     nxc.download_file('foo/bar.txt')
+
+        :param seconds: time budget
+        """
+        return _deadline.deadline(seconds)
+
+    @staticmethod
+    def lean_responses(lean=True):
+        """
+        Context manager releasing the content of the responses received
+        in the block once parsed (see session_kwargs lean option)
+
+        >>> with nxc.lean_responses():
+        ...     queue.put(nxc.list_folders('big/folder'))
+
+        :param lean: False to keep the contents in the block
+        """
+        return _response.lean_responses(lean)
+
     def _with_auth(self, auth=None, **kwargs):
         #pylint: disable=protected-access
         init_kwargs = {'session_kwargs': self.session._session_kwargs}
@@ -103,3 +146,9 @@ class NextCloud(object):
         if 'session_kwargs' in kwargs:
             return self._with_auth(auth=self.session.auth, **kwargs)
         return self.__class__(session=self.session, **kwargs)
+
+
+try:
+    from .aio import AsyncNextCloud
+except SyntaxError:  # python 2
+    AsyncNextCloud = None
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Transport adapters : connection pooling with statistics
+"""
+import threading
+import requests
+from requests.packages.urllib3 import connectionpool
+
+
+# pylint: disable=useless-object-inheritance
+class PoolStats(object):
+    """
+    Counters shared by the connection pools of a session
+
+    - opened  : TCP/TLS connections established (including reconnections)
+    - reused  : requests sent on an already established connection
+    - dropped : connections closed by the pool (dropped by the server,
+                discarded on error, or discarded because the pool was full)
+    """
+    FIELDS = ('opened', 'reused', 'dropped')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.dropped = 0
+
+    def incr(self, *names):
+        """ Increment the given counters """
+        with self._lock:
+            for name in names:
+                setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self):
+        """ Return current counters as a {name: value} dict """
+        with self._lock:
+            return {k: getattr(self, k) for k in self.FIELDS}
+
+    def __repr__(self):
+        return "<PoolStats %s>" % self.as_dict()
+
+
+# pylint: disable=too-few-public-methods
+class _StatsPoolMixin(object):
+    """ Count connections life cycle in a urllib3 connection pool """
+    stats = None
+
+    def _new_conn(self):
+        conn = super(_StatsPoolMixin, self)._new_conn()
+        conn.nc_fresh = True
+        self.stats.incr('opened')
+        return conn
+
+    def _get_conn(self, timeout=None):
+        conn = super(_StatsPoolMixin, self)._get_conn(timeout=timeout)
+        if getattr(conn, 'nc_fresh', False):
+            conn.nc_fresh = False
+        elif getattr(conn, 'sock', None) is None:
+            # the pool reset a connection dropped by the server
+            self.stats.incr('dropped', 'opened')
+        else:
+            self.stats.incr('reused')
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is None or (self.pool is not None and self.pool.full()):
+            # discarded on error or because the pool is full
+            self.stats.incr('dropped')
+        super(_StatsPoolMixin, self)._put_conn(conn)
+
+
+class PoolingHTTPAdapter(requests.adapters.HTTPAdapter):
+    """
+    HTTPAdapter counting connections in a PoolStats object
+
+    :param stats: PoolStats (a new one by default)
+    :param (any): see requests.adapters.HTTPAdapter
+                  (pool_connections, pool_maxsize, pool_block, max_retries)
+    """
+
+    def __init__(self, stats=None, **kwargs):
+        self.stats = stats or PoolStats()
+        super(PoolingHTTPAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(PoolingHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        self.stats = getattr(self, 'stats', None) or PoolStats()  # unpickled
+        attrs = {'stats': self.stats}
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('HTTPConnectionPool', (
+                _StatsPoolMixin, connectionpool.HTTPConnectionPool), attrs),
+            'https': type('HTTPSConnectionPool', (
+                _StatsPoolMixin, connectionpool.HTTPSConnectionPool), attrs),
+        }
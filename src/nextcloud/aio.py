@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+"""
+Asyncio client. See AsyncNextCloud object.
+
+The API wrappers are plain synchronous code (they chain requests and build
+responses/items). AsyncNextCloud reuses them unchanged, every HTTP exchange
+being delegated to an ``httpx.AsyncClient`` driven by the event loop :
+
+- a wrapper call making a single request (most of them : get_user,
+  list_folders...) runs in the event loop. It is stopped at its request,
+  which is awaited, then run again with the response. Hundreds of such
+  calls can be gathered, without threads.
+- other calls (several requests, streamed transfers, file bodies) and the
+  steps of generator methods run on worker threads (at most max_workers at
+  once), which only wait for the loop.
+
+Requires ``httpx`` (``pip install nextcloud-api-wrapper[async]``).
+"""
+import asyncio
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import NextCloud
+from .deadline import Deadline, as_deadline, current_deadline
+from .exceptions import NextCloudConnectionError, NextCloudTimeoutError
+from .common.streams import iter_body
+from .session import Session, _seek, _tell
+from .transports import (
+    httpx, httpx_client_kwargs, httpx_request_kwargs, httpx_timeout, send_kwargs
+)
+
+DEFAULT_MAX_WORKERS = 64
+# end of a generator run in a worker thread
+_END = object()
+# wrapper call in progress (see AsyncNextCloud._run)
+_CALL = contextvars.ContextVar('nextcloud_aio_call', default=None)
+# request bodies which can be sent again by a call run in a worker thread
+_REPLAYABLE_DATA = (type(None), bytes, str, dict)
+
+
+class _LeaveLoop(BaseException):
+    """
+    Stop a wrapper call run in the event loop, to send its request
+    (request is None : the call must run in a worker thread)
+    """
+
+    def __init__(self, request=None):
+        super(_LeaveLoop, self).__init__()
+        self.request = request
+
+
+class _WrapperCall(object):
+    """
+    A wrapper call run in the event loop : its first request stops it
+    (_LeaveLoop), then it runs again and gets the response. It runs in a
+    worker thread (with the same response) if it makes another request.
+    """
+
+    def __init__(self):
+        self.thread = threading.get_ident()
+        self.in_loop = True
+        self.response = None
+        self.used = False
+        self.aborted = False
+
+    def start(self, in_loop=True):
+        """ (Re)start the call in the current thread """
+        self.thread = threading.get_ident()
+        self.in_loop = in_loop
+        self.used = self.aborted = False
+
+    def response_of(self, method, url, kwargs):
+        """ Response of a request of the call if already received, None if it must be sent """
+        own = threading.get_ident() == self.thread
+        if own and self.response is not None and not self.used:
+            self.used = True
+            return self.response
+        if self.in_loop:
+            # the result of a call which tried to leave the loop is discarded
+            self.aborted = True
+            if (own and self.response is None and not kwargs.get('stream')
+                    and isinstance(kwargs.get('data'), _REPLAYABLE_DATA)):
+                kwargs['deadline'] = Deadline.earliest(as_deadline(kwargs.get('deadline')),
+                                                       current_deadline())
+                raise _LeaveLoop((method, url, kwargs))
+            raise _LeaveLoop()
+        return None
+
+
+# pylint: disable=useless-object-inheritance
+async def _aiter_body(body):
+    """ Read a file object / iterator body in the default executor """
+    loop = asyncio.get_running_loop()
+    blocks = iter_body(body)
+    while True:
+        block = await loop.run_in_executor(None, next, blocks, None)
+        if block is None:
+            return
+        yield block
+
+
+class StreamedResponse(object):
+    """
+    A streamed httpx.Response, read from a worker thread :
+    each chunk is awaited in the event loop.
+    """
+
+    def __init__(self, response, loop):
+        self._response = response
+        self._loop = loop
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def _wait(self, coroutine):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coroutine.close()
+            raise RuntimeError('Streamed response read from the event loop,'
+                               ' iterate it in a worker thread (run_in_executor)')
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def iter_bytes(self, chunk_size=None):
+        """ see httpx.Response.iter_bytes """
+        chunks = self._response.aiter_bytes(chunk_size)
+        try:
+            while True:
+                try:
+                    yield self._wait(chunks.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._wait(chunks.aclose())
+
+    def read(self):
+        """ see httpx.Response.read """
+        return self._wait(self._response.aread())
+
+    def close(self):
+        """ see httpx.Response.close """
+        self._wait(self._response.aclose())
+
+
+class AsyncSession(Session):
+    """
+    Session requesting through an httpx.AsyncClient
+
+    Synchronous calls (from the wrappers) are submitted to the event loop
+    the session is bound to, and wait for the result.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(AsyncSession, self).__init__(*args, **kwargs)
+        self._loop = None
+        self._client = None
+
+    async def bind(self, loop):
+        """
+        Attach the session to the running event loop. The httpx client opened
+        in a previous loop is closed in that loop (it can't be used from another)
+
+        :raises RuntimeError: if the previous loop is no longer running
+                              while its client is open
+        """
+        if loop is self._loop:
+            return
+        previous, client = self._loop, self._client
+        if client is not None and not previous.is_running():
+            raise RuntimeError('AsyncNextCloud is still open in a previous event loop :'
+                               ' close it (await close(), or async with) before using'
+                               ' it in another loop')
+        self._loop, self._client = loop, None
+        if client is not None:
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(client.aclose(), previous))
+
+    def _new_session(self):
+        # the httpx client is created in the event loop (see _get_client)
+        return None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(**httpx_client_kwargs(
+                self._session_kwargs, self._pool_kwargs, auth=self.auth,
+                http2=self._session_kwargs.get('transport') == 'http2'))
+        return self._client
+
+    # pylint: disable=too-many-locals
+    async def arequest(self, method, url, retry=None, deadline=None, stream=False,
+                       **kwargs):
+        """
+        Apply the request in the event loop (see Session.request)
+
+        :returns: httpx.Response (same interface as requests.Response for responses)
+        """
+        deadline = Deadline.earliest(as_deadline(deadline), current_deadline())
+        timeout = kwargs.get('timeout', self._session_kwargs.get('timeout'))
+        policy = retry or self.retry_policy
+        policy.on_request()
+        data = kwargs.get('data')
+        position = _tell(data)
+        request_kwargs = httpx_request_kwargs(kwargs)
+        start = time.time()
+        retry_number = 0
+        while True:
+            response, error = None, None
+            if 'content' in request_kwargs and not isinstance(data, (bytes, str)):
+                # file objects and iterators are read by blocks
+                request_kwargs['content'] = _aiter_body(data)
+            if deadline is not None:
+                deadline.check(url)
+                request_kwargs['timeout'] = httpx_timeout(deadline.clamp_timeout(timeout))
+            try:
+                response = await self._send(method, url, request_kwargs, stream)
+            except httpx.HTTPError as request_error:
+                error = request_error
+            delay = policy.next_delay(method, retry_number, elapsed=time.time() - start,
+                                      response=response, error=error, data=data)
+            if delay is None or (deadline is not None and delay >= deadline.remaining()):
+                break
+            if response is not None:
+                await response.aclose()
+            await asyncio.sleep(delay)
+            _seek(data, position)
+            retry_number += 1
+        if error is not None:
+            if isinstance(error, httpx.TimeoutException):
+                raise NextCloudTimeoutError(
+                    'Request to NextCloud timed out', url, error)
+            raise NextCloudConnectionError(
+                'Failed to establish connection to NextCloud', url, error)
+        return response
+
+    async def _send(self, method, url, request_kwargs, stream=False):
+        client = self._get_client()
+        if stream:
+            build, send = send_kwargs(request_kwargs)
+            return await client.send(
+                client.build_request(method.upper(), url, **build), stream=True, **send)
+        return await client.request(method.upper(), url, **request_kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Apply the request from a worker thread, waiting for the event loop
+        (or get the response awaited for a call run in the event loop).
+
+        :returns: httpx.Response
+        """
+        call = _CALL.get()
+        if call is not None:
+            response = call.response_of(method, url, kwargs)
+            if response is not None:
+                return response
+        if self._loop is None:
+            raise RuntimeError('AsyncSession is not bound to an event loop,'
+                               ' use it through AsyncNextCloud')
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError('Blocking request called from the event loop,'
+                               ' await AsyncNextCloud methods instead')
+        response = asyncio.run_coroutine_threadsafe(
+            self.arequest(method, url, **kwargs), self._loop
+        ).result()
+        if kwargs.get('stream'):
+            return StreamedResponse(response, self._loop)
+        return response
+
+    async def aclose(self):
+        """ Close the httpx client """
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+    def logout(self):
+        """ Close the httpx client (from a worker thread) """
+        if self._client is not None and self._loop is not None:
+            if self._loop.is_running():
+                asyncio.run_coroutine_threadsafe(self.aclose(), self._loop).result()
+            else:
+                self._client = None
+        return True
+
+
+# pylint: disable=useless-object-inheritance
+class AsyncNextCloud(object):
+    """
+    An asyncio NextCloud/OwnCloud client.
+    Provide the same methods than NextCloud, as coroutines
+    (generator methods as asynchronous generators).
+    Calls making a single request run in the event loop, others in
+    worker threads (see nextcloud.aio).
+
+    Basic Usage::
+
+      >>> from nextcloud import AsyncNextCloud
+      >>> async def main():
+      ...     async with AsyncNextCloud('https://nextcloud.mysite.com',
+      ...                               user='admin', password='admin') as nxc:
+      ...         resps = await asyncio.gather(
+      ...             *[nxc.get_user(uid) for uid in ['alice', 'bob']])
+      >>> asyncio.run(main())
+
+    :param max_workers: number of wrapper calls run at once in worker threads
+                        (several requests, streamed transfers, generator steps ;
+                        default 64). Calls run in the event loop are not limited.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, endpoint=None,
+                 user=None, password=None, auth=None,
+                 session_kwargs=None,
+                 session=None, max_workers=None, **kwargs):
+        if httpx is None:
+            raise ImportError("AsyncNextCloud requires 'httpx'"
+                              " (pip install nextcloud-api-wrapper[async])")
+        self.session = session or AsyncSession(
+            url=endpoint, user=user, password=password, auth=auth,
+            session_kwargs=session_kwargs
+        )
+        self.client = NextCloud(session=self.session, **kwargs)
+        self._max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self._executor = None
+        # pylint: disable=protected-access
+        for name, method in self.client._api_methods.items():
+            if inspect.isgeneratorfunction(method):
+                setattr(self, name, self._as_async_generator(method))
+            else:
+                setattr(self, name, self._as_coroutine(method))
+
+    @property
+    def user(self):
+        " Session User "
+        return self.session.user
+
+    @property
+    def url(self):
+        " Session Url "
+        return self.session.url
+
+    async def __aenter__(self):
+        await self.login()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def _get_executor(self):
+        # created on first need, again after close()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                thread_name_prefix='nextcloud-aio')
+        return self._executor
+
+    async def _run(self, func, *args, **kwargs):
+        """ Run a wrapper call in the event loop, or in a worker thread (see _WrapperCall) """
+        await self.session.bind(asyncio.get_running_loop())
+        call = _WrapperCall()
+        while True:
+            ctx = contextvars.copy_context()
+            ctx.run(_CALL.set, call)
+            call.start()
+            request = None
+            try:
+                result = ctx.run(func, *args, **kwargs)
+            except _LeaveLoop as leave:
+                request = leave.request
+            except BaseException:  # pylint: disable=broad-except
+                if not call.aborted:
+                    raise
+            else:
+                if not call.aborted:
+                    return result
+            if request is None:
+                return await self._run_in_thread(call, func, *args, **kwargs)
+            method, url, request_kwargs = request
+            call.response = await self.session.arequest(method, url, **request_kwargs)
+
+    async def _run_in_thread(self, call, func, *args, **kwargs):
+        """ Run func in a worker thread (call : _WrapperCall whose response is reused) """
+        loop = asyncio.get_running_loop()
+        await self.session.bind(loop)
+        ctx = contextvars.copy_context()
+        if call is not None:
+            ctx.run(_CALL.set, call)
+
+            def _call(*args, **kwargs):
+                call.start(in_loop=False)
+                return func(*args, **kwargs)
+        else:
+            _call = func
+        return await loop.run_in_executor(
+            self._get_executor(), functools.partial(ctx.run, _call, *args, **kwargs))
+
+    def _as_coroutine(self, method):
+        @functools.wraps(method)
+        async def _api_call(*args, **kwargs):
+            return await self._run(method, *args, **kwargs)
+        return _api_call
+
+    def _as_async_generator(self, method):
+        """ Generator methods (iter_*) : each item is computed in a worker thread """
+        @functools.wraps(method)
+        async def _api_iter(*args, **kwargs):
+            items = method(*args, **kwargs)  # nothing is run yet
+            try:
+                while True:
+                    item = await self._run_in_thread(None, next, items, _END)
+                    if item is _END:
+                        return
+                    yield item
+            finally:
+                await self._run_in_thread(None, items.close)
+        return _api_iter
+
+    async def login(self, user=None, password=None, auth=None):
+        " Session login() "
+        return await self._run_in_thread(None, self.client.login,
+                                         user=user, password=password, auth=auth)
+
+    async def logout(self):
+        " Session logout() "
+        await self.session.aclose()
+
+    async def close(self):
+        " Close the session and stop the worker threads "
+        await self.logout()
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -1,2 +1,3 @@
 from .model import Item
 from .properties import Property
+from .column_set import ColumnSet
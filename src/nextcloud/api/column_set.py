@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar collection of items : each property in a typed contiguous array.
+
+Columns are declared by the model (Item.COLUMNS) as (name, type) pairs :
+    'int'        64 bits integers (missing values : MISSING)
+    'timestamp'  rfc1123 dates as epoch seconds (missing values : MISSING)
+    'str'        utf-8 strings (missing values : '')
+
+Numeric columns are exported without copy to NumPy and Arrow, string
+columns are exported without copy to Arrow (utf-8 data + offsets buffers).
+Exported arrays share the memory of the set : it can't be extended afterwards.
+"""
+import array
+import csv
+import io
+import six
+from ..common.timestamping import timestamp_from_string
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# value of missing integers and timestamps
+MISSING = -1
+# number of items of the sets yielded by iter_batches
+BATCH_SIZE = 10000
+
+INT64 = 'q' if hasattr(array, 'typecodes') else 'l'  # python 2 : no 'q'
+
+
+# column type -> function converting the property values
+COLUMN_TYPES = {
+    'int': int,
+    'timestamp': timestamp_from_string,
+    'str': six.text_type,
+}
+
+
+def _require(module, name):
+    if module is None:
+        raise ImportError("this export requires '%s' (pip install %s)" % (name, name))
+    return module
+
+
+# pylint: disable=useless-object-inheritance
+class ColumnSet(object):
+    """
+    Items of a model stored by columns (see Item.COLUMNS)
+
+    :param model:   Item subclass
+    :param columns: list of (name, type), default model.COLUMNS
+    """
+
+    def __init__(self, model, columns=None):
+        self._model = model
+        self._columns = list(columns or model.COLUMNS)
+        self._length = 0
+        self._values = {}
+        self._offsets = {}
+        self._missing = {}
+        for name, column_type in self._columns:
+            if column_type not in COLUMN_TYPES:
+                raise ValueError('Unknown column type %r (%s)' % (column_type, name))
+            self._missing[name] = []
+            if column_type == 'str':
+                self._values[name] = bytearray()
+                self._offsets[name] = array.array(INT64, [0])
+            else:
+                self._values[name] = array.array(INT64)
+
+    def __repr__(self):
+        return '<%s of %s : %d items, columns %s>' % (
+            type(self).__name__, self._model.__name__, self._length, self.names)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    @property
+    def names(self):
+        """ column names """
+        return [name for name, _ in self._columns]
+
+    def append(self, values):
+        """
+        Add an item
+
+        :param values: dict {column name: property value (as parsed by the model)}
+        """
+        row = self._length
+        for name, column_type in self._columns:
+            value = values.get(name)
+            convert = COLUMN_TYPES[column_type]
+            if value is not None:
+                try:
+                    value = convert(value)
+                except (TypeError, ValueError):
+                    value = None
+            if value is None:
+                self._missing[name].append(row)
+            if column_type == 'str':
+                data = self._values[name]
+                if value:
+                    data += value.encode('utf-8')
+                self._offsets[name].append(len(data))
+            else:
+                self._values[name].append(MISSING if value is None else value)
+        self._length += 1
+
+    def append_xml(self, xml_data):
+        """ Add an item from a xml d:response element """
+        # pylint: disable=protected-access
+        model = self._model
+        href, props = model._xml_href_props(xml_data)
+        raw_values = model._index_xml(props, compute=False)
+        values = {}
+        for name, _ in self._columns:
+            get_value, raw_value = raw_values.get(name, (None, None))
+            values[name] = get_value(raw_value) if get_value else raw_value
+        if values.get('href') is None:  # not in props : keep d:href
+            values['href'] = href
+        self.append(values)
+
+    def column(self, name):
+        """
+        Values of a column
+
+        :returns: array of int (see MISSING) or list of str
+        """
+        values = self._values[name]
+        if name not in self._offsets:
+            return values
+        offsets = self._offsets[name]
+        return [values[offsets[i]:offsets[i + 1]].decode('utf-8')
+                for i in range(self._length)]
+
+    def missing(self, name):
+        """ Indexes of the items without value in a column """
+        return list(self._missing[name])
+
+    def rows(self):
+        """ Iterate over the items as tuples of values (None if missing) """
+        columns = []
+        for name, _ in self._columns:
+            missing = set(self._missing[name])
+            values = self.column(name)
+            columns.append([None if i in missing else value for i, value in enumerate(values)]
+                           if missing else values)
+        return zip(*columns)
+
+    def to_numpy(self):
+        """
+        Columns as NumPy arrays (requires numpy) : int64 arrays sharing the memory
+        of the set (missing values : MISSING) and object arrays of str
+
+        :returns: dict {column name: numpy.ndarray}
+        """
+        np = _require(numpy, 'numpy')
+        arrays = {}
+        for name, _ in self._columns:
+            if name in self._offsets:
+                arrays[name] = np.array(self.column(name), dtype=object)
+            else:
+                arrays[name] = np.frombuffer(self._values[name], dtype=np.int64)
+        return arrays
+
+    def to_arrow(self):
+        """
+        Columns as an Arrow table (requires pyarrow), sharing the memory of the set :
+        int64, timestamp (seconds, UTC) and large_string columns, missing values are null
+
+        :returns: pyarrow.Table
+        """
+        pa = _require(pyarrow, 'pyarrow')
+        arrays = []
+        for name, column_type in self._columns:
+            buffers = [self._validity(name), pa.py_buffer(self._values[name])]
+            if column_type == 'str':
+                buffers.insert(1, pa.py_buffer(self._offsets[name]))
+                arrow_type = pa.large_string()
+            elif column_type == 'timestamp':
+                arrow_type = pa.timestamp('s', tz='UTC')
+            else:
+                arrow_type = pa.int64()
+            arrays.append(pa.Array.from_buffers(arrow_type, self._length, buffers,
+                                                null_count=len(self._missing[name])))
+        return pa.Table.from_arrays(arrays, names=self.names)
+
+    def _validity(self, name):
+        """ Arrow validity bitmap of a column (None if no value is missing) """
+        missing = self._missing[name]
+        if not missing:
+            return None
+        bitmap = bytearray(b'\xff') * ((self._length + 7) // 8)
+        for row in missing:
+            bitmap[row >> 3] &= ~(1 << (row & 7)) & 0xff
+        return pyarrow.py_buffer(bitmap)
+
+    @classmethod
+    def from_elements(cls, model, xml_elements, columns=None):
+        """ Build a set from xml d:response elements """
+        column_set = cls(model, columns=columns)
+        for xml_data in xml_elements:
+            column_set.append_xml(xml_data)
+        return column_set
+
+    @classmethod
+    def iter_batches(cls, model, xml_elements, batch_size=None, columns=None):
+        """
+        Iterate over sets of at most batch_size items built from xml d:response
+        elements : memory doesn't grow with the number of elements.
+        At least one set is yielded (empty if there is no element).
+        """
+        batch_size = batch_size or BATCH_SIZE
+        column_set = cls(model, columns=columns)
+        yielded = False
+        for xml_data in xml_elements:
+            column_set.append_xml(xml_data)
+            if len(column_set) >= batch_size:
+                yield column_set
+                yielded = True
+                column_set = cls(model, columns=columns)
+        if len(column_set) or not yielded:
+            yield column_set
+
+
+def write_csv(batches, target, header=True):
+    """
+    Write column sets to a csv file, one set at a time
+
+    :param batches: iterable of ColumnSet (see WebDAV.iter_columns)
+    :param target:  file path or text file object
+    :param header:  write the column names first
+    :returns: number of rows written
+    """
+    if not hasattr(target, 'write'):
+        with io.open(target, 'w', newline='', encoding='utf-8') as fileobj:
+            return write_csv(batches, fileobj, header=header)
+    writer = csv.writer(target)
+    count = 0
+    for batch in batches:
+        if header:
+            writer.writerow(batch.names)
+            header = False
+        writer.writerows(batch.rows())
+        count += len(batch)
+    return count
+
+
+def write_parquet(batches, target, **kwargs):
+    """
+    Write column sets to a Parquet file (requires pyarrow), one row group per set
+
+    :param batches: iterable of ColumnSet (see WebDAV.iter_columns)
+    :param target:  file path or binary file object
+    :param kwargs:  pyarrow.parquet.ParquetWriter arguments (compression…)
+    :returns: number of rows written
+    """
+    _require(pyarrow, 'pyarrow')
+    writer = None
+    count = 0
+    try:
+        for batch in batches:
+            table = batch.to_arrow()
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(target, table.schema, **kwargs)
+            if len(batch):
+                writer.write_table(table)
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
@@ -2,90 +2,77 @@
 """
 Define collection of item.
 """
+from operator import attrgetter
 
 
 class ItemSet(list):
     """
-    Item set is an iterable,
-    but if only one item is present then values can be directly accessed.
+    Item set is a list of items,
+    but if only one item is present then values can be directly accessed
+    (``resp.data.href``, None if there isn't exactly one item).
+
+    Iteration, indexing, slicing and length are the list ones (no overhead :
+    slices are lists), concatenations and copies are item sets.
     """
 
-    def __init__(self, classobj, itemset):
-        self._itemset = itemset
+    def __init__(self, classobj, itemset=()):
+        super(ItemSet, self).__init__(itemset)
         self._class = classobj
 
-    def __repr__(self):  # keep this to force loading _itemset as a list
-        #pylint: disable=unnecessary-comprehension
-        return repr([k for k in self._itemset])
-
-    def __getattribute__(self, name):
-        if name not in ['_class', '_itemset']:
-            if len(self._itemset) != 1:
-                return None
-            return object.__getattribute__(self._itemset[0], name)
-        return object.__getattribute__(self, name)
-
-    def __bool__(self):
-        """ Test whether ``self`` is nonempty. """
-        return bool(self._itemset)
+    def __getattr__(self, name):
+        # only called for attributes which are not list ones
+        if name.startswith('__') or name == '_class':
+            raise AttributeError(name)
+        if len(self) != 1:
+            return None
+        return getattr(self[0], name)
 
-    def __iter__(self):
-        """ Return an iterator over ``self``. """
-        for propset in self._itemset:
-            yield propset
+    def _new(self, items):
+        return ItemSet(self._class, items)
 
-    def __lt__(self, other): return self._itemset <  self.__cast(other)
-    def __le__(self, other): return self._itemset <= self.__cast(other)
-    def __eq__(self, other): return self._itemset == self.__cast(other)
-    def __gt__(self, other): return self._itemset >  self.__cast(other)
-    def __ge__(self, other): return self._itemset >= self.__cast(other)
-    def __cast(self, other):
-        return other._itemset if isinstance(other, ItemSet) else other
-    def __contains__(self, item): return item in self._itemset
-    def __len__(self): return len(self._itemset)
-    def __getitem__(self, idx): return self._itemset[idx]
-    def __setitem__(self, idx, value): self._itemset[idx] = value
-    def __delitem__(self, i): del self._itemset[i]
-    def __getslice__(self, *args): return self._itemset.__getslice__(*args)
-    def __setslice__(self, *args): self._itemset.__setslice__(*args)
     def __add__(self, other):
-        if isinstance(other, ItemSet):
-            return self.__class__(self._itemset + other._itemset)
-        elif isinstance(other, type(self._itemset)):
-            return self.__class__(self._itemset + other)
-        return self.__class__(self._itemset + list(other))
+        return self._new(list.__add__(self, list(other)))
+
     def __radd__(self, other):
-        if isinstance(other, ItemSet):
-            return self.__class__(other._itemset + self._itemset)
-        elif isinstance(other, type(self._itemset)):
-            return self.__class__(other + self._itemset)
-        return self.__class__(list(other) + self._itemset)
-    def __iadd__(self, other):
-        if isinstance(other, ItemSet):
-            self._itemset += other._itemset
-        elif isinstance(other, type(self._itemset)):
-            self._itemset += other
-        else:
-            self._itemset += list(other)
-        return self
+        return self._new(list(other) + list(self))
+
     def __mul__(self, n):
-        return self.__class__(self._itemset*n)
+        return self._new(list.__mul__(self, n))
     __rmul__ = __mul__
-    def __imul__(self, n):
-        self._itemset *= n
-        return self
-    def append(self, item): self._itemset.append(item)
-    def clear(self): self._itemset.clear()
-    def copy(self): return self.__class__(self)
-    def count(self, item): return self._itemset.count(item)
-    def extend(self, other):
-        if isinstance(other, ItemSet):
-            self._itemset.extend(other._itemset)
-        else:
-            self._itemset.extend(other)
-    def index(self, item, *args): return self._itemset.index(item, *args)
-    def insert(self, i, item): self._itemset.insert(i, item)
-    def pop(self, i=-1): return self._itemset.pop(i)
-    def remove(self, item): self._itemset.remove(item)
-    def reverse(self): self._itemset.reverse()
-    def sort(self, *args, **kwds): self._itemset.sort(*args, **kwds)
+
+    def copy(self):
+        """ shallow copy """
+        return self._new(self)
+
+    def sort_by(self, *attrs, **kwargs):
+        """
+        Sort the items in place by attribute values (None is greater than any value)
+
+        :param attrs:   attribute names (e.g. 'last_modified', 'href')
+        :param reverse: descending order
+        """
+        reverse = kwargs.get('reverse', False)
+        try:
+            self.sort(key=attrgetter(*attrs), reverse=reverse)
+        except TypeError:  # None compared to a value
+            if len(attrs) == 1:
+                getter = attrgetter(*attrs)
+                nones = [item for item in self if getter(item) is None]
+                values = [item for item in self if getter(item) is not None]
+                values.sort(key=getter, reverse=reverse)
+                self[:] = nones + values if reverse else values + nones
+                return
+            getters = [attrgetter(attr) for attr in attrs]
+
+            def _key(item):
+                return [(value is None, value) for value in (getter(item) for getter in getters)]
+            self.sort(key=_key, reverse=reverse)
+
+    def index_by(self, attr):
+        """
+        Items by value of an attribute (for unique values : file_id, href…,
+        otherwise the last item of a value is kept)
+
+        :returns: dict {attribute value: item}
+        """
+        return dict(zip(map(attrgetter(attr), self), self))
@@ -2,15 +2,17 @@
 """
 Generic request/result class (ORM-like objects)
 """
-import re
+import functools
 import six
 from ..common import build_xml as BuildXML, parse_xml as ParseXML
 from .properties import NAMESPACES_MAP, Property
 from .item_set import ItemSet
+from .column_set import ColumnSet
 from ..compat import unquote, decode_string, encode_string
 
 ALL_PROPERTIES = {}
 RESERVED_KEYS = []
+MODELS = {}
 
 class MetaModel(type):
     """ Meta Property Set : find properties in class """
@@ -47,8 +49,42 @@ class MetaModel(type):
 
                 ALL_PROPERTIES[name].append(val)
         new_cls._attrs = ALL_PROPERTIES[name]
+        # models of a same name share their properties : update them all
+        MODELS.setdefault(name, []).append(new_cls)
+        for model in MODELS[name]:
+            model._compile_parsers()
         return new_cls
 
+    def _compile_parsers(cls):
+        """
+        Build the dispatch tables used to parse responses :
+        xml tag (Clark notation) or json key -> ((attribute name, value getter), …)
+        (value getter None : the element text or json value is used as is)
+        """
+        cls._empty_values = dict.fromkeys(attr.attr_name for attr in cls._attrs)
+        # fields and bodies of the PROPFIND, per selection (see build_xml_propfind)
+        cls._propfind_fields = {}
+        cls._propfind_bodies = {}
+        cls._empty_raw_values = dict.fromkeys(cls._empty_values, (None, None))
+        xml_by_tag, xml_by_name, json_by_key = {}, {}, {}
+        for attr in cls._attrs:
+            parser = (attr.attr_name, attr.xml_value_getter())
+            if attr.xml_key:
+                xml_by_tag.setdefault(attr.xml_tag, []).append(parser)
+                xml_by_name.setdefault(attr.xml_key, []).append(parser)
+            if attr.json_key:
+                json_by_key.setdefault(attr.json_key, []).append(
+                    (attr.attr_name, attr.json_value_getter()))
+        cls._xml_parsers = {k: tuple(v) for k, v in xml_by_tag.items()}
+        cls._xml_parsers_by_name = {k: tuple(v) for k, v in xml_by_name.items()}
+        cls._json_parsers = {k: tuple(v) for k, v in json_by_key.items()}
+
+    def _get_xml_parsers(cls, tag):
+        """ Parsers of a xml tag in an other namespace than expected (cached) """
+        parsers = cls._xml_parsers_by_name.get(tag.rsplit('}', 1)[-1], ())
+        cls._xml_parsers[tag] = parsers
+        return parsers
+
 
 class Item(six.with_metaclass(MetaModel)):
     """
@@ -60,8 +96,18 @@ class Item(six.with_metaclass(MetaModel)):
     """
     SUCCESS_STATUS = 'HTTP/1.1 200 OK'
     COLLECTION_RESOURCE_TYPE = 'collection'
+    # lazy items keep the raw data of the response, and compute the value
+    # of a property on first access : faster for large listings where most
+    # properties are not read (e.g. filtered on href)
+    LAZY = False
+    # fields with few distinct values, shared by compact items (see compact_class)
+    INTERNED_FIELDS = ()
+    # columns of the columnar results : (property name, column type) (see ColumnSet)
+    COLUMNS = (('href', 'str'),)
     _attrs = []
     _repr_attrs = ['href']
+    _raw_data = None
+    _raw_values = None
 
     @classmethod
     def _fetch_properties(cls, key, key_name='xml_key'):
@@ -84,12 +130,15 @@ class Item(six.with_metaclass(MetaModel)):
             ["'%s' : %s" % (k, v) for k, v in values.items()]
         )
 
-    def __init__(self, data=None, json_data=None, xml_data=None, wrapper=None):
+    # pylint: disable=too-many-arguments
+    def __init__(self, data=None, json_data=None, xml_data=None, wrapper=None, lazy=None):
         self._wrapper = wrapper or getattr(self, '_wrapper', False)
+        if lazy is None:
+            lazy = self.LAZY
         if xml_data is not None:
-            self._parse_xml(xml_data)
+            self._parse_xml(xml_data, lazy=lazy)
         if json_data is not None:
-            self._parse_json(json_data)
+            self._parse_json(json_data, lazy=lazy)
         if data is not None:
             for k in data:
                 self[k] = data[k]
@@ -121,36 +170,111 @@ class Item(six.with_metaclass(MetaModel)):
     def as_dict(self):
         """ Return current instance as a {k: val} dict """
         attrs = [v.attr_name for v in self._attrs]
+        if self._raw_data is not None or self._raw_values:  # lazy item
+            for key in attrs:
+                getattr(self, key)
         return {key: value for key, value in self.__dict__.items() if key in attrs}
 
     def __repr__(self):
         return "%s(%s)" % (type(self).__name__, self.__get_repr_info__())
 
-    def _parse_json(self, data):
-        for attr in self._attrs:
-            self[attr.attr_name] = None
+    def _parse_json(self, data, lazy=False):
+        if lazy:
+            self._raw_data = data
+            return
+        self.__dict__.update(type(self)._index_json(data, compute=True))
 
-        for k in data:
-            for prop in type(self)._fetch_properties(k, key_name='json_key'):
-                value = prop.get_value(data[k])
-                self[prop.attr_name] = value
+    @classmethod
+    def _index_json(cls, data, compute):
+        """
+        Values of the properties found in a json dict
 
-    def _parse_xml(self, xml_data):
-        for attr in self._attrs:
-            self[attr.attr_name] = None
+        :param compute: False to get (value getter or None, raw value) pairs
+        """
+        values = dict(cls._empty_values if compute else cls._empty_raw_values)
+        parsers = cls._json_parsers
+        for key, value in data.items():
+            for attr_name, get_value in parsers.get(key, ()):
+                if not compute:
+                    values[attr_name] = (get_value, value)
+                else:
+                    values[attr_name] = get_value(value) if get_value else value
+        return values
 
-        self.href = decode_string(
-            unquote(xml_data.find('d:href', NAMESPACES_MAP).text)
-        )
-        for propstat in xml_data.iter('{DAV:}propstat'):
-            if propstat.find('d:status', NAMESPACES_MAP).text != self.SUCCESS_STATUS:
-                pass
+    @classmethod
+    def _xml_href_props(cls, xml_data):
+        """ Decoded d:href and d:prop elements (with success status) of a d:response """
+        href = decode_string(unquote(xml_data.find('{DAV:}href').text))
+        props = [child.find('{DAV:}prop') for child in xml_data
+                 if child.tag == '{DAV:}propstat' and
+                 child.findtext('{DAV:}status') == cls.SUCCESS_STATUS]
+        return href, props
+
+    def _parse_xml(self, xml_data, lazy=False):
+        self.href, props = self._xml_href_props(xml_data)
+        if lazy:
+            # prop elements stay valid even if the response element is cleared
+            self._raw_data = props
+            return
+        values = type(self)._index_xml(props, compute=True)
+        if values.get('href') is None:  # not in props : keep d:href
+            values.pop('href', None)
+        self.__dict__.update(values)
+
+    @classmethod
+    def _index_xml(cls, props, compute):
+        """
+        Values of the properties found in xml 'd:prop' elements
+
+        :param compute: False to get (value getter or None, element or text) pairs
+        """
+        values = dict(cls._empty_values if compute else cls._empty_raw_values)
+        parsers = cls._xml_parsers
+        for prop in props:
+            for xml_property in prop:
+                tag = xml_property.tag
+                tag_parsers = parsers.get(tag)
+                if tag_parsers is None:
+                    tag_parsers = cls._get_xml_parsers(tag)
+                for attr_name, get_value in tag_parsers:
+                    if not compute:
+                        values[attr_name] = ((get_value, xml_property) if get_value
+                                             else (None, xml_property.text))
+                    elif get_value:
+                        values[attr_name] = get_value(xml_property)
+                    else:
+                        values[attr_name] = xml_property.text
+        return values
+
+    def _materialize(self, attr_name):
+        """
+        Value of a property which is not set (see Property.__get__) :
+        lazy items index their raw data on first access,
+        then compute and keep each value on first access.
+        """
+        raw_values = self._raw_values
+        if raw_values is None:
+            raw_data = self._raw_data
+            if raw_data is None:
+                raw_values = self._raw_values  # indexed meanwhile by another thread
+                if raw_values is None:
+                    return None
             else:
-                for xml_property in propstat.find('d:prop', NAMESPACES_MAP):
-                    property_name = re.sub('{.*}', '', xml_property.tag)
-                    for prop in type(self)._fetch_properties(property_name):
-                        value = prop.get_value(xml_property)
-                        self[prop.attr_name] = value
+                cls = type(self)
+                if isinstance(raw_data, dict):
+                    raw_values = cls._index_json(raw_data, compute=False)
+                else:
+                    raw_values = cls._index_xml(raw_data, compute=False)
+                    if raw_values.get('href') == (None, None):  # not in props : keep d:href
+                        raw_values.pop('href', None)
+                self._raw_values = raw_values
+                self._raw_data = None
+        entry = raw_values.pop(attr_name, None)
+        if entry is None:  # computed meanwhile by another thread
+            return self.__dict__.get(attr_name)
+        get_value, raw_value = entry
+        value = self.__dict__[attr_name] = get_value(raw_value) if get_value else raw_value
+        return value
 
     @classmethod
     def default_get(cls, key_format='json', **kwargs):
@@ -188,14 +312,31 @@ class Item(six.with_metaclass(MetaModel)):
                 _fields[attr.ns].append(attr.xml_key)
             return _fields
 
+        # the fields of a selection, and the bodies without filter rules, are memoized
+        selection = None
         if not fields:
-            fields = _build_fields_dict(only_required=(not use_default))
+            selection = bool(use_default)
         elif isinstance(fields, list):
-            fields = _build_fields_dict(attr_name_list=fields)
+            selection = tuple(fields)
+        if selection is not None:
+            if not filter_rules:
+                body = cls._propfind_bodies.get((instr, selection))
+                if body is not None:
+                    return body
+            selected_fields = cls._propfind_fields.get(selection)
+            if selected_fields is None:
+                selected_fields = cls._propfind_fields[selection] = (
+                    _build_fields_dict(only_required=(not use_default))
+                    if isinstance(selection, bool) else
+                    _build_fields_dict(attr_name_list=fields))
+            fields = selected_fields
         if not (fields or filter_rules):
             return None
-        return BuildXML.build_propfind_datas(instr=instr, filter_rules=filter_rules,
-                                              fields=(fields or {}))
+        body = BuildXML.build_propfind_datas(instr=instr, filter_rules=filter_rules,
+                                             fields=(fields or {}))
+        if selection is not None and not filter_rules:
+            cls._propfind_bodies[(instr, selection)] = body
+        return body
 
     @classmethod
     def build_xml_propupdate(cls, values):
@@ -203,28 +344,82 @@ class Item(six.with_metaclass(MetaModel)):
         return BuildXML.build_propupdate_datas(values)
 
     @classmethod
-    def from_response(cls, resp, filtered=None, wrapper=None, multi=None):
-        """ Build set of Model instance from a NextcloudResponse """
-        response_data = resp.data
+    def compact_class(cls):
+        """
+        Memory efficient variant of the model (see CompactItem),
+        with the same properties and methods
+        """
+        compact_cls = cls.__dict__.get('_compact_class')
+        if compact_cls is None:
+            namespace = {
+                '__slots__': tuple(attr.attr_name for attr in cls._attrs
+                                   if attr.attr_name != 'href'),
+                '_model': cls,
+                '_attrs': cls._attrs,
+            }
+            for klass in reversed(cls.__mro__):
+                if klass is Item or not issubclass(klass, Item):
+                    continue
+                for key, value in vars(klass).items():
+                    if not (key in _NOT_COPIED or isinstance(value, Property)):
+                        namespace[key] = value
+            compact_cls = type('Compact' + cls.__name__, (CompactItem,), namespace)
+            cls._compact_class = compact_cls
+        return compact_cls
+
+    @classmethod
+    def _item_builder(cls, wrapper=None, lazy=None, compact=False):
+        """ Function building an item from xml_data or json_data """
+        if compact:
+            return functools.partial(cls.compact_class().from_data,
+                                     wrapper=wrapper, pool={})
+        return functools.partial(cls, wrapper=wrapper, lazy=lazy)
+
+    # pylint: disable=too-many-arguments
+    @classmethod
+    def from_response(cls, resp, filtered=None, wrapper=None, multi=None, lazy=None,
+                      compact=False, columnar=False):
+        """
+        Build set of Model instance from a NextcloudResponse
+
+        :param lazy: compute property values on first access (default LAZY)
+        :param compact: build memory efficient items (see compact_class)
+        :param columnar: build a ColumnSet of the COLUMNS (xml multistatus only)
+        """
+        # xml is parsed from the bytes of the content
+        xml_content = resp.get_xml_content()
+        response_data = resp.data if xml_content is None else None
+        if xml_content is None and isinstance(response_data, six.string_types) \
+                and response_data.startswith('<?xml'):
+            xml_content = response_data
         if multi is None:
             if isinstance(response_data, dict):
                 # json dict, usually a single result
                 multi = False
-            elif response_data.startswith('<?xml'):
+            elif xml_content is not None:
                 # xml, usually a list of results
                 multi = True
 
         if not resp.is_ok:
-            resp.data = ItemSet(cls, []) if multi else None
+            if columnar:
+                resp.data = ColumnSet(cls)
+            else:
+                resp.data = ItemSet(cls, []) if multi else None
             return resp
 
         if isinstance(response_data, dict):
-            attr_datas = [cls(json_data=response_data, wrapper=wrapper)]
-        elif response_data.startswith('<?xml'):
-            response_xml_data = ParseXML.fromstring(response_data)
-
-            attr_datas = [cls(xml_data=xml_data, wrapper=wrapper)
-                          for xml_data in response_xml_data]
+            build = cls._item_builder(wrapper=wrapper, lazy=lazy, compact=compact)
+            attr_datas = [build(json_data=response_data)]
+        elif xml_content is not None:
+            lazy_items = not (compact or columnar) and (cls.LAZY if lazy is None else lazy)
+            response_xml_data = ParseXML.fromstring(
+                xml_content, backend=ParseXML.dav_backend(lazy=lazy_items))
+            if columnar:
+                resp.data = ColumnSet.from_elements(cls, response_xml_data)
+                return resp
+
+            build = cls._item_builder(wrapper=wrapper, lazy=lazy, compact=compact)
+            attr_datas = [build(xml_data=xml_data) for xml_data in response_xml_data]
         if not multi:
             resp.data = attr_datas[0] if attr_datas else None
             return resp
@@ -239,7 +434,127 @@ class Item(six.with_metaclass(MetaModel)):
         resp.data = ItemSet(cls, attr_datas)
         return resp
 
+    @classmethod
+    def iter_from_response(cls, resp, filtered=None, wrapper=None, lazy=None,
+                           compact=False):
+        """
+        Iterate over Model instances of a multistatus response,
+        each one built as soon as it is received if the response is streamed
+        (requester 'stream' argument) : memory doesn't grow with the response size.
+
+        :param lazy: compute property values on first access (default LAZY)
+        :param compact: build memory efficient items (see compact_class)
+
+        :returns: iterator of Model instances (nothing if the response is not ok)
+        """
+        if not resp.is_ok:
+            return
+        build = cls._item_builder(wrapper=wrapper, lazy=lazy, compact=compact)
+        for xml_data in ParseXML.iter_elements(resp.iter_content(ParseXML.CHUNK_SIZE),
+                                               '{DAV:}response'):
+            item = build(xml_data=xml_data)
+            if not filtered or filtered(item):
+                yield item
+
+    @classmethod
+    def iter_columns_from_response(cls, resp, batch_size=None):
+        """
+        Iterate over ColumnSet of at most batch_size items of a multistatus response
+        (see iter_from_response and ColumnSet.iter_batches)
+
+        :returns: iterator of ColumnSet (nothing if the response is not ok)
+        """
+        if not resp.is_ok:
+            return
+        elements = ParseXML.iter_elements(resp.iter_content(ParseXML.CHUNK_SIZE),
+                                          '{DAV:}response')
+        for column_set in ColumnSet.iter_batches(cls, elements, batch_size=batch_size):
+            yield column_set
+
     def as_dict(self):
         """ Return current instance as a {k: val} dict """
         attrs = [v.attr_name for v in self._attrs]
+        if self._raw_data is not None or self._raw_values:  # lazy item
+            for key in attrs:
+                getattr(self, key)
         return {key: value for key, value in self.__dict__.items() if key in attrs}
+
+
+# model class attributes which are not copied to compact classes
+_NOT_COPIED = frozenset([
+    '__module__', '__doc__', '__dict__', '__weakref__', '__qualname__', '__slots__',
+    '_attrs', '_compact_class', '_empty_values', '_empty_raw_values',
+    '_xml_parsers', '_xml_parsers_by_name', '_json_parsers',
+    '_propfind_fields', '_propfind_bodies',
+])
+
+
+# pylint: disable=useless-object-inheritance
+class CompactItem(object):
+    """
+    Memory efficient item, built by Item.compact_class() :
+    - property values are kept in slots (no __dict__)
+    - values of INTERNED_FIELDS and href folders are shared by the items
+      of a same response (href is split in folder + name)
+    - property values are set at once, the items shall not be modified
+    """
+    __slots__ = ('_wrapper', '_href_folder', '_href_name')
+    SUCCESS_STATUS = Item.SUCCESS_STATUS
+    COLLECTION_RESOURCE_TYPE = Item.COLLECTION_RESOURCE_TYPE
+    INTERNED_FIELDS = ()
+    _model = Item
+    _attrs = []
+    _repr_attrs = ['href']
+
+    @classmethod
+    def from_data(cls, xml_data=None, json_data=None, wrapper=None, pool=None):
+        """
+        Build an item from a xml d:response or a json dict
+
+        :param pool: dict of the values shared by the items
+        """
+        # pylint: disable=protected-access
+        model = cls._model
+        pool = {} if pool is None else pool
+        item = cls.__new__(cls)
+        item._wrapper = wrapper
+        href = None
+        if xml_data is not None:
+            href, props = model._xml_href_props(xml_data)
+            values = model._index_xml(props, compute=True)
+        else:
+            values = model._index_json(json_data, compute=True)
+        href = values.pop('href', None) or href
+        interned = cls.INTERNED_FIELDS
+        for key, value in values.items():
+            if key in interned and isinstance(value, six.string_types):
+                value = pool.setdefault(value, value)
+            setattr(item, key, value)
+        if href is None:
+            item._href_folder = item._href_name = None
+        else:
+            split = href.rstrip('/').rfind('/') + 1
+            item._href_folder = pool.setdefault(href[:split], href[:split])
+            item._href_name = href[split:]
+        return item
+
+    @property
+    def href(self):
+        """ href (folder + name) """
+        if self._href_folder is None:
+            return None
+        return self._href_folder + self._href_name
+
+    def __getitem__(self, key):
+        return getattr(self, key, None)
+
+    def get(self, key, default=None):
+        'Return attribute value or default'
+        return getattr(self, key, default)
+
+    def as_dict(self):
+        """ Return current instance as a {k: val} dict """
+        return {attr.attr_name: getattr(self, attr.attr_name, None) for attr in self._attrs}
+
+    __get_repr_info__ = Item.__dict__['__get_repr_info__']
+    __repr__ = Item.__dict__['__repr__']
@@ -9,12 +9,15 @@ How to define a new property namespace. Example:
 >>>     namespace = ('nc', 'http://nextcloud.org/ns')
 
 """
+from operator import attrgetter
 import six
 import xml
 from ..common import namming
 
 NAMESPACES_MAP = {}
 
+_element_text = attrgetter('text')
+
 
 class MetaProperty(type):
     """ Meta class that register namespaces """
@@ -70,6 +73,15 @@ class Property(six.with_metaclass(MetaProperty)):
         if not self.ns:
             self.ns = self.namespace[0]
 
+    def __get__(self, instance, owner):
+        """
+        Value of the property, when it is not set on the item :
+        computed now for lazy items (see Item.LAZY), else None
+        """
+        if instance is None:
+            return self
+        return instance._materialize(self.attr_name)  # pylint: disable=protected-access
+
     def update_attr_name(self, attr_name):
         """ Setup the python variable name """
         self.attr_name = attr_name
@@ -93,6 +105,43 @@ class Property(six.with_metaclass(MetaProperty)):
             return self.default_val()
         return self.default_val
 
+    @property
+    def xml_tag(self):
+        """ Clark notation of the xml property name : '{namespace}name' """
+        return '{%s}%s' % (NAMESPACES_MAP.get(self.ns, ''), self.xml_key)
+
+    def xml_value_getter(self):
+        """
+        Function computing the value from a xml.etree.ElementTree.Element
+        (same result than get_value), None if the value is the element text
+        """
+        parse_xml_value, parse_value = self.parse_xml_value, self.parse_value
+        if not parse_value:
+            return parse_xml_value
+        parse_xml_value = parse_xml_value or _element_text
+
+        def _get_value(element):
+            ret = parse_xml_value(element)
+            return parse_value(ret) if ret else ret
+        return _get_value
+
+    def json_value_getter(self):
+        """
+        Function computing the value from a json value
+        (same result than get_value), None if the value is used as is
+        """
+        parse_json_value, parse_value = self.parse_json_value, self.parse_value
+        if not (parse_json_value or parse_value):
+            return None
+
+        def _get_value(ret):
+            if parse_json_value and isinstance(ret, dict):
+                ret = parse_json_value(ret)
+            if ret and parse_value:
+                ret = parse_value(ret)
+            return ret
+        return _get_value
+
     def get_value(self, data=None):
         """
         Fetch value from input data
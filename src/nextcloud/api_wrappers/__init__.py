@@ -11,4 +11,5 @@ from .share import Share
 from .user import User
 from .user_ldap import UserLDAP
 from .webdav import WebDAV
+from .chunked_upload import ChunkedUpload
 from .systemtags import SystemTags, SystemTagsRelation
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Chunked file upload API wrapper (Nextcloud chunking v2)
+See https://docs.nextcloud.com/server/latest/developer_manual/client_apis/WebDAV/chunking.html
+
+The file is sent by chunks, in parallel, to a temporary upload folder,
+then assembled on the server :
+    MKCOL /remote.php/dav/uploads/<user>/<upload id>
+    PUT   /remote.php/dav/uploads/<user>/<upload id>/<chunk number>  (× n)
+    MOVE  /remote.php/dav/uploads/<user>/<upload id>/.file
+
+The upload id is computed from the file (path, size, mtime and a fingerprint
+of its first and last chunks) so that an interrupted upload is resumed by
+calling the same function again : the chunks already on the server are not
+sent twice. Files without mtime (some file objects) are not resumed, unless
+an upload_id is given.
+"""
+import hashlib
+import os
+import threading
+import uuid
+from ..base import WebDAVApiWrapper
+from ..exceptions import NextCloudError
+from ..api.model import Item
+from ..api.properties import DProp
+from ..common.concurrency import run_all
+from ..common.streams import file_timestamp
+from .webdav import WebDAV
+
+
+class Chunk(Item):
+    """ A chunk already uploaded """
+    _repr_attrs = ['href', 'content_length']
+
+    content_length = DProp('getcontentlength', parse_value=int)
+
+    def get_number(self):
+        """ Chunk number (from its name) """
+        name = self.href.rstrip('/').split('/')[-1]
+        return int(name) if name.isdigit() else None
+
+
+class ChunkedUpload(WebDAVApiWrapper):
+    """ Chunked upload API wrapper """
+    API_URL = '/remote.php/dav/uploads'
+    # chunks shall be between 5MB and 5GB (except the last one)
+    CHUNK_SIZE = 10 * 1024 * 1024
+    WORKERS = 4
+
+    def _get_path(self, upload_id, name=None):
+        path = '/'.join([self.client.user, upload_id])
+        return '/'.join([path, name]) if name else path
+
+    def _get_destination(self, remote_filepath):
+        return '{}{}/{}/{}'.format(
+            self.client.url, WebDAV.API_URL, self.client.user,
+            remote_filepath.lstrip('/')).encode('utf-8')
+
+    # pylint: disable=too-many-arguments
+    def get_upload_id(self, remote_filepath, size, timestamp=None, chunk_size=None,
+                      fingerprint=None):
+        """
+        Identifier of an upload, stable between attempts to resume it
+        (a new one for each call if timestamp is None : not resumable)
+
+        Args:
+            remote_filepath (str): destination path
+            size (int): file size
+            timestamp (int): mtime of the file
+            chunk_size (int): chunk size
+            fingerprint (str): fingerprint of the content (see content_fingerprint)
+
+        Returns:
+            str
+        """
+        if timestamp is None:
+            # the content may change without notice : chunks never reused
+            return 'nc-api-' + uuid.uuid4().hex
+        key = u'{}:{}:{}:{}:{}:{}'.format(self.client.user, remote_filepath, size,
+                                          timestamp, chunk_size or self.CHUNK_SIZE,
+                                          fingerprint)
+        return 'nc-api-' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def list_upload_chunks(self, upload_id):
+        """
+        List chunks already uploaded
+
+        Args:
+            upload_id (str): upload identifier
+
+        Returns:
+            requester response with list<Chunk> (not ok if the upload doesn't exist)
+        """
+        data = Chunk.build_xml_propfind(use_default=True)
+        resp = self.requester.propfind(self._get_path(upload_id),
+                                       headers={'Depth': '1'}, data=data)
+        resp = Chunk.from_response(resp, wrapper=self)
+        if resp.is_ok:
+            resp.data = [chunk for chunk in resp.data if chunk.get_number() is not None]
+        return resp
+
+    def abort_chunked_upload(self, upload_id):
+        """
+        Remove an upload folder and its chunks
+
+        Args:
+            upload_id (str): upload identifier
+
+        Returns:
+            requester response
+        """
+        return self.requester.delete(self._get_path(upload_id))
+
+    # pylint: disable=too-many-arguments,too-many-locals
+    def upload_file_chunked(self, local_filepath, remote_filepath, timestamp=None,
+                            chunk_size=None, workers=None, upload_id=None):
+        """
+        Upload file to Nextcloud storage by chunks, several chunks at once.
+        An interrupted upload is resumed by calling it again with the same
+        arguments (or the same upload_id).
+        Memory usage is about workers * chunk_size.
+
+        Args:
+            local_filepath (str): path to file on local storage,
+                or seekable file object opened in binary mode (uploaded from its current position)
+            remote_filepath (str): path where to upload file on Nextcloud storage
+            timestamp (int): timestamp of upload file. If None, get time by local file.
+            chunk_size (int): size of the chunks (bytes, default CHUNK_SIZE)
+            workers (int): number of chunks uploaded at once (default WORKERS)
+            upload_id (str): upload identifier (default computed by get_upload_id :
+                resumable if the file has a timestamp)
+
+        Returns:
+            requester response (of the final MOVE)
+        """
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        if hasattr(local_filepath, 'read'):
+            start = local_filepath.tell()
+            read_chunk = _fileobj_reader(local_filepath, start)
+            local_filepath.seek(0, os.SEEK_END)
+            size = local_filepath.tell() - start
+            if timestamp is None:
+                timestamp = file_timestamp(local_filepath)
+        else:
+            read_chunk = _path_reader(local_filepath)
+            size = os.path.getsize(local_filepath)
+            if timestamp is None:
+                timestamp = int(os.path.getmtime(local_filepath))
+        if upload_id is None:
+            upload_id = self.get_upload_id(
+                remote_filepath, size, timestamp, chunk_size,
+                fingerprint=content_fingerprint(read_chunk, size, chunk_size))
+
+        destination = self._get_destination(remote_filepath)
+        headers = {'Destination': destination, 'OC-Total-Length': str(size)}
+
+        uploaded = {}
+        resp = self.list_upload_chunks(upload_id)
+        if resp.is_ok:
+            uploaded = {chunk.get_number(): chunk.content_length for chunk in resp.data}
+        else:
+            resp = self.requester.make_collection(self._get_path(upload_id),
+                                                  headers=headers)
+            if not resp.is_ok:
+                raise NextCloudError(resp.get_error_message(), upload_id, resp)
+
+        def _put_chunk(chunk):
+            number, offset, length = chunk
+            resp = self.requester.put(self._get_path(upload_id, '%05d' % number),
+                                      data=read_chunk(offset, length), headers=headers)
+            if not resp.is_ok:
+                raise NextCloudError(resp.get_error_message(), upload_id, resp)
+            return resp
+
+        chunks = [(number + 1, offset, min(chunk_size, size - offset))
+                  for number, offset in enumerate(range(0, size or 1, chunk_size))]
+        run_all(_put_chunk,
+                [chunk for chunk in chunks if uploaded.get(chunk[0]) != chunk[2]],
+                workers=workers or self.WORKERS)
+
+        move_headers = dict(headers, Overwrite='T')
+        if isinstance(timestamp, (float, int)):
+            move_headers['X-OC-MTIME'] = '%.0f' % timestamp
+        return self.requester.request('move', self._get_path(upload_id, '.file'),
+                                      headers=move_headers)
+
+
+def content_fingerprint(read_chunk, size, chunk_size):
+    """
+    Fingerprint of a content (sha1 of its first and last chunks) : the chunks
+    of an upload are not reused for a content changed since (see get_upload_id)
+
+    Args:
+        read_chunk (callable): read_chunk(offset, length) -> bytes
+        size (int): content size
+        chunk_size (int): chunk size
+
+    Returns:
+        str
+    """
+    digest = hashlib.sha1(read_chunk(0, min(chunk_size, size)))
+    last_offset = (max(size - 1, 0) // chunk_size) * chunk_size
+    if last_offset:
+        digest.update(read_chunk(last_offset, size - last_offset))
+    return digest.hexdigest()
+
+
+def _path_reader(path):
+    """ Read chunks of a file (one file handle per call, for concurrency) """
+    def _read(offset, length):
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+    return _read
+
+
+def _fileobj_reader(fileobj, start=0):
+    """ Read chunks of a seekable file object shared between threads (offsets from start) """
+    lock = threading.Lock()
+
+    def _read(offset, length):
+        with lock:
+            fileobj.seek(start + offset)
+            return fileobj.read(length)
+    return _read
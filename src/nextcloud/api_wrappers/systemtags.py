@@ -5,6 +5,7 @@ See https://doc.owncloud.com/server/developer_manual/webdav_api/tags.html
 """
 import json
 from ..base import WebDAVApiWrapper
+from ..exceptions import NextCloudError
 from ..api import Item
 from ..api.properties import OCProp
 from . import webdav
@@ -150,6 +151,22 @@ class SystemTags(WebDAVApiWrapper):
         )
         return Tag.from_response(resp, wrapper=self)
 
+    def iter_systemtags(self):
+        """
+        Iterate over all tags, each Tag being built as soon as it is received
+
+        :returns: iterator of Tag
+        :raises: NextCloudError if the request failed
+        """
+        resp = self.requester.propfind(
+            data=Tag.build_xml_propfind(use_default=True), stream=True
+        )
+        if not resp.is_ok:
+            raise NextCloudError(resp.get_error_message(), resp.raw.request.url, resp)
+        for tag in Tag.iter_from_response(resp, wrapper=self):
+            if not self._is_root_href(tag.href):
+                yield tag
+
     def create_systemtag(self, name, **kwargs):
         """
         Create a new system tag from name.
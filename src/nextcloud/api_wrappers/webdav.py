@@ -9,14 +9,19 @@ Not implemented yet:
    - search feature
    - trash
    - versions
-   - chunked file upload
+
+Chunked file upload : see chunked_upload.py
 """
 # implementing dav search
 # -> add a function to build xml search
 #   see ../common/build_xml.py and ../api/model.py
+import binascii
+import errno
 import re
 import os
+import shutil
 import xml.etree.ElementTree as ET
+from collections import namedtuple
 from datetime import datetime
 from ..base import WebDAVApiWrapper
 from ..codes import WebDAVCode
@@ -29,7 +34,28 @@ from ..common.timestamping import (
     timestamp_from_datetime
 )
 from ..common.paths import sequenced_paths_list
-from ..compat import unquote
+from ..common.streams import as_body, file_timestamp
+from ..common.concurrency import iter_results
+from ..compat import unquote, scandir, replace_file
+
+
+def _create_part_file(target):
+    """
+    Create a new file next to target, to download its content
+    (mode from the umask, as open() : not the 0600 of tempfile.mkstemp)
+
+    :returns: (file descriptor, path)
+    """
+    directory, name = os.path.split(os.path.abspath(target))
+    while True:
+        temp_path = os.path.join(directory, '.%s.%s.part' % (
+            name, binascii.hexlify(os.urandom(4)).decode('ascii')))
+        try:
+            return os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL
+                           | getattr(os, 'O_BINARY', 0), 0o666), temp_path
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
 
 
 class NextCloudUnexpectedMultiStatus(NextCloudError):
@@ -44,6 +70,18 @@ class NextCloudFileConflict(NextCloudError):
     """ When you try to create a File that already exists """
 
 
+# Result of a file transfer in a tree operation (download_tree…)
+# status : 'downloaded', 'uploaded', 'skipped' or 'failed' (see error)
+TransferResult = namedtuple('TransferResult',
+                            ['remote_path', 'local_path', 'status', 'error'])
+
+# Result of scan_changes :
+# added, modified : lists of File ; removed : list of paths ;
+# snapshot : {path: etag} of the whole tree, to give to the next scan
+# (paths are relative to the user root, without leading or trailing '/')
+TreeChanges = namedtuple('TreeChanges', ['added', 'removed', 'modified', 'snapshot'])
+
+
 EXCEPTIONS = {
     'default': {
         WebDAVCode.CONFLICT: NextCloudFileConflict,
@@ -77,6 +115,11 @@ class File(Item):
     >>> _list_rec(root)
     """
     _repr_attrs = ['id', 'file_id', 'href']
+    INTERNED_FIELDS = frozenset([
+        'content_type', 'resource_type', 'favorite', 'owner_id', 'owner_display_name',
+        'share_types', 'comments_count', 'comments_unread', 'has_preview'])
+    COLUMNS = (('href', 'str'), ('file_id', 'int'), ('size', 'int'), ('content_length', 'int'),
+               ('last_modified', 'timestamp'), ('etag', 'str'))
 
     @staticmethod
     def _extract_resource_type(file_property):
@@ -191,6 +234,18 @@ class File(Item):
             raise NextCloudError(resp.get_error_message(), resp.raw.request.url, resp)
         return resp.data
 
+    def iter_content(self, chunk_size=None):
+        """
+        Download file content by chunks (see WebDav wrapper iter_file_content)
+
+        :param chunk_size: maximum size of the chunks (bytes)
+        :returns: iterator of bytes
+        """
+        if self.isdir():
+            raise ValueError("This is a collection, please specify file path")
+        return self._wrapper.iter_file_content(self.get_relative_path(),
+                                               chunk_size=chunk_size)
+
     def list(self, subpath='', filter_rules=None, all_properties=False):
         """
         List folder (see WebDav wrapper)
@@ -220,7 +275,7 @@ class File(Item):
     def upload_file(self, local_filepath, name, timestamp=None):
         """
         Upload file (see WebDav wrapper)
-        :param local_filepath: path of the local file
+        :param local_filepath: path of the local file, or binary file object
         :param name: name of the new file
         :param timestamp (int): timestamp of upload file. If None, get time by local file.
         """
@@ -233,7 +288,8 @@ class File(Item):
     def upload_file_contents(self, file_contents, name=None, timestamp=None):
         """
         Upload file content (see WebDav wrapper)
-        :param file_contents: binary content of the file
+        :param file_contents: binary content of the file (bytes, file object,
+                              memoryview/mmap or iterator of bytes)
         :param name: name of the new file (current file if empty)
         :param timestamp (int):  mtime of upload file
         :returns: True if success
@@ -248,13 +304,15 @@ class File(Item):
         """
         Download file (see WebDav wrapper)
         :param path: relative remote file path
-        :param target: path of the new file
+        :param target: path of the new file, or writable file object
         :param overwrite: True if existing file shall be overwritten
-        :returns: True if success
+        :returns: target
         """
         path = self._get_remote_path(path)
         target_path, _file_info = self._wrapper.download_file(
             path, target=target, overwrite=overwrite)
+        if hasattr(target_path, 'write'):
+            return target_path
         if not os.path.isfile(target_path):
             raise NextCloudError("Download failed")
         return target_path
@@ -291,6 +349,12 @@ class File(Item):
 class WebDAV(WebDAVApiWrapper):
     """ WebDav API wrapper """
     API_URL = "/remote.php/dav/files"
+    # size of the chunks for streamed transfers (bytes)
+    CHUNK_SIZE = 1024 * 1024
+    # status of a refused Depth infinity PROPFIND (then lists level by level)
+    DEPTH_INFINITY_REFUSED = (400, 403, 501)
+    # Depth infinity PROPFIND allowed (None : unknown yet)
+    _depth_infinity = None
 
     @staticmethod
     def _raise_exception(resp, fpath):
@@ -308,8 +372,9 @@ class WebDAV(WebDAVApiWrapper):
             return '/'.join([self.client.user, path]).replace('//', '/')
         return self.client.user
 
+    # pylint: disable=too-many-arguments
     def list_folders(self, path=None, depth=1, all_properties=False,
-                     fields=None):
+                     fields=None, lazy=None, compact=False, columnar=False):
         """
         Get path files list with files properties with given depth
         (for current user)
@@ -319,12 +384,17 @@ class WebDAV(WebDAVApiWrapper):
             depth (int): depth of listing files (directories content for example)
             all_properties (bool): list all available file properties in Nextcloud
             fields (str list): file properties to fetch
+            lazy (bool): compute File properties on first access (default File.LAZY)
+            compact (bool): memory efficient read-only File objects (see File.compact_class)
+            columnar (bool): ColumnSet of File.COLUMNS instead of File objects
 
         Returns:
-            list of File objects
+            list of File objects (or ColumnSet)
         """
         # if not all_properties and not fields:
         #     fields = ['file_id', 'resource_type']
+        if columnar and not (fields or all_properties):
+            fields = [name for name, _ in File.COLUMNS]
         data = File.build_xml_propfind(
             use_default=all_properties,
             fields=fields
@@ -332,11 +402,101 @@ class WebDAV(WebDAVApiWrapper):
         resp = self.requester.propfind(self._get_path(path),
                                        headers={'Depth': str(depth)},
                                        data=data)
-        return File.from_response(resp, wrapper=self)
+        return File.from_response(resp, wrapper=self, lazy=lazy, compact=compact,
+                                  columnar=columnar)
+
+    def iter_folders(self, path=None, depth=1, all_properties=False, fields=None,
+                     lazy=None, compact=False):
+        """
+        Iterate over path files with files properties with given depth
+        (see list_folders), each File being built as soon as it is received :
+        memory doesn't grow with the number of files.
+
+        Args:
+            path (str/None): files path
+            depth (int/str): depth of listing files (1, 0 or 'infinity')
+            all_properties (bool): list all available file properties in Nextcloud
+            fields (str list): file properties to fetch
+            lazy (bool): compute File properties on first access (default File.LAZY)
+            compact (bool): memory efficient read-only File objects (see File.compact_class)
+
+        Returns:
+            iterator of File objects (the first one is path itself)
+
+        Raises:
+            NextCloudError if the request failed
+        """
+        data = File.build_xml_propfind(
+            use_default=all_properties,
+            fields=fields
+        )
+        resp = self.requester.propfind(self._get_path(path),
+                                       headers={'Depth': str(depth)},
+                                       data=data, stream=True)
+        if not resp.is_ok:
+            self._raise_exception(resp, path)
+        for file_data in File.iter_from_response(resp, wrapper=self, lazy=lazy, compact=compact):
+            yield file_data
+
+    def iter_columns(self, path=None, depth=1, filter_rules=None, batch_size=None):
+        """
+        Iterate over path files by batches stored by columns (see ColumnSet),
+        each batch being built as soon as it is received : memory doesn't grow
+        with the number of files. To write large listings to files :
+
+        >>> from nextcloud.api.column_set import write_parquet
+        >>> write_parquet(nxc.iter_columns('photos', depth='infinity'), 'photos.parquet')
 
-    def download_file(self, path, target=None, overwrite=None):
+        Args:
+            path (str/None): files path
+            depth (int/str): depth of listing files (1, 0 or 'infinity')
+            filter_rules : a dict { namespace: {key : value } } to list files
+                according to a filter (see fetch_files_with_filter, depth is ignored)
+            batch_size (int): maximum number of files of a batch (default column_set.BATCH_SIZE)
+
+        Returns:
+            iterator of ColumnSet of File.COLUMNS (at least one)
+
+        Raises:
+            NextCloudError if the request failed
+        """
+        fields = [name for name, _ in File.COLUMNS]
+        if filter_rules:
+            data = File.build_xml_propfind(instr='oc:filter-files', filter_rules=filter_rules,
+                                           fields=fields)
+            resp = self.requester.report(self._get_path(path), data=data, stream=True)
+        else:
+            data = File.build_xml_propfind(fields=fields)
+            resp = self.requester.propfind(self._get_path(path),
+                                           headers={'Depth': str(depth)},
+                                           data=data, stream=True)
+        if not resp.is_ok:
+            self._raise_exception(resp, path)
+        for column_set in File.iter_columns_from_response(resp, batch_size=batch_size):
+            yield column_set
+
+    def iter_file_content(self, path, chunk_size=None):
+        """
+        Download file content by chunks, without loading it in memory.
+
+        Exception will be raised if path doesn't exist or is a directory.
+
+        Args:
+            path (str): file path
+            chunk_size (int): maximum size of the chunks (bytes)
+
+        Returns:
+            iterator of bytes
+        """
+        resp = self.requester.download(self._get_path(path), stream=True)
+        if not resp.is_ok:
+            self._raise_exception(resp, path)
+        return resp.iter_content(chunk_size or self.CHUNK_SIZE)
+
+    def download_file(self, path, target=None, overwrite=None, chunk_size=None):
         """
         Download file by path (for current user).
+        The content is written by chunks (constant memory).
         The timestamp of remote file is preserved.
 
         Exception will be raised if:
@@ -346,64 +506,360 @@ class WebDAV(WebDAVApiWrapper):
 
         Args:
             path (str): file path
-            target (str): file (default is working directory)
+            target (str): file (default is working directory),
+                or writable binary file object
             overwrite (bool) : tell if existing file shall be overwritten
+            chunk_size (int): size of the written chunks (bytes)
 
         Returns:
             a tuple (target_path, File object)
         """
-        if not target:
-            target = './'
-        if os.path.isdir(target):
-            filename = path.split('/')[(-1)] if '/' in path else path
-            target = os.path.join(target, filename)
+        to_fileobj = hasattr(target, 'write')
+        if not to_fileobj:
+            if not target:
+                target = './'
+            if os.path.isdir(target):
+                filename = path.split('/')[(-1)] if '/' in path else path
+                target = os.path.join(target, filename)
         file_data = self.get_file(path)
         if not file_data:
             raise ValueError("Given path doesn't exist")
+        if file_data.isdir():
+            raise ValueError("This is a collection, please specify file path")
+        if to_fileobj:
+            for chunk in self.iter_file_content(path, chunk_size=chunk_size):
+                target.write(chunk)
+            return (target, file_data)
+
         if not overwrite and os.path.isfile(target):
             raise ValueError(
                 "Target file with already already exists")
+        self._download_to_path(path, target, file_data.last_modified,
+                               chunk_size=chunk_size)
+        return (target, file_data)
+
+    def _download_to_path(self, path, target, last_modified, chunk_size=None):
+        """ Write the content of file 'path' to 'target', with its timestamp """
+        chunks = self.iter_file_content(path, chunk_size=chunk_size)
+        # written aside, then moved onto target : an existing target is
+        # left untouched if the download fails
+        descriptor, temp_path = _create_part_file(target)
         try:
-            res = file_data.fetch_file_content()
-            with open(target, 'wb') as f:
-                f.write(res)
-        except NextCloudError as e:
-            raise e
+            with os.fdopen(descriptor, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            if os.path.isfile(target):
+                shutil.copymode(target, temp_path)
+            replace_file(temp_path, target)
+        except BaseException:
+            if os.path.isfile(temp_path):
+                os.remove(temp_path)
+            raise
 
         # get timestamp of downloaded file from file property on Nextcloud
         # If it succeeded, set the timestamp to saved local file
         # If the timestamp string is invalid or broken, the timestamp is downloaded time.
-        file_timestamp = timestamp_from_string(file_data.last_modified)
+        file_timestamp = timestamp_from_string(last_modified)
         if isinstance(file_timestamp, int):
             os.utime(target, (
                 timestamp_from_datetime(datetime.now()),
                 file_timestamp))
-        return (target, file_data)
+
+    def _iter_listings(self, path, workers=None, fields=None, grouped=True):
+        """
+        List a tree, with a Depth infinity PROPFIND if the server allows it
+        (parsed while it is received), otherwise level by level
+        (depth 1 PROPFIND, folders concurrently).
+
+        :param grouped: False to get the Depth infinity PROPFIND entries
+                        one by one, as soon as they are received
+        :returns: iterator of (folder path, list of File in the folder),
+                  top-down (a folder is yielded before its subfolders)
+        """
+        root = (path or '').strip('/')
+        level = [root]
+        probing = False
+        if self._depth_infinity is not False:
+            resp = self.requester.propfind(self._get_path(root),
+                                           headers={'Depth': 'infinity'},
+                                           data=File.build_xml_propfind(fields=fields),
+                                           stream=True)
+            if resp.is_ok:
+                entries = File.iter_from_response(resp, wrapper=self)
+                next(entries, None)  # skip the folder itself
+                by_folder = {}
+                level = []
+                deep = False
+                for file_data in entries:
+                    key = file_data.get_relative_path().strip('/')
+                    folder = _parent_key(key)
+                    if folder != root:
+                        deep = True
+                    elif file_data.isdir():
+                        level.append(key)
+                    if grouped:
+                        by_folder.setdefault(folder, []).append(file_data)
+                    else:
+                        yield folder, [file_data]
+                if deep or not level:
+                    if deep:
+                        self._depth_infinity = True
+                    if grouped:
+                        level = [root]
+                        while level:
+                            for folder in level:
+                                yield folder, by_folder.get(folder, [])
+                            level = [f.get_relative_path().strip('/')
+                                     for folder in level for f in by_folder.get(folder, [])
+                                     if f.isdir()]
+                    return
+                # only the folder content : the server may handle Depth infinity
+                # as Depth 1 (Sabre default), so go on level by level
+                if grouped:
+                    yield root, by_folder.get(root, [])
+                probing = self._depth_infinity is None
+            elif resp.status_code in self.DEPTH_INFINITY_REFUSED:
+                self._depth_infinity = False
+            else:
+                self._raise_exception(resp, root)
+
+        def _list(folder):
+            resp = self.list_folders(folder, depth=1, fields=fields)
+            if not resp.is_ok:
+                self._raise_exception(resp, folder)
+            return resp.data[1:]  # skip the folder itself
+
+        while level:
+            next_level = []
+            for folder, files, error in iter_results(_list, level, workers=workers):
+                if error is not None:
+                    raise error
+                if probing and files:
+                    self._depth_infinity = False
+                next_level += [f.get_relative_path().strip('/') for f in files if f.isdir()]
+                yield folder, files
+            level = next_level
+            probing = False
+
+    def iter_tree(self, path=None, workers=None, fields=None):
+        """
+        Iterate over all the files and folders of a tree (the folder itself excluded),
+        using a single Depth infinity PROPFIND if the server allows it (files
+        are yielded while the response is received), otherwise depth 1 PROPFIND
+        of several folders at once.
+
+        Args:
+            path (str): folder path
+            workers (int): number of concurrent requests (without Depth infinity)
+            fields (str list): file properties to fetch (default TREE_FIELDS,
+                shall include 'resource_type')
+
+        Returns:
+            iterator of File (a folder is yielded before its content)
+        """
+        fields = TREE_FIELDS if fields is None else fields
+        for _folder, files in self._iter_listings(path, workers=workers, fields=fields,
+                                                  grouped=False):
+            for file_data in files:
+                yield file_data
+
+    def walk(self, path=None, workers=None, fields=None):
+        """
+        Walk a tree top-down, like os.walk (see iter_tree)
+
+        Returns:
+            iterator of (folder path, list of folders File, list of files File)
+        """
+        fields = TREE_FIELDS if fields is None else fields
+        for folder, files in self._iter_listings(path, workers=workers, fields=fields):
+            yield (folder, [f for f in files if f.isdir()],
+                   [f for f in files if not f.isdir()])
+
+    def scan_changes(self, path=None, snapshot=None, workers=None, fields=None):
+        """
+        Find what changed in a tree since a previous scan.
+
+        Nextcloud changes the etag of every folder above a modified file,
+        so only the folders whose etag changed are listed (depth 1 PROPFIND,
+        several at once) : an unchanged tree costs a single request.
+
+        Args:
+            path (str): folder path
+            snapshot (dict): {path: etag} returned by the previous scan
+                (None or empty : everything is added)
+            workers (int): number of concurrent requests
+            fields (str list): file properties to fetch (etag and resource type
+                are always fetched)
+
+        Returns:
+            TreeChanges (added and modified File, folders included,
+            removed paths, new snapshot)
+        """
+        fields = list(TREE_FIELDS if fields is None else fields)
+        fields += [field for field in ('etag', 'resource_type') if field not in fields]
+        snapshot = snapshot or {}
+        root = (path or '').strip('/')
+        new_snapshot = dict(snapshot)
+        added, removed, modified = [], [], []
+        children = {}  # previous snapshot content by folder, built if needed
+
+        def _key(file_data):
+            return file_data.get_relative_path().strip('/')
+
+        def _children(folder):
+            if not children:
+                for key in snapshot:
+                    children.setdefault(_parent_key(key), []).append(key)
+                children.setdefault('', [])
+            return children.get(folder, [])
+
+        def _remove(key):
+            removed.append(key)
+            new_snapshot.pop(key, None)
+            for child in _children(key):
+                if child != key:
+                    _remove(child)
+
+        def _list(folder):
+            resp = self.list_folders(folder, depth=1, fields=fields)
+            if not resp.is_ok:
+                self._raise_exception(resp, folder)
+            return resp.data[1:]  # skip the folder itself
+
+        root_data = self.get_file(root, fields=fields)
+        if root_data is None:
+            for key in list(snapshot):
+                if key == root or key.startswith(root + '/') or not root:
+                    removed.append(key)
+                    del new_snapshot[key]
+            return TreeChanges(added, removed, modified, new_snapshot)
+        new_snapshot[root] = root_data.etag
+        if snapshot.get(root) == root_data.etag:
+            return TreeChanges(added, removed, modified, new_snapshot)
+
+        level = [root]
+        while level:
+            next_level = []
+            for folder, files, error in iter_results(_list, level, workers=workers):
+                if error is not None:
+                    raise error
+                listed = set()
+                for file_data in files:
+                    key = _key(file_data)
+                    listed.add(key)
+                    etag = snapshot.get(key)
+                    new_snapshot[key] = file_data.etag
+                    if etag is None:
+                        added.append(file_data)
+                    elif etag != file_data.etag:
+                        modified.append(file_data)
+                    else:
+                        continue
+                    if file_data.isdir():
+                        next_level.append(key)
+                    elif etag is not None:  # may have been a folder
+                        for child in _children(key):
+                            _remove(child)
+                if snapshot:
+                    for key in _children(folder):
+                        if key not in listed and key != folder:
+                            _remove(key)
+            level = next_level
+        return TreeChanges(added, removed, modified, new_snapshot)
+
+    @staticmethod
+    def _is_local_copy(local_path, file_data):
+        """ True if local file has the size and mtime of the remote file """
+        try:
+            stat = os.stat(local_path)
+        except OSError:
+            return False
+        return (str(stat.st_size) == str(file_data.content_length) and
+                int(stat.st_mtime) == timestamp_from_string(file_data.last_modified))
+
+    def iter_download_tree(self, remote_path, local_dir, workers=None, chunk_size=None):
+        """
+        Download a folder recursively, several files at once (see download_tree)
+
+        Returns:
+            iterator of TransferResult, in completion order
+        """
+        root = '/' + (remote_path or '').strip('/')
+
+        def _to_download():
+            _makedirs(local_dir)
+            for file_data in self.iter_tree(remote_path, workers=workers):
+                local_path = _tree_local_path(local_dir, root, file_data.get_relative_path())
+                if not file_data.isdir():
+                    yield (file_data, local_path)
+                elif local_path is not None:
+                    _makedirs(local_path)
+
+        def _download(item):
+            file_data, local_path = item
+            if local_path is None:
+                raise NextCloudError('path outside of the local folder', file_data.get_relative_path())
+            if self._is_local_copy(local_path, file_data):
+                return 'skipped'
+            self._download_to_path(file_data.get_relative_path(), local_path,
+                                   file_data.last_modified, chunk_size=chunk_size)
+            return 'downloaded'
+
+        for (file_data, local_path), status, error in iter_results(
+                _download, _to_download(), workers=workers):
+            yield TransferResult(file_data.get_relative_path(), local_path,
+                                 'failed' if error else status, error)
+
+    def download_tree(self, remote_path, local_dir, workers=None, chunk_size=None):
+        """
+        Download a folder recursively (mirror), several files at once.
+        Local folders are created, and timestamps are preserved.
+        Files already downloaded (same size and mtime) are skipped.
+
+        Args:
+            remote_path (str): remote folder path
+            local_dir (str): local folder
+            workers (int): number of concurrent requests
+            chunk_size (int): size of the written chunks (bytes)
+
+        Returns:
+            list of TransferResult (status 'downloaded', 'skipped' or 'failed')
+        """
+        return list(self.iter_download_tree(remote_path, local_dir, workers=workers,
+                                            chunk_size=chunk_size))
 
     def upload_file(self, local_filepath, remote_filepath, timestamp=None):
         """
-        Upload file to Nextcloud storage
+        Upload file to Nextcloud storage.
+        The file is read by blocks while it is sent (constant memory).
 
         Args:
-            local_filepath (str): path to file on local storage
+            local_filepath (str): path to file on local storage,
+                or file object opened in binary mode
             remote_filepath (str): path where to upload file on Nextcloud storage
             timestamp (int): timestamp of upload file. If None, get time by local file.
 
         Returns:
             requester response
         """
-        with open(local_filepath, 'rb') as f:
-            file_contents = f.read()
+        if hasattr(local_filepath, 'read'):
+            if timestamp is None:
+                timestamp = file_timestamp(local_filepath)
+            return self.upload_file_contents(local_filepath, remote_filepath, timestamp)
         if timestamp is None:
             timestamp = int(os.path.getmtime(local_filepath))
-        return self.upload_file_contents(file_contents, remote_filepath, timestamp)
+        with open(local_filepath, 'rb') as f:
+            return self.upload_file_contents(f, remote_filepath, timestamp)
 
     def upload_file_contents(self, file_contents, remote_filepath, timestamp=None):
         """
         Upload file to Nextcloud storage
 
         Args:
-            file_contents (bytes): Bytes the file to be uploaded consists of
+            file_contents (bytes): Bytes the file to be uploaded consists of ;
+                or a binary file object, a memoryview/mmap, or an iterator of
+                bytes (sent with chunked transfer encoding).
+                Requests are retried only if the content can be rewound.
             remote_filepath (str): path where to upload file on Nextcloud storage
             timestamp (int):  mtime of upload file
 
@@ -411,9 +867,76 @@ class WebDAV(WebDAVApiWrapper):
             requester response
         """
         resp = self.requester.put_with_timestamp(
-            self._get_path(remote_filepath), data=file_contents, timestamp=timestamp)
+            self._get_path(remote_filepath), data=as_body(file_contents),
+            timestamp=timestamp)
         return resp
 
+    def iter_upload_tree(self, local_dir, remote_path, workers=None):
+        """
+        Upload a folder recursively, several files at once (see upload_tree)
+
+        Returns:
+            iterator of TransferResult, in completion order
+        """
+        remote_root = (remote_path or '').strip('/')
+
+        def _remote(rel_path):
+            return '/'.join(p for p in [remote_root, rel_path] if p)
+
+        # create the remote folders, level by level
+        if remote_root:
+            self.ensure_tree_exists(remote_root, raise_on_error=True)
+        level = ['']
+        while level:
+            subdirs = [_join(rel_path, entry.name)
+                       for rel_path in level
+                       for entry in _scan(local_dir, rel_path)
+                       if entry.is_dir(follow_symlinks=False)]
+            for _folder, _resp, error in iter_results(
+                    lambda folder: self.ensure_folder_exists(_remote(folder),
+                                                             raise_on_error=True),
+                    subdirs, workers=workers):
+                if error is not None:
+                    raise error
+            level = subdirs
+
+        def _local_files(rel_path=''):
+            # scanned again (lazily) to keep memory bounded
+            for entry in _scan(local_dir, rel_path):
+                if entry.is_dir(follow_symlinks=False):
+                    for item in _local_files(_join(rel_path, entry.name)):
+                        yield item
+                elif entry.is_file():
+                    yield (entry.path, _join(rel_path, entry.name))
+
+        def _upload(item):
+            local_path, rel_path = item
+            resp = self.upload_file(local_path, _remote(rel_path))
+            if not resp.is_ok:
+                self._raise_exception(resp, rel_path)
+            return 'uploaded'
+
+        for (local_path, rel_path), status, error in iter_results(
+                _upload, _local_files(), workers=workers):
+            yield TransferResult(_remote(rel_path), local_path,
+                                 'failed' if error else status, error)
+
+    def upload_tree(self, local_dir, remote_path, workers=None):
+        """
+        Upload a folder recursively, several files at once.
+        The remote folders are created first (level by level), then the files
+        are streamed (constant memory per file) with their timestamp.
+
+        Args:
+            local_dir (str): local folder
+            remote_path (str): remote folder path (created if needed)
+            workers (int): number of concurrent requests
+
+        Returns:
+            list of TransferResult (status 'uploaded' or 'failed')
+        """
+        return list(self.iter_upload_tree(local_dir, remote_path, workers=workers))
+
     def create_folder(self, folder_path, already_exists=False):
         """
         Create folder on Nextcloud storage
@@ -536,25 +1059,57 @@ class WebDAV(WebDAVApiWrapper):
         data = File.build_xml_propupdate(update_rules)
         return self.requester.proppatch(self._get_path(path), data=data)
 
-    def fetch_files_with_filter(self, path='', filter_rules=''):
+    # pylint: disable=too-many-arguments
+    def fetch_files_with_filter(self, path='', filter_rules='', lazy=None, compact=False,
+                                columnar=False):
         """
         List files according to a filter
 
         Args:
             path (str): file or folder path to search
             filter_rules : a dict { namespace: {key : value } }
+            lazy (bool): compute File properties on first access (default File.LAZY)
+            compact (bool): memory efficient read-only File objects (see File.compact_class)
+            columnar (bool): ColumnSet of File.COLUMNS instead of File objects
 
         Returns:
-            requester response with list<File> in data
+            requester response with list<File> (or ColumnSet) in data
 
         Note :
             check keys in nextcloud.common.properties.NAMESPACES_MAP for namespace codes
             check object property xml_name for property name
         """
         data = File.build_xml_propfind(
-            instr='oc:filter-files', filter_rules=filter_rules)
+            instr='oc:filter-files', filter_rules=filter_rules,
+            fields=[name for name, _ in File.COLUMNS] if columnar else None)
         resp = self.requester.report(self._get_path(path), data=data)
-        return File.from_response(resp, wrapper=self)
+        return File.from_response(resp, wrapper=self, lazy=lazy, compact=compact,
+                                  columnar=columnar)
+
+    def iter_files_with_filter(self, path='', filter_rules='', lazy=None, compact=False):
+        """
+        Iterate over files according to a filter (see fetch_files_with_filter),
+        each File being built as soon as it is received
+
+        Args:
+            path (str): file or folder path to search
+            filter_rules : a dict { namespace: {key : value } }
+            lazy (bool): compute File properties on first access (default File.LAZY)
+            compact (bool): memory efficient read-only File objects (see File.compact_class)
+
+        Returns:
+            iterator of File objects
+
+        Raises:
+            NextCloudError if the request failed
+        """
+        data = File.build_xml_propfind(
+            instr='oc:filter-files', filter_rules=filter_rules)
+        resp = self.requester.report(self._get_path(path), data=data, stream=True)
+        if not resp.is_ok:
+            self._raise_exception(resp, path)
+        for file_data in File.iter_from_response(resp, wrapper=self, lazy=lazy, compact=compact):
+            yield file_data
 
     def set_favorites(self, path):
         """
@@ -580,6 +1135,19 @@ class WebDAV(WebDAVApiWrapper):
         """
         return self.fetch_files_with_filter(path, {'oc': {'favorite': 1}})
 
+    def iter_favorites(self, path=''):
+        """
+        Iterate over favorites (files) of the user (see iter_files_with_filter)
+
+        Args:
+            path (str): file or folder path to search favorite
+
+        Returns:
+            iterator of File objects
+        """
+        for file_data in self.iter_files_with_filter(path, {'oc': {'favorite': 1}}):
+            yield file_data
+
     def get_file_property(self, path, field, ns='oc'):
         """
         Fetch asked properties from a file path.
@@ -656,6 +1224,49 @@ class WebDAV(WebDAVApiWrapper):
         return href[len(_app_root):]
 
 
+TREE_FIELDS = ['last_modified', 'resource_type', 'content_length', 'file_id', 'etag']
+
+
+def _parent_key(key):
+    return key.rsplit('/', 1)[0] if '/' in key else ''
+
+
+def _join(rel_path, name):
+    return '/'.join([rel_path, name]) if rel_path else name
+
+
+def _tree_local_path(local_dir, root, path):
+    """ Local path of a remote path of the tree root, None if it is not inside local_dir """
+    if path.rstrip('/') != root.rstrip('/') and not path.startswith(root.rstrip('/') + '/'):
+        return None
+    rel_path = path[len(root):].strip('/')
+    if not rel_path:
+        return local_dir
+    parts = rel_path.split('/')
+    for part in parts:
+        if part in ('', '.', '..') or os.path.isabs(part) or os.path.splitdrive(part)[0] \
+                or os.sep in part or (os.altsep and os.altsep in part):
+            return None
+    local_path = os.path.normpath(os.path.join(local_dir, *parts))
+    if not local_path.startswith(os.path.join(os.path.normpath(local_dir), '')):
+        return None
+    return local_path
+
+
+def _scan(local_dir, rel_path):
+    """ Entries of a local folder (rel_path is '/' separated) """
+    path = os.path.join(local_dir, *rel_path.split('/')) if rel_path else local_dir
+    return sorted(scandir(path), key=lambda entry: entry.name)
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+
+
 # add method alt names for backward compat
 # Changed because "assure" is more sementically a test than a doing
 WebDAV.assure_folder_exists = WebDAV.ensure_folder_exists
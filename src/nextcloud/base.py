@@ -37,10 +37,15 @@ class BaseApiWrapper(six.with_metaclass(MetaWrapper)):
     >>>    def get_info(self):
     >>>        return self.requester.get()
 
+    RETRY_POLICY (see nextcloud.retry) can be set to override
+    the retry policy of the session for the requests of a wrapper.
+    >>> WebDAV.RETRY_POLICY = RetryPolicy(max_retries=10, deadline=300)
+
     """
     API_URL = NotImplementedError
     VERIFIED = True
     JSON_ABLE = True
+    RETRY_POLICY = None
 
     def _set_requester(self):
         self.requester = Requester(self)
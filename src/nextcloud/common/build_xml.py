@@ -2,7 +2,9 @@
 """
 XML builder
 """
+import re
 import xml.etree.ElementTree as ET
+import six
 from ..api.properties import NAMESPACES_MAP
 
 
@@ -40,10 +42,105 @@ def _to_field_vals_list(fields_hash):
 def _tostring(root):
     return ET.tostring(root)
 
+
+# serialized bodies, per instruction and names of the fields and values :
+# only the values are substituted (shared by the threads)
+_TEMPLATES = {}
+TEMPLATES_SIZE = 1024
+# text of the values in the templates : their index between NUL characters
+# (NUL is not a xml character)
+_VALUE_MARK = '\x00%d\x00'
+_VALUE_MARKS = re.compile(b'\x00(\\d+)\x00')
+
+
+def _escape_text(text):
+    """ text escaped as ET.tostring does (us-ascii, character references) """
+    text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    if isinstance(text, six.text_type):
+        text = text.encode('ascii', 'xmlcharrefreplace')
+    return text
+
+
+# pylint: disable=useless-object-inheritance
+class BodyTemplate(object):
+    """ A serialized xml body, in parts between the values """
+
+    def __init__(self, root):
+        parts = _VALUE_MARKS.split(_tostring(root))
+        # [text, value index, text, value index…, text]
+        self.parts = parts[::2]
+        self.indexes = [int(index) for index in parts[1::2]]
+
+    def render(self, values):
+        """
+        Serialized body with these values
+
+        :param values: strings, in the order of the template values
+        :returns:      xml data (bytes)
+        """
+        parts = self.parts
+        if len(parts) == 1:
+            return parts[0]
+        body = [parts[0]]
+        for index, part in zip(self.indexes, parts[1:]):
+            body.append(_escape_text(values[index]))
+            body.append(part)
+        return b''.join(body)
+
+
+def _names(fields_hash):
+    """ hashable names of a fields (or values) hash, in order """
+    return tuple((field_type, tuple(fields_hash[field_type])) for field_type in fields_hash)
+
+
+def _template_values(values_hash):
+    """ values of a values hash, in the template order (None if not all strings) """
+    values = []
+    for field_type in values_hash:
+        if field_type in SUPPORTED_FIELD_TYPES:
+            vals = values_hash[field_type]
+            for field in vals:
+                value = _safe_xml_val(vals[field])
+                if not isinstance(value, six.string_types):
+                    return None  # None (no text) or not serializable : no template
+                values.append(value)
+    return values
+
+
+def _marked(values_hash):
+    """ values hash with the values replaced by marks (see BodyTemplate) """
+    marked = {}
+    index = 0
+    for field_type in values_hash:
+        if field_type in SUPPORTED_FIELD_TYPES:
+            marked[field_type] = {}
+            for field in values_hash[field_type]:
+                marked[field_type][field] = _VALUE_MARK % index
+                index += 1
+    return marked
+
+
+def _render(key, values, build_root, values_hash):
+    """ render the template of key (built from build_root(marked values) if needed) """
+    try:
+        template = _TEMPLATES.get(key)
+    except TypeError:  # not hashable names
+        return None
+    if template is None:
+        template = BodyTemplate(build_root(_marked(values_hash)))
+        if len(_TEMPLATES) >= TEMPLATES_SIZE:
+            _TEMPLATES.clear()
+        _TEMPLATES[key] = template
+    return template.render(values)
+
+
 def build_propfind_datas(instr=None, filter_rules=None, fields=None):
     """
     Build XML datas for a PROPFIND querry.
 
+    The bodies are memoized per instruction, fields and filter rules names :
+    only the values of the filter rules are substituted.
+
     :param instr:        http instruction (default: PROPFIND)
     :param filter_rules: a dict containing filter rules separated by
                          namespace. e.g. {'oc': {'favorite': 1}}
@@ -51,12 +148,23 @@ def build_propfind_datas(instr=None, filter_rules=None, fields=None):
                          e.g. {'oc': ['id']}
     :returns:            xml data (string)
     """
+    fields = fields or {}
+    filter_rules = filter_rules or {}
+    values = _template_values(filter_rules)
+    if values is not None:
+        key = ('propfind', instr, _names(fields), _names(filter_rules))
+        data = _render(key, values, lambda rules: _propfind_root(instr, rules, fields),
+                       filter_rules)
+        if data is not None:
+            return data
+    return _tostring(_propfind_root(instr, filter_rules, fields))
+
+
+def _propfind_root(instr, filter_rules, fields):
     if not instr:
         instr = 'd:propfind'
 
     _namespaces = XML_NAMESPACES_MAP
-    fields = fields or {}
-    filter_rules = filter_rules or {}
     if fields or filter_rules:
         # restrict namespaces
         _namespaces = {}
@@ -77,7 +185,7 @@ def build_propfind_datas(instr=None, filter_rules=None, fields=None):
         for prop in props:
             ET.SubElement(prop_group, prop)
 
-    rules = _to_field_vals_list(filter_rules or {})
+    rules = _to_field_vals_list(filter_rules)
     if rules:
         rule_group = ET.SubElement(root, 'oc:filter-rules')
         for k in rules:
@@ -85,16 +193,27 @@ def build_propfind_datas(instr=None, filter_rules=None, fields=None):
             val = rules[k]
             rule.text = _safe_xml_val(val)
 
-    return _tostring(root)
+    return root
 
 def build_propupdate_datas(values):
     """
-    Build XML datas for a PROPUPDATE querry.
+    Build XML datas for a PROPUPDATE querry (memoized per values names,
+    see build_propfind_datas).
 
     :param values:       a dict containing values separated by namespace
                          e.g. {'oc': {'favorite': 1}}
     :returns:            xml data (string)
     """
+    template_values = _template_values(values)
+    if template_values is not None:
+        data = _render(('propupdate', _names(values)), template_values,
+                       _propupdate_root, values)
+        if data is not None:
+            return data
+    return _tostring(_propupdate_root(values))
+
+
+def _propupdate_root(values):
     root = ET.Element('d:propertyupdate', XML_NAMESPACES_MAP)
     vals = _to_field_vals_list(values)
     if vals:
@@ -104,4 +223,4 @@ def build_propupdate_datas(values):
             val = ET.SubElement(val_group, k)
             val.text = vals[k]
 
-    return _tostring(root)
+    return root
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Run requests concurrently in a bounded pool of threads
+"""
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    import contextvars
+except ImportError:  # python < 3.7
+    contextvars = None
+
+DEFAULT_WORKERS = 4
+
+
+def in_context(func):
+    """
+    Wrap func to run it in a copy of the current context
+    (to keep the current deadline in worker threads)
+    """
+    if contextvars is None:
+        return func
+    ctx = contextvars.copy_context()
+
+    def _run(*args, **kwargs):
+        # a context can't be entered by several threads at once
+        return ctx.copy().run(func, *args, **kwargs)
+    return _run
+
+
+def iter_results(func, items, workers=None):
+    """
+    Apply func to each item with at most 'workers' threads.
+    Items are consumed lazily (at most 2 * workers pending tasks).
+
+    :param func:    function taking an item
+    :param items:   iterable
+    :param workers: number of threads (default DEFAULT_WORKERS)
+    :returns: iterator of (item, result, exception), in completion order
+    """
+    workers = workers or DEFAULT_WORKERS
+    func = in_context(func)
+    items = iter(items)
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                for item in items:
+                    pending[executor.submit(func, item)] = item
+                    if len(pending) >= 2 * workers:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    item = pending.pop(future)
+                    error = future.exception()
+                    yield item, (None if error else future.result()), error
+        finally:
+            # stopped early : do not start the remaining tasks
+            for future in pending:
+                future.cancel()
+
+
+def run_all(func, items, workers=None):
+    """
+    Apply func to each item with at most 'workers' threads,
+    stopping at the first exception (raised).
+
+    :returns: list of (item, result) in completion order
+    """
+    results = []
+    for item, result, error in iter_results(func, items, workers=workers):
+        if error is not None:
+            raise error
+        results.append((item, result))
+    return results
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+JSON parser
+"""
+import json
+import six
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 'orjson' if installed (faster), else 'json'
+# (orjson reads integers of more than 64 bits as floats)
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def loads(data):
+    """
+    Parse json data
+
+    :param data: bytes (utf-8) or str
+    :returns:    python object
+    :raises:     ValueError if the data is not valid json
+    """
+    if BACKEND == 'orjson':
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # NaN, utf-16… : let json decide
+    if six.PY2 and isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data)
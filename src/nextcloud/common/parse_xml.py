@@ -3,29 +3,168 @@
 XML parser
 """
 import xml.etree.ElementTree as ET
+import six
 from ..compat import encode_string
 
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+# raised for invalid xml documents (and empty contents)
+ParseError = ET.ParseError
+
+# size of the chunks given to the incremental parser (bytes)
+CHUNK_SIZE = 64 * 1024
+
+# parser of the WebDAV multistatus documents : 'etree' (xml.etree), 'lxml',
+# or None to use lxml (if installed) for lazy items only : lxml parses faster,
+# but its elements are slower to read (each access builds a python object)
+DAV_BACKEND = None
+
 
 def _prepare_xml_parsing(string):
     return encode_string(string)
 
 
-def fromstring(data):
+def fromstring(data, backend='etree'):
     """
     Fetch xml.etree.ElementTree for input data
 
-    :param data:   raw xml data
+    :param data:    raw xml data (bytes are parsed as they are)
+    :param backend: 'etree' or 'lxml' (same element API, see DAV_BACKEND)
     :returns:      :class:xml.etree.ElementTree
     """
+    if backend == 'lxml':
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+        return lxml_etree.fromstring(data, _lxml_parser())
     return ET.fromstring(_prepare_xml_parsing(data))
 
 
+def dav_backend(lazy=False):
+    """ Parser backend of a multistatus document (see DAV_BACKEND) """
+    if DAV_BACKEND is not None:
+        return DAV_BACKEND
+    return 'lxml' if lazy and lxml_etree is not None else 'etree'
+
+
+def _lxml_parser():
+    # no external entities nor network access (as xml.etree),
+    # no comments nor processing instructions among the children
+    return lxml_etree.XMLParser(resolve_entities=False, no_network=True,
+                                remove_comments=True, remove_pis=True)
+
+
+def _split_chunks(chunks):
+    """ chunks of at most CHUNK_SIZE bytes """
+    return (chunk[i:i + CHUNK_SIZE] if len(chunk) > CHUNK_SIZE else chunk
+            for chunk in chunks for i in range(0, len(chunk) or 1, CHUNK_SIZE))
+
+
+def iter_elements(chunks, tag):
+    """
+    Parse xml data received by chunks (incremental parsing), and yield each
+    'tag' element as soon as it is complete. Yielded elements are then
+    removed from the tree : memory doesn't grow with the document size.
+
+    :param chunks: iterable of xml data (bytes)
+    :param tag:    element tag in Clark notation (e.g. '{DAV:}response')
+    :returns:      iterator of :class:xml.etree.ElementTree.Element
+    """
+    if not hasattr(ET, 'XMLPullParser'):  # python 2 : not incremental
+        for element in fromstring(b''.join(chunks)).iter(tag):
+            yield element
+        return
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    # big chunks are fed by parts (the root keeps the pending elements)
+    chunks = _split_chunks(chunks)
+    while parser is not None:
+        chunk = next(chunks, None)
+        if chunk is None:
+            parser.close()
+            events, parser = parser.read_events(), None
+        else:
+            parser.feed(chunk)
+            events = parser.read_events()
+        for event, element in events:
+            if event == 'start':
+                if root is None:
+                    root = element
+            elif element.tag == tag:
+                yield element
+                element.clear()
+                try:
+                    root.remove(element)
+                except ValueError:  # not a child of the root
+                    pass
+
+
 # Note : etree_to_dict is mainly developped for group_folders wrapper v4 which
 #        doesn't support json format
 
 def etree_to_dict(element):
     " Get a dict from an element tree "
-    return {element.tag: _etree_to_dict(element, element.tag)}
+    return {element.tag: _etree_to_dict(element)}
+
+
+def iterparse_to_dict(chunks):
+    """
+    Get the dict of a xml document received by chunks (same result as
+    etree_to_dict), converted while it is parsed : no element tree is built.
+
+    :param chunks: iterable of xml data (bytes)
+    :returns:      dict
+    """
+    builder = _DictBuilder()
+    parser = ET.XMLParser(target=builder)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+
+# pylint: disable=useless-object-inheritance
+class _DictBuilder(object):
+    """ Parser target building the dict of etree_to_dict (see iterparse_to_dict) """
+
+    def __init__(self):
+        # frames of the open elements :
+        # [tag, xpath, key definition, child nodes, has children, attributes, texts]
+        self.stack = []
+        self.result = None
+
+    def start(self, tag, attrib):
+        stack = self.stack
+        if stack:
+            parent = stack[-1]
+            parent[4] = True
+            xpath = parent[1] + '/' + tag
+        else:
+            xpath = tag
+        stack.append([tag, xpath, None, {}, False, attrib, []])
+
+    def data(self, text):
+        self.stack[-1][6].append(text)
+
+    def end(self, tag):
+        frame = self.stack.pop()
+        if frame[4]:
+            value = _node_value(frame[3])
+        elif tag == 'element':
+            value = dict(frame[5])
+        else:
+            value = _text_value(tag, ''.join(frame[6]) if frame[6] else None)
+        if not self.stack:
+            self.result = {tag: value}
+            return
+        parent = self.stack[-1]
+        if parent[2] is None and tag == 'element':
+            parent[2] = _key_definition(parent[1])
+        parent[3] = _add_child(parent[3], parent[2], tag, value)
+
+    def close(self):
+        return self.result
 
 
 XPATH_KEY_VALUE_DEF = {
@@ -33,65 +172,102 @@ XPATH_KEY_VALUE_DEF = {
 }
 
 
-def _etree_to_dict(element, xpath):
-    # pylint: disable=too-many-locals, too-many-branches, unnecessary-comprehension
-    node = dict()
-
-    text = getattr(element, 'text', None)
-    child_nodes = {}
-
-    element_childs = [k for k in element]
-
-    if not element_childs and element.tag == 'element':
-        return {k: v for k, v in element.items()}
-
-    for child in element_childs:  # element's children
-        child_path = xpath + '/' + child.tag
-        sub_node = _etree_to_dict(child, child_path)
-        if child.tag == 'element':
-            if isinstance(sub_node, dict):
-                cur_tag = element.tag
-                if child_path in XPATH_KEY_VALUE_DEF:
-                    id_tag, value_tag, _type = XPATH_KEY_VALUE_DEF[child_path]
-                    _key = sub_node.get(id_tag, False)
-                    _value = sub_node.get(value_tag, False)
-                    if _value:
-                        _value = _type(_value)
-                else:
-                    _key = sub_node.pop('id', False)
-                    if not _key:
-                        id_tag = cur_tag[:-1] if cur_tag.endswith('s') else cur_tag
-                        _key = sub_node.pop('%s_id' % id_tag, False)
-                    _value = sub_node
-                if not _key:
-                    _key = child.tag
-                child_nodes[_key] = _value
-            elif isinstance(sub_node, list):
-                child_nodes = sub_node
-        else:
-            child_nodes.setdefault(child.tag, []).append(sub_node)
-
-    if not element_childs:
-        if element.tag == 'data':
-            if text == '0' or not text:
-                text = False
-            elif text == '1':
-                text = True
-        if text is None:
-            text = []
-        return text
+def _key_definition(xpath):
+    """
+    How the 'element' children of the element at xpath are indexed :
+    (id tag, value tag, type) or (None, id tag) (see XPATH_KEY_VALUE_DEF)
+    """
+    key_value_def = XPATH_KEY_VALUE_DEF.get(xpath + '/element')
+    if key_value_def is not None:
+        return key_value_def
+    tag = xpath.rsplit('/', 1)[-1]
+    return None, '%s_id' % (tag[:-1] if tag.endswith('s') else tag), None
+
+
+def _leaf_value(element):
+    """ value of an element without children : text (or attributes of 'element') """
+    if element.tag == 'element':
+        return dict(element.items())
+    return _text_value(element.tag, element.text)
 
+
+def _text_value(tag, text):
+    """ value of the text of an element without children """
+    if tag == 'data':
+        if text == '0' or not text:
+            return False
+        if text == '1':
+            return True
+    return [] if text is None else text
+
+
+def _add_child(child_nodes, key_definition, child_tag, value):
+    """
+    Add the value of a child to the child nodes of an element :
+    'element' children are indexed by their id (see _key_definition),
+    others listed by tag.
+    Return the child nodes (replaced by the value of an 'element' list)
+    """
+    if child_tag != 'element':
+        child_nodes.setdefault(child_tag, []).append(value)
+        return child_nodes
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, dict):
+        return child_nodes
+    id_tag, value_tag, _type = key_definition
+    if _type is not None:
+        key = value.get(id_tag, False)
+        value = value.get(value_tag, False)
+        if value:
+            value = _type(value)
+    else:
+        key = value.pop('id', False) or value.pop(value_tag, False)
+    child_nodes[key or child_tag] = value
+    return child_nodes
+
+
+def _node_value(child_nodes):
+    """ value of an element from its child nodes (single values are not listed) """
     if isinstance(child_nodes, list):
         if len(child_nodes) == 1:
             return child_nodes[0]
         return child_nodes
-
-    # convert all single-element lists into non-lists
     for key, value in child_nodes.items():
-        if isinstance(value, list):
-            if len(value) == 1:
-                child_nodes[key] = value[0]
+        if isinstance(value, list) and len(value) == 1:
+            child_nodes[key] = value[0]
+    return child_nodes
 
-    node.update(child_nodes.items())
 
-    return node
+def _etree_to_dict(root):
+    """ value of an element (see etree_to_dict), converted without recursion """
+    if not len(root):
+        return _leaf_value(root)
+    stack = []
+    xpath = root.tag
+    children, xpath, key_definition, child_nodes = iter(root), xpath, _key_definition(xpath), {}
+    while True:
+        for child in children:
+            child_tag = child.tag
+            if len(child):
+                # convert the child first, then come back to the next ones
+                stack.append((children, xpath, key_definition, child_nodes, child_tag))
+                xpath = xpath + '/' + child_tag
+                children, key_definition, child_nodes = iter(child), _key_definition(xpath), {}
+                break
+            if child_tag != 'element' and child_tag != 'data':
+                # most frequent : text of a leaf, listed by tag
+                text = child.text
+                try:
+                    child_nodes[child_tag].append([] if text is None else text)
+                except KeyError:
+                    child_nodes[child_tag] = [[] if text is None else text]
+            else:
+                child_nodes = _add_child(child_nodes, key_definition, child_tag,
+                                         _leaf_value(child))
+        else:
+            value = _node_value(child_nodes)
+            if not stack:
+                return value
+            children, xpath, key_definition, child_nodes, child_tag = stack.pop()
+            child_nodes = _add_child(child_nodes, key_definition, child_tag, value)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Request bodies sent without loading them in memory
+"""
+import io
+import mmap
+import os
+import six
+
+# size of the blocks read from file objects (bytes)
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Seekable file object reading a whole buffer (memoryview, mmap…) without copy
+
+    :param buf: object supporting the buffer protocol
+    """
+
+    def __init__(self, buf):
+        super(BufferReader, self).__init__()
+        view = memoryview(buf)
+        if hasattr(view, 'cast') and view.format != 'B':
+            view = view.cast('B')
+        self._view = view
+        self._pos = 0
+
+    def __len__(self):
+        return len(self._view)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, min(offset, len(self._view)))
+        return self._pos
+
+    def close(self):
+        if not self.closed and hasattr(self._view, 'release'):
+            self._view.release()
+        super(BufferReader, self).close()
+
+    def readinto(self, b):
+        size = min(len(b), len(self._view) - self._pos)
+        b[:size] = self._view[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+
+def as_body(source):
+    """
+    Get a request body sent by blocks from a file content source
+
+    :param source: bytes, str, file object (opened in binary mode),
+                   buffer (memoryview, mmap, bytearray)
+                   or iterator of bytes (sent with chunked transfer encoding)
+    :returns: bytes, file object or iterator
+    """
+    if isinstance(source, (six.binary_type, six.text_type)):
+        return source
+    if isinstance(source, (memoryview, bytearray, mmap.mmap)):
+        return BufferReader(source)
+    if hasattr(source, 'read'):  # file object
+        return source
+    if hasattr(source, '__iter__'):
+        return iter(source)
+    raise TypeError('Unsupported file content: %r' % type(source))
+
+
+def iter_body(body, block_size=READ_BLOCK_SIZE):
+    """
+    Iterate over a body by blocks (see as_body)
+
+    :param body: bytes, file object or iterator of bytes
+    """
+    if isinstance(body, (six.binary_type, six.text_type)):
+        yield body
+    elif hasattr(body, 'read'):
+        while True:
+            block = body.read(block_size)
+            if not block:
+                return
+            yield block
+    else:
+        for block in body:
+            if block:
+                yield block
+
+
+def file_timestamp(fileobj):
+    """
+    Modification time of the file behind a file object
+
+    :returns: int or None
+    """
+    try:
+        return int(os.fstat(fileobj.fileno()).st_mtime)
+    except (AttributeError, OSError, IOError, ValueError, io.UnsupportedOperation):
+        return None
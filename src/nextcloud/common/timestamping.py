@@ -2,30 +2,69 @@
 """
 Extra tools for value parsing
 """
+import re
 from datetime import datetime
-import os
-from nextcloud.compat import timestamp_from_datetime
+import six
+from nextcloud.compat import timestamp_from_datetime  # pylint: disable=unused-import
 
 DATETIME_FORMAT = '%a, %d %b %Y %H:%M:%S GMT'
 
+# rfc1123-date : 'Sun, 06 Nov 1994 08:49:37 GMT'
+RFC1123_DATE = re.compile(
+    r'(?:Mon|Tue|Wed|Thu|Fri|Sat|Sun), (\d{1,2}) '
+    r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec) (\d{4}) (\d{2}):(\d{2}):(\d{2}) GMT\Z')
+MONTHS = {name: number + 1 for number, name in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])}
+EPOCH = datetime(1970, 1, 1)
+
+# parsed dates, shared by the threads (listings repeat the same dates)
+_CACHE = {}
+CACHE_SIZE = 4096
+
+
 def datetime_to_expire_date(date):
     return date.strftime("%Y-%m-%d")
 
+
+def _parse(rfc1123_date):
+    """ (datetime, epoch time) of a rfc1123-date, (None, None) if invalid """
+    if not isinstance(rfc1123_date, six.string_types):
+        return None, None
+    match = RFC1123_DATE.match(rfc1123_date)
+    if match is None:
+        return None, None
+    day, month, year, hour, minute, second = match.groups()
+    try:
+        _time = datetime(int(year), MONTHS[month], int(day),
+                         int(hour), int(minute), int(second))
+    except ValueError:  # 31 Feb, 25:00:00…
+        return None, None
+    delta = _time - EPOCH
+    return _time, delta.days * 86400 + delta.seconds
+
+
+def _parse_cached(rfc1123_date):
+    try:
+        return _CACHE[rfc1123_date]
+    except (KeyError, TypeError):
+        pass
+    parsed = _parse(rfc1123_date)
+    if len(_CACHE) >= CACHE_SIZE:
+        _CACHE.clear()
+    try:
+        _CACHE[rfc1123_date] = parsed
+    except TypeError:  # not hashable : not a date
+        pass
+    return parsed
+
+
 def datetime_from_string(rfc1123_date):
     """
     Parse date string to datetime (UTC)
     :param rfc1123_date (str): rfc1123-date (defined in RFC2616)
-    :returns: datetime or None
+    :returns: datetime (naive) or None
     """
-    _time = None
-    try:
-        _tz = os.environ.get('TZ', '')
-        os.environ['TZ'] = 'UTC'
-        _time = datetime.strptime(rfc1123_date, DATETIME_FORMAT)
-        os.environ['TZ'] = _tz
-    except ValueError:
-        pass
-    return _time
+    return _parse_cached(rfc1123_date)[0]
 
 
 def timestamp_from_string(rfc1123_date=''):
@@ -40,5 +79,27 @@ def timestamp_from_string(rfc1123_date=''):
     Return:
         int or None : Epoch time, if date string value is invalid return None
     """
-    _time = datetime_from_string(rfc1123_date)
-    return timestamp_from_datetime(_time) if _time else None
+    return _parse_cached(rfc1123_date)[1]
+
+
+def timestamps_from_strings(rfc1123_dates):
+    """
+    Epoch times of many rfc1123-date (e.g. the DAV:getlastmodified of a listing),
+    each distinct date being parsed once
+
+    Args:
+        rfc1123_dates (iterable of str): rfc1123-dates
+    Return:
+        list of int or None (see timestamp_from_string)
+    """
+    parsed = {}
+    timestamps = []
+    for rfc1123_date in rfc1123_dates:
+        try:
+            timestamp = parsed[rfc1123_date]
+        except KeyError:
+            timestamp = parsed[rfc1123_date] = _parse(rfc1123_date)[1]
+        except TypeError:  # not hashable : not a date
+            timestamp = None
+        timestamps.append(timestamp)
+    return timestamps
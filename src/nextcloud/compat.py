@@ -10,6 +10,14 @@ try:
     from urllib2 import unquote as unquote
 except ImportError:
     from urllib.parse import unquote as unquote
+try:
+    from os import scandir
+except ImportError:  # python < 3.5
+    from scandir import scandir
+try:
+    from os import replace as replace_file
+except ImportError:  # python 2 : rename replaces the target on posix only
+    from os import rename as replace_file
 
 
 def encode_requests_password(word):
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+End-to-end deadlines : a time budget shared by all the requests made
+during an operation (in the current thread / asyncio task).
+
+Usage::
+
+  >>> with nxc.deadline(30):
+  ...     nxc.download_file('big/folder/file.bin')  # PROPFIND + GET
+  ...     nxc.ensure_tree_exists('foo/bar/baz')      # several MKCOL
+
+Every request made in the block gets a timeout limited by the remaining
+time, and NextCloudTimeoutError is raised once the budget is spent.
+Nested deadlines can only shorten the current one.
+"""
+import time
+from contextlib import contextmanager
+from .exceptions import NextCloudTimeoutError
+
+try:
+    import contextvars
+    _CURRENT = contextvars.ContextVar('nextcloud_deadline', default=None)
+
+    def current_deadline():
+        """ Return the Deadline of the current context (or None) """
+        return _CURRENT.get()
+
+    def _set_current(value):
+        _CURRENT.set(value)
+except ImportError:  # python < 3.7
+    import threading
+    _LOCAL = threading.local()
+
+    def current_deadline():
+        """ Return the Deadline of the current context (or None) """
+        return getattr(_LOCAL, 'deadline', None)
+
+    def _set_current(value):
+        _LOCAL.deadline = value
+
+
+# pylint: disable=useless-object-inheritance
+class Deadline(object):
+    """
+    A point in time after which requests shall not be sent
+
+    :param seconds: time budget from now
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.time() + seconds
+
+    def __repr__(self):
+        return "<Deadline remaining={:.3f}s>".format(self.remaining())
+
+    def remaining(self):
+        """ Remaining time in seconds (can be negative) """
+        return self.expires_at - time.time()
+
+    def expired(self):
+        """ True if the time budget is spent """
+        return self.remaining() <= 0
+
+    def check(self, url=''):
+        """ Raise NextCloudTimeoutError if the time budget is spent """
+        if self.expired():
+            raise NextCloudTimeoutError(
+                'Deadline exceeded (%ss)' % self.seconds, url, self)
+
+    def clamp_timeout(self, timeout=None):
+        """
+        Limit a requests timeout to the remaining time
+
+        :param timeout: None, float, or tuple (connect timeout, read timeout)
+        :returns: float or tuple
+        """
+        remaining = max(self.remaining(), 0.001)
+        if isinstance(timeout, tuple):
+            return tuple(remaining if t is None else min(t, remaining)
+                         for t in timeout)
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    @classmethod
+    def earliest(cls, *deadlines):
+        """ Return the earliest of the given deadlines (None are ignored) """
+        deadlines = [d for d in deadlines if d is not None]
+        if not deadlines:
+            return None
+        return min(deadlines, key=lambda d: d.expires_at)
+
+
+def as_deadline(value):
+    """ Get a Deadline from a Deadline or a number of seconds (or None) """
+    if value is None or isinstance(value, Deadline):
+        return value
+    return Deadline(value)
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Context manager applying a time budget to all requests in the block
+
+    :param seconds: number of seconds, or a Deadline
+    """
+    previous = current_deadline()
+    new = Deadline.earliest(previous, as_deadline(seconds))
+    _set_current(new)
+    try:
+        yield new
+    finally:
+        _set_current(previous)
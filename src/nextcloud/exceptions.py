@@ -20,4 +20,5 @@ class NextCloudLoginError(NextCloudError):
     """ A login error occurred """
 
 
-
+class NextCloudTimeoutError(NextCloudConnectionError):
+    """ A request timed out, or a deadline is exceeded """
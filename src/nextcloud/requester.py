@@ -19,10 +19,10 @@ def _prepare_url(string):
 class Requester(object):
     """ Base requester """
 
+    # computed headers per (requester class, method)
     headers = {}
 
     def __init__(self, wrapper):
-        self.query_components = []
         self.wrapper = wrapper
 
     @staticmethod
@@ -32,15 +32,17 @@ class Requester(object):
     @classmethod
     def get_headers(cls, key, headers=None):
         """ Add information in headers (default nothing) """
-        h_dict = cls.headers.get(key, {})
-        if not h_dict:
+        h_dict = cls.headers.get((cls, key))
+        if h_dict is None:
+            h_dict = {}
             if key[0] == 'p':  # put or post
                 h_dict['Content-Type'] = (
                     'application/json' if '/json' in key else
                     'application/x-www-form-urlencoded'
                 )
             cls._setup_headers(h_dict)
-            cls.headers[key] = h_dict
+            # shared between threads : never modified once cached
+            h_dict = cls.headers.setdefault((cls, key), h_dict)
         if headers:
             h_dict = h_dict.copy()
             h_dict.update(headers)
@@ -71,18 +73,23 @@ class Requester(object):
         """ Define response type of the requests """
         return self.wrapper.JSON_ABLE
 
+    @property
+    def retry_policy(self):
+        """ The wrapper RetryPolicy (None to use the session one) """
+        return self.wrapper.RETRY_POLICY
+
     @property
     def success_code(self):
         """ The success code (<int> or <dict method_name: int>)"""
         return self.wrapper.SUCCESS_CODE
 
-    def rtn(self, resp, raw_content=None):
+    def rtn(self, resp, raw_content=None, stream=False, lean=False):
         """ Build the response from requests response (see response_type) """
         # print(resp)
         # print(resp.content)
         return self.response_type(
             response=resp, raw_content=raw_content,
-            success_code=self.success_code
+            success_code=self.success_code, stream=stream, lean=lean
         )
 
     def get_full_url(self, additional_url=""):
@@ -103,8 +110,6 @@ class Requester(object):
             additional_url = _prepare_url(additional_url)
             if not additional_url.startswith("/"):
                 additional_url = "/{}".format(additional_url)
-        if self.json_able:
-            self.query_components.append("format=json")
         ret = "{base_url}{api_url}{additional_url}".format(base_url=self.session.url,
                                                            api_url=self.api_url,
                                                            additional_url=additional_url)
@@ -116,7 +121,8 @@ class Requester(object):
     # pylint: disable=too-many-arguments
 
     def request(self, method, url, headers=None, params=None,
-                data=None, raw_content=False):
+                data=None, raw_content=False, timeout=None, deadline=None,
+                stream=False, lean=None):
         """
         Apply the request using 'requests' lib
 
@@ -126,6 +132,11 @@ class Requester(object):
         :param params:         requests parameters
         :param data:           data to push with the request
         :param raw_content:    use requests.Response content instead of default one
+        :param timeout:        float or (connect timeout, read timeout) in seconds
+                               (default: session timeout)
+        :param deadline:       Deadline or seconds (see nextcloud.deadline)
+        :param stream:         do not read the body of successful responses
+                               (see BaseResponse.iter_content)
 
         :returns: BaseResponse inherited (see response_type property)
         """
@@ -133,9 +144,20 @@ class Requester(object):
         if '/' in method:
             method = method.split('/')[0]
         url = self.get_full_url(url)
+        kwargs = {}
+        if timeout is not None:
+            kwargs['timeout'] = timeout
+        if stream:
+            kwargs['stream'] = True
         res = self.session.request(method, url, headers=headers,
-                                   params=params, data=data)
-        return self.rtn(res, raw_content=raw_content)
+                                   params=params, data=data,
+                                   retry=self.retry_policy,
+                                   deadline=deadline, **kwargs)
+        if lean is None:
+            lean = response.current_lean()
+            if lean is None:
+                lean = self.session.lean
+        return self.rtn(res, raw_content=raw_content, stream=stream, lean=lean)
 
     def get(self, url="", **kwargs):
         " get request "
@@ -155,7 +177,7 @@ class Requester(object):
 
     def put_with_timestamp(self, url="", data=None, timestamp=None, headers=None, **kwargs):
         " put request with additional timestamp "
-        headers = headers or {}
+        headers = dict(headers or {})
         if isinstance(timestamp, (float, int)):
             headers['X-OC-MTIME'] = '%.0f' % timestamp
         return self.request('put', url, data=data, headers=headers, **kwargs)
@@ -216,13 +238,13 @@ class WebDAVRequester(Requester):
         " report request "
         return self.request('report', url, **kwargs)
 
-    def download(self, url="", params=None):
+    def download(self, url="", params=None, stream=False):
         " download request "
-        return self.request('get', url, params=params, raw_content=True)
+        return self.request('get', url, params=params, raw_content=True, stream=stream)
 
-    def make_collection(self, url=""):
+    def make_collection(self, url="", headers=None):
         " mkcol request (make dir) "
-        return self.request("mkcol", url)
+        return self.request("mkcol", url, headers=headers)
 
     def move(self, url, destination, overwrite=False):
         " move request (move file) "
@@ -2,12 +2,96 @@
 """
 Define requests responses (automatically check if the request is OK)
 """
+from contextlib import contextmanager
+from .common import parse_json as ParseJSON, parse_xml as ParseXML
+
+# size of the chunks read from streamed responses (bytes)
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# data of a response not computed yet
+_NOT_COMPUTED = object()
+
 try:
-    from json import JSONDecodeError
-except ImportError:
-    JSONDecodeError = ValueError
+    import contextvars
+    _LEAN = contextvars.ContextVar('nextcloud_lean_responses', default=None)
+
+    def current_lean():
+        """ lean option of the current context (None : not set) """
+        return _LEAN.get()
+
+    def _set_lean(value):
+        _LEAN.set(value)
+except ImportError:  # python < 3.7
+    import threading
+    _LOCAL = threading.local()
+
+    def current_lean():
+        """ lean option of the current context (None : not set) """
+        return getattr(_LOCAL, 'lean', None)
+
+    def _set_lean(value):
+        _LOCAL.lean = value
+
+
+@contextmanager
+def lean_responses(lean=True):
+    """
+    Context manager setting the lean option of the responses
+    received in the block (see BaseResponse)
+
+    :param lean: True to release the contents once parsed, False to keep them
+    """
+    previous = current_lean()
+    _set_lean(lean)
+    try:
+        yield
+    finally:
+        _set_lean(previous)
+
+
+def read_raw(raw):
+    """ Read the whole body of a streamed requests or httpx response """
+    if hasattr(raw, 'iter_bytes'):  # httpx
+        return raw.read()
+    return raw.content
+
+
+def iter_raw(raw, chunk_size=STREAM_CHUNK_SIZE):
+    """ Iterate over the body of a streamed requests or httpx response """
+    if hasattr(raw, 'iter_bytes'):  # httpx
+        return raw.iter_bytes(chunk_size)
+    return raw.iter_content(chunk_size)
+
+
+# pylint: disable=useless-object-inheritance
+class RequestInfo(object):
+    """ Method and url of the request of a released response """
+
+    def __init__(self, request):
+        self.method = request.method
+        self.url = request.url
+
 
-from .common import parse_xml as ParseXML
+# pylint: disable=useless-object-inheritance
+class ReleasedRaw(object):
+    """
+    What a lean response keeps of its raw response once the content
+    is released : status code, headers, url and request method and url
+    """
+
+    def __init__(self, raw):
+        self.status_code = raw.status_code
+        self.headers = raw.headers
+        self.url = raw.url
+        self.request = RequestInfo(raw.request)
+
+    @property
+    def content(self):
+        """ The content is no longer available """
+        raise ValueError('The content of a lean response is released (use response.data)')
+
+    def close(self):
+        """ Nothing to release """
 
 
 # pylint: disable=useless-object-inheritance, too-many-instance-attributes
@@ -16,22 +100,32 @@ class BaseResponse(object):
     Base Response that take HTTP reponse and take the following attrs
     - raw         : the raw response
     - raw_content : if the value of response data shall be raw
+    - stream      : if the body of a successful response shall not be read
+                    (then use iter_content() ; data is None)
+    - lean        : release the content once data is parsed (see release),
+                    for responses kept in memory
 
     Attributes are guessed at init
     - data        : the associated data / dictionnary-like data or binary
+                    (the content is decoded on first access)
     - is_ok       : True if the request is succesfully achieved
 
     This include the following properties
     - status_code : the HTTP code
+    - content_format: 'json', 'xml' or None (from the Content-Type header)
     - raw_content_data: the data in raw.content (byte)
     - content_data: the data in raw.content as a unicode string
-    - json_data   : the data in a json dict
+    - json_data   : the data in a json dict (parsed from raw.content)
     """
 
-    def __init__(self, response, raw_content=None, success_code=None):
+    # pylint: disable=too-many-arguments
+    def __init__(self, response, raw_content=None, success_code=None, stream=False,
+                 lean=False):
         self.raw = response
         self.raw_content = raw_content
-        self.data = None
+        self.stream = stream
+        self.lean = lean
+        self._data = _NOT_COMPUTED
         self.is_ok = None
 
         self._status_code = None
@@ -41,8 +135,80 @@ class BaseResponse(object):
 
         self.success_code = success_code
 
-        self._compute_data()
+        if stream:
+            self._compute_is_ok()
+            if self.is_ok:
+                self._data = None
+                return
+            # error : the body is small and needed for the error message
+            read_raw(self.raw)
+            self.stream = False
         self._compute_is_ok()
+        # xml contents are released once parsed by Item.from_response
+        if lean and self.is_ok and self.get_xml_content() is None:
+            self._ensure_data()
+            self.release()
+
+    @property
+    def data(self):
+        """ Data of the response (computed on first access, see _compute_data) """
+        self._ensure_data()
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        if self.lean and self.is_ok:
+            self.release()
+
+    def _ensure_data(self):
+        if self._data is _NOT_COMPUTED:
+            self._data = None
+            self._compute_data()
+            if self.lean and self.is_ok:
+                self.release()
+
+    def release(self):
+        """
+        Release the raw content and its decoded copies, keeping data,
+        status code and headers (done once parsed by lean responses).
+        content_data, raw_content_data and json_data (if not the data)
+        are no longer available.
+        """
+        if self.stream or isinstance(self.raw, ReleasedRaw):
+            return
+        self._ensure_data()
+        self.raw = ReleasedRaw(self.raw)
+        if self._json_data is not self._data:
+            self._json_data = None
+        self._content_data = None
+        self._raw_content_data = None
+
+    @property
+    def content_format(self):
+        """ 'json', 'xml' or None (unknown), from the Content-Type header """
+        content_type = (self.raw.headers.get('Content-Type') or '').lower()
+        if 'json' in content_type:
+            return 'json'
+        if 'xml' in content_type:
+            return 'xml'
+        return None
+
+    def is_xml(self):
+        """ The content is a xml document (Content-Type, or xml declaration) """
+        content_format = self.content_format
+        if content_format is None:
+            return self.raw_content_data.startswith(b'<?xml')
+        return content_format == 'xml'
+
+    def get_xml_content(self):
+        """
+        Content of a xml response, to be parsed from bytes,
+        if the data of the response is its content (None otherwise)
+        """
+        if self._data is not _NOT_COMPUTED and self._data is not self._content_data:
+            return None
+        return self.raw_content_data if self.is_xml() else None
 
     @property
     def json_data(self):
@@ -90,18 +256,16 @@ class BaseResponse(object):
         self.is_ok = self.status_code in success_codes
 
     def get_json_data(self):
-        """ Return JSON version of the response """
-        data = self.get_content_data()
-        if data.startswith("<?xml"):
-            data = ParseXML.etree_to_dict(
-                ParseXML.fromstring(data)
-            )
-        else:
-            try:
-                data = self.raw.json()
-            except JSONDecodeError:
-                data = {'message': 'Unable to parse JSON response'}
-        return data
+        """ Return JSON version of the response (parsed from raw.content) """
+        content = self.raw_content_data
+        try:
+            if self.is_xml():
+                # converted while parsed (no element tree)
+                return ParseXML.iterparse_to_dict([content])
+            return ParseJSON.loads(content)
+        except (ValueError, ParseXML.ParseError):
+            # empty content, html error page…
+            return {'message': 'Unable to parse JSON response'}
 
     def get_content_data(self):
         """ Return (unicode string) content of the response """
@@ -115,9 +279,32 @@ class BaseResponse(object):
         """ Return the error message """
         return self.json_data.get('message', False)
 
+    def iter_content(self, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Iterate over the (binary) content by chunks, without keeping it in memory.
+        The connection is released once the content is consumed.
+
+        :param chunk_size: maximum size of the chunks (bytes)
+        """
+        if not self.stream:
+            content = self.raw_content_data
+            for i in range(0, len(content), chunk_size):
+                yield content[i:i + chunk_size]
+            return
+        try:
+            for chunk in iter_raw(self.raw, chunk_size):
+                if chunk:
+                    yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        """ Release the connection of a streamed response """
+        self.raw.close()
+
     def _compute_data(self):
-        if self.data is None:
-            self.data = self.content_data
+        if self._data is None:
+            self._data = self.content_data
 
     def __repr__(self):
         is_ok_str = "OK" if self.is_ok else "Failed"
@@ -132,6 +319,15 @@ class OCSResponse(BaseResponse):
     - full_data : json data of the ocs response
     """
 
+    def get_xml_content(self):
+        """ The data is parsed from the ocs content (see BaseResponse) """
+        return None
+
+    def _compute_is_ok(self):
+        # the status code is in the ocs metadata
+        self._ensure_data()
+        super(OCSResponse, self)._compute_is_ok()
+
     def _compute_data(self):
         meta = None
         data = None
@@ -149,14 +345,19 @@ class OCSResponse(BaseResponse):
                 meta = data
                 self._status_code = -1
 
-        if self.data is None:
-            self.data = data
+        if self._data is None:
+            self._data = data
 
         self._json_data = data
 
         self.full_data = full_data
         self.meta = meta
 
+    def release(self):
+        """ Release the content (see BaseResponse), full_data included """
+        super(OCSResponse, self).release()
+        self.full_data = None
+
     def get_error_message(self):
         """ Return the error message """
         return self.meta.get('message', False)
@@ -0,0 +1,247 @@
+# -*- coding: utf-8 -*-
+"""
+Retry policies : which failed requests can be replayed, and when.
+
+Usage (per client, or per wrapper class)::
+
+  >>> from nextcloud.retry import RetryPolicy, RetryBudget
+  >>> policy = RetryPolicy(max_retries=5, backoff_factor=0.5, deadline=60,
+  ...                      budget=RetryBudget(ratio=0.1))
+  >>> nxc = NextCloud(url, auth=auth, session_kwargs={'retry': policy})
+  >>> WebDAV.RETRY_POLICY = RetryPolicy(max_retries=10)
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_tz, mktime_tz
+
+import requests
+import six
+from requests.packages.urllib3.exceptions import NewConnectionError
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+# pylint: disable=useless-object-inheritance
+class RetryBudget(object):
+    """
+    Limit the retries to a ratio of the requests (thread-safe token bucket).
+    A budget can be shared by several policies / clients.
+
+    :param ratio: tokens earned per request (0.2 : 1 retry for 5 requests)
+    :param burst: maximum number of tokens (and initial number of tokens)
+    """
+
+    def __init__(self, ratio=0.2, burst=10):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = float(burst)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """ Earn tokens for a new request """
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """ Take a token for a retry. Returns False if the budget is spent """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+    """
+    Define when a request shall be retried.
+
+    Requests are automatically retried only if they are idempotent
+    (methods in IDEMPOTENT_METHODS with a body that can be sent again),
+    or if the server did not process them (connection failure, 429).
+
+    :param max_retries:    maximum number of retries per request
+    :param backoff_factor: exponential backoff base delay (seconds) :
+                           backoff_factor * 2 ** retry_number
+    :param backoff_max:    maximum delay between two attempts (seconds) ;
+                           a longer Retry-After stops retrying
+    :param jitter:         randomize delays ("full jitter") to avoid retry storms
+    :param deadline:       maximum time (seconds) from the first attempt
+    :param budget:         RetryBudget shared between requests (default no limit)
+    :param statuses:       HTTP status codes to retry
+    :param methods:        methods considered as idempotent
+    :param delays:         fixed list of delays, used instead of backoff
+                           (max_retries defaults to its length)
+    """
+    IDEMPOTENT_METHODS = frozenset([
+        'GET', 'HEAD', 'OPTIONS', 'PROPFIND', 'REPORT', 'PUT', 'DELETE'
+    ])
+    RETRY_STATUSES = frozenset([
+        423,  # Locked
+        429,  # Too Many Requests
+        502, 503, 504
+    ])
+    # statuses meaning the request was not processed
+    NOT_PROCESSED_STATUSES = frozenset([429])
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, max_retries=3, backoff_factor=0.5, backoff_max=30.0,
+                 jitter=True, deadline=None, budget=None,
+                 statuses=None, methods=None, delays=None):
+        self.delays = list(delays) if delays is not None else None
+        if max_retries is None:
+            max_retries = len(self.delays) if self.delays is not None else 0
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.deadline = deadline
+        self.budget = budget
+        self.statuses = frozenset(statuses) if statuses is not None else self.RETRY_STATUSES
+        self.methods = (frozenset(m.upper() for m in methods)
+                        if methods is not None else self.IDEMPOTENT_METHODS)
+
+    @classmethod
+    def from_delays(cls, delays):
+        """
+        Build a policy from a number of retries or a list of delays
+
+        :param delays: int (number of retries) or list of int (delays)
+        """
+        if isinstance(delays, RetryPolicy):
+            return delays
+        if isinstance(delays, int):
+            return cls(max_retries=delays, delays=[10], jitter=False)
+        return cls(max_retries=None, delays=delays or [], jitter=False)
+
+    def __repr__(self):
+        return "<RetryPolicy max_retries={} backoff_factor={} deadline={}>".format(
+            self.max_retries, self.backoff_factor, self.deadline)
+
+    def on_request(self):
+        """ Called once per request (not per attempt) """
+        if self.budget is not None:
+            self.budget.deposit()
+
+    def backoff(self, retry_number):
+        """ Delay before the retry number 'retry_number' (starting at 0) """
+        if self.delays is not None:
+            if not self.delays:
+                return 0
+            return self.delays[min(retry_number, len(self.delays) - 1)]
+        delay = min(self.backoff_max, self.backoff_factor * (2 ** retry_number))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def get_delay(self, retry_number, elapsed=0, minimum=0):
+        """
+        Return the delay before the next attempt, or None to stop retrying
+
+        :param retry_number: number of retries already done
+        :param elapsed:      time spent since the first attempt
+        :param minimum:      minimal delay required (e.g. Retry-After)
+        """
+        if retry_number >= self.max_retries:
+            return None
+        delay = max(self.backoff(retry_number), minimum)
+        if minimum > self.backoff_max:
+            return None
+        if self.deadline is not None and elapsed + delay > self.deadline:
+            return None
+        if self.budget is not None and not self.budget.withdraw():
+            return None
+        return delay
+
+    def is_replayable(self, method, data=None):
+        """ True if the request can be sent again with the same body """
+        if method.upper() not in self.methods:
+            return False
+        return is_replayable_body(data)
+
+    # pylint: disable=too-many-arguments
+    def next_delay(self, method, retry_number, elapsed=0,
+                   response=None, error=None, data=None):
+        """
+        Return the delay before retrying a request, or None to stop
+
+        :param method:       HTTP method
+        :param retry_number: number of retries already done
+        :param elapsed:      time spent since the first attempt
+        :param response:     the response received (if any)
+        :param error:        the requests exception raised (if any)
+        :param data:         the request body
+        """
+        minimum = 0
+        if error is not None:
+            if not (is_connect_error(error) or self.is_replayable(method, data)):
+                return None
+        elif response is not None:
+            status = response.status_code
+            if status not in self.statuses:
+                return None
+            if status not in self.NOT_PROCESSED_STATUSES:
+                if not self.is_replayable(method, data):
+                    return None
+            minimum = retry_after(response) or 0
+        else:
+            return None
+        return self.get_delay(retry_number, elapsed=elapsed, minimum=minimum)
+
+
+class TransportConnectError(requests.exceptions.ConnectionError):
+    """ The connection could not be established (request not sent, see nextcloud.transports) """
+
+
+# exceptions raised when a request could not be sent at all
+CONNECT_ERRORS = (requests.exceptions.ConnectTimeout, TransportConnectError)
+if httpx is not None:  # AsyncNextCloud
+    CONNECT_ERRORS += (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+def is_connect_error(error):
+    """ True if the request could not be sent at all """
+    if isinstance(error, CONNECT_ERRORS):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        reason = getattr(error.args[0], 'reason', None)
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def is_replayable_body(data):
+    """ True if data can be sent twice (seekable streams shall be rewound) """
+    if data is None or isinstance(data, (six.binary_type, six.text_type, bytearray,
+                                         dict, list, tuple)):
+        return True
+    seekable = getattr(data, 'seekable', None)
+    if seekable is not None:
+        try:
+            return seekable()
+        except (ValueError, OSError):
+            return False
+    return hasattr(data, 'seek') and hasattr(data, 'tell')
+
+
+def retry_after(response):
+    """
+    Parse Retry-After header (seconds or HTTP date)
+
+    :returns: delay in seconds or None
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(0.0, mktime_tz(date) - time.time())
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
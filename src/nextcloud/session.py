@@ -1,26 +1,86 @@
 # -*- coding: utf-8 -*-
 """ Concrete part for managing sessions and requests """
 import logging
+import threading
 import time
 import requests
+from requests.packages.urllib3.exceptions import MaxRetryError
 from .compat import encode_requests_password
 from .codes import ExternalApiCodes
 from .exceptions import (
-    NextCloudConnectionError, NextCloudLoginError
+    NextCloudConnectionError, NextCloudLoginError, NextCloudTimeoutError
 )
 from .response import BaseResponse
+from .adapters import PoolingHTTPAdapter, PoolStats
+from .retry import RetryPolicy, DEFAULT_RETRY_POLICY
+from .deadline import Deadline, as_deadline, current_deadline
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class CustomRetry(requests.packages.urllib3.util.retry.Retry):
+def _is_login_error_retriable(error):
+    return (
+        isinstance(error.obj, (requests.exceptions.ConnectionError, MaxRetryError))
+        or (
+            isinstance(error.obj, BaseResponse) and
+            error.obj.status_code not in [
+                ExternalApiCodes.NOT_AUTHORIZED,
+                ExternalApiCodes.UNAUTHORIZED
+            ])
+    )
+
+
+def _tell(data):
+    """ Position of a stream body, to rewind it before a retry """
+    try:
+        return data.tell()
+    except (AttributeError, OSError, IOError, ValueError):
+        return None
+
+
+def _seek(data, position):
+    if position is not None:
+        data.seek(position)
+
+
+# options of session_kwargs that are not requests.Session attributes
+POOL_OPTIONS = ('pool_connections', 'pool_maxsize', 'pool_block', 'max_retries')
+TRANSPORTS = ('requests', 'httpx', 'http2')
+SESSION_OPTIONS = ('on_session_login', 'login_retry', 'retry', 'transport', 'lean') + POOL_OPTIONS
+
+# delays between login checks
+# There is max 6 attempts per minute before being blacklisted.
+# Source:
+#    https://help.nextcloud.com/t/master-password-retry-policy/110610
+# Approximatelly:
+#  if you wait 20 seconds, there is 1/3 chance of success
+#  if you wait 1 minute, there is 100% chance of success
+LOGIN_RETRY_DELAYS = [20, 60, 20, 60]
 
-    def get_backoff_time(self):
-        return 20.0
 
 # pylint: disable=useless-object-inheritance
 class Session(object):
-    """ Session for requesting """
+    """
+    Session for requesting
+
+    Requests always go through a pooled requests.Session (keep-alive),
+    created at first request or at login.
+
+    session_kwargs can contain :
+    - requests.Session attributes (verify, cert, proxies, headers…)
+    - requests.request arguments : timeout (float, or tuple (connect, read) in seconds)…
+    - pool options : pool_connections (number of hosts pools), pool_maxsize
+      (connections kept per host), pool_block (wait for a free connection
+      instead of opening more than pool_maxsize), max_retries
+    - retry : a RetryPolicy (see nextcloud.retry) for the requests
+    - transport : 'requests' (default), 'http2' or 'httpx' (see nextcloud.transports) ;
+      httpx transports only use verify, cert, headers, timeout, trust_env and
+      pool_maxsize/pool_block options, and do not count pool_stats
+    - lean : release the content of the responses once parsed, keeping only
+      data, status code and headers (see BaseResponse.release)
+    - on_session_login : a function (or a client method name) checking the login
+    - login_retry : a RetryPolicy or a list of delays for the login check
+    """
 
     # pylint: disable=too-many-arguments
     def __init__(self, url=None, user=None, password=None, auth=None, session_kwargs=None):
@@ -29,9 +89,25 @@ class Session(object):
         self.user = None
         self._set_credentials(user, password, auth)
         self.url = url.rstrip('/')
-        session_kwargs = session_kwargs or {}
-        self._login_check = session_kwargs.pop('on_session_login', False)
+        session_kwargs = dict(session_kwargs or {})
+        self._login_check = session_kwargs.get('on_session_login', False)
+        self._login_retry = RetryPolicy.from_delays(
+            session_kwargs.get('login_retry', LOGIN_RETRY_DELAYS))
+        self.retry_policy = session_kwargs.get('retry', DEFAULT_RETRY_POLICY)
+        self.lean = session_kwargs.get('lean', False)
+        self._pool_kwargs = {k: session_kwargs[k] for k in POOL_OPTIONS
+                             if k in session_kwargs}
+        self._session_attrs = {k: v for k, v in session_kwargs.items()
+                               if k in requests.Session.__attrs__}
+        self._request_kwargs = {k: v for k, v in session_kwargs.items()
+                                if k not in SESSION_OPTIONS and
+                                k not in self._session_attrs}
         self._session_kwargs = session_kwargs
+        if session_kwargs.get('transport', 'requests') not in TRANSPORTS:
+            raise ValueError('Unknown transport %r (expected one of %s)'
+                             % (session_kwargs['transport'], ', '.join(TRANSPORTS)))
+        self._pool_stats = PoolStats()
+        self._lock = threading.RLock()
 
     def _set_credentials(self, user, password, auth):
         if auth:
@@ -47,37 +123,83 @@ class Session(object):
         if not self.auth and (self.user and password):
             self.auth = (self.user, encode_requests_password(password))
 
-    def request(self, method, url, **kwargs):
+    # pylint: disable=too-many-locals
+    def request(self, method, url, retry=None, deadline=None, **kwargs):
         """
-        Use 'requests' lib to apply request with current session if logged.
+        Use 'requests' lib to apply request with the pooled session.
 
         :param method (str):   the method name
         :param url (str):      the full url
+        :param retry:          RetryPolicy (default: session retry policy)
+        :param deadline:       Deadline or seconds, in addition to the one of
+                               the current context (see nextcloud.deadline)
         :param headers (dict): the headers
         :param params (dict):  requests parameters
         :param data:           data to push with the request
+        :param timeout:        float or (connect timeout, read timeout)
 
         :returns: requests.Response
         """
-        # print(locals())
-        try:
-            if self.session:
-                ret = self.session.request(method=method, url=url, **kwargs)
-            else:
-                _kwargs = self._session_kwargs
-                _kwargs.update(kwargs)
-                if not kwargs.get('auth', False):
-                    _kwargs['auth'] = self.auth
-                ret = requests.request(method, url, **_kwargs)
-                # print(ret.status_code)
-                # if ret.status_code == HTTP_CODES.unauthorized:
-                #     raise NextCloudConnectionError(
-                #         'Not authorized', url, method)
-            return ret
-        except requests.RequestException as request_error:
+        if self._request_kwargs:
+            _kwargs = dict(self._request_kwargs)
+            _kwargs.update(kwargs)
+            kwargs = _kwargs
+        deadline = Deadline.earliest(as_deadline(deadline), current_deadline())
+        timeout = kwargs.get('timeout')
+        policy = retry or self.retry_policy
+        policy.on_request()
+        data = kwargs.get('data')
+        position = _tell(data)
+        start = time.time()
+        retry_number = 0
+        while True:
+            response, error = None, None
+            if deadline is not None:
+                deadline.check(url)
+                kwargs['timeout'] = deadline.clamp_timeout(timeout)
+            try:
+                response = self.get_session().request(method=method, url=url, **kwargs)
+            except requests.RequestException as request_error:
+                error = request_error
+            delay = policy.next_delay(method, retry_number, elapsed=time.time() - start,
+                                      response=response, error=error, data=data)
+            if delay is None or (deadline is not None and delay >= deadline.remaining()):
+                break
+            _LOGGER.warning('Retry %s %s in %.1f seconds (%s)', method, url, delay,
+                            error or response.status_code)
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            _seek(data, position)
+            retry_number += 1
+        if error is not None:
+            if isinstance(error, requests.Timeout):
+                raise NextCloudTimeoutError(
+                    'Request to NextCloud timed out',
+                    getattr(error.request, 'url', None), error)
             raise NextCloudConnectionError(
                 'Failed to establish connection to NextCloud',
-                getattr(request_error.request, 'url', None), request_error)
+                getattr(error.request, 'url', None), error)
+        return response
+
+    def get_session(self):
+        """ Return the underlying requests.Session (create it if needed) """
+        session = self.session
+        if session is None:
+            with self._lock:
+                if self.session is None:
+                    self.session = self._new_session()
+                session = self.session
+        return session
+
+    @property
+    def pool_stats(self):
+        """
+        Connection pools statistics, to size pools according to workers.
+
+        :returns: dict {'opened': int, 'reused': int, 'dropped': int}
+        """
+        return self._pool_stats.as_dict()
 
     def login(self, user=None, password=None, auth=None, client=None):
         """Create a stable session on the server.
@@ -88,78 +210,71 @@ class Session(object):
         :param client: object for any auth method
         :raises: HTTPResponseError in case an HTTP error status was returned
         """
-        # To avoid deadlocks on "Resetting dropped connection"
-        adapter = requests.adapters.HTTPAdapter()
-        # adapter.max_retries = CustomRetry(status_forcelist=[ 502, 503, 504 ])
-        adapter.max_retries = requests.packages.urllib3.util.retry.Retry(
-            status_forcelist=[ 502, 503, 504 ]
-        )
-        #
-        self.session = requests.Session()
-        #
-        self.session.mount('https://', adapter)
-        #
-        for k in self._session_kwargs:
-            setattr(self.session, k, self._session_kwargs[k])
-
-        self._set_credentials(user, password, auth)
-        self.session.auth = self.auth
+        with self._lock:
+            self.logout()
+            self._set_credentials(user, password, auth)
+            self.session = self._new_session()
         if client:
             login_check_func = self._login_check
             if isinstance(login_check_func, str):
                 login_check_func = getattr(client, login_check_func)
             if self._login_check:
-                self._check_login(login_check_func, retry=[20, 60, 20, 60])
+                self._check_login(login_check_func, retry=self._login_retry)
+
+    def _new_session(self):
+        """ Build the underlying pooled requests.Session (or httpx transport) """
+        transport = self._session_kwargs.get('transport', 'requests')
+        if transport != 'requests':
+            from .transports import HTTPXTransport
+            return HTTPXTransport(self._session_kwargs, self._pool_kwargs,
+                                  auth=self.auth, http2=(transport == 'http2'))
+        # retries are done in request() according to the retry policy
+        pool_kwargs = dict(self._pool_kwargs)
+        adapter = PoolingHTTPAdapter(stats=self._pool_stats, **pool_kwargs)
+        #
+        session = requests.Session()
+        #
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        #
+        for k in self._session_attrs:
+            setattr(session, k, self._session_attrs[k])
+
+        session.auth = self.auth
+        return session
 
     def _check_login(self, check_func, retry=None):
-        # :param retry: int (number of retries) or list of int (delays)
-        # There is max 6 attempts per minute before being blacklisted.
-        # Source:
-        #    https://help.nextcloud.com/t/master-password-retry-policy/110610
-        # Approximatelly:
-        #  if you wait 20 seconds, there is 1/3 chance of success
-        #  if you wait 1 minute, there is 100% chance of success
-        def _raise(retry, error):
-            is_retriable=(
-                isinstance(error.obj, requests.exceptions.ConnectionError)
-                or
-                isinstance(error.obj, requests.exceptions.SSLError)
-                or
-                isinstance(error.obj, requests.exceptions.MaxRetryError)
-                or (
-                    isinstance(nxc_error.obj, BaseResponse) and
-                    nxc_error.obj.status_code not in [
-                        ExternalApiCodes.NOT_AUTHORIZED,
-                        ExternalApiCodes.UNAUTHORIZED
-                    ])
-            )
-            if is_retriable and retry:
-                delay = 10
-                if isinstance(retry, list):
-                    delay, retry = (retry[0], retry[1:])
-                elif isinstance(retry, int):
-                    retry -= 1
-                else:
-                    retry = False
+        """
+        Check the login, retrying according to a policy
+
+        :param check_func: function returning a response
+        :param retry: RetryPolicy, int (number of retries) or list of int (delays)
+        """
+        policy = RetryPolicy.from_delays(retry)
+        start = time.time()
+        retry_number = 0
+        while True:
+            try:
+                resp = check_func()
+                if not resp.is_ok:
+                    raise NextCloudLoginError(
+                        'Failed to login to NextCloud', self.url, resp)
+                return
+            except (NextCloudConnectionError, NextCloudLoginError) as nxc_error:
+                delay = None
+                if _is_login_error_retriable(nxc_error):
+                    delay = policy.get_delay(retry_number, elapsed=time.time() - start)
+                if delay is None:
+                    self.logout()
+                    raise
                 _LOGGER.warning('Retry session check (%s) in %s seconds',
                                 self.url, delay)
                 time.sleep(delay)
                 _LOGGER.warning('Retry session check (%s)', self.url)
-                return self._check_login(client, retry=retry)
-            self.logout()
-            raise error
-
-        try:
-            if not check_func().is_ok:
-                raise NextCloudLoginError(
-                    'Failed to login to NextCloud', self.url, resp)
-        except NextCloudConnectionError as nxc_error:
-            _raise(retry, nxc_error)
-        except NextCloudLoginError as nxc_error:
-            _raise(retry, nxc_error)
-        except Exception as any_error:
-            self.logout()
-            raise any_error
+                retry_number += 1
+            except Exception as any_error:
+                self.logout()
+                raise any_error
 
     def logout(self):
         """Log out the authenticated user and close the session.
@@ -167,7 +282,8 @@ class Session(object):
         :returns: True if the operation succeeded
         :raises: HTTPResponseError in case an HTTP error status was returned
         """
-        if self.session:
-            self.session.close()
-            self.session = None
+        with self._lock:
+            if self.session:
+                self.session.close()
+                self.session = None
         return True
@@ -0,0 +1,531 @@
+# -*- coding: utf-8 -*-
+"""
+Two-way synchronization of a local folder with a remote folder.
+
+Usage::
+
+  >>> from nextcloud.sync import SyncEngine
+  >>> engine = SyncEngine(nxc, '/home/me/Documents', 'Documents', workers=8)
+  >>> engine.plan()   # list of SyncAction, nothing done
+  >>> engine.run()    # list of SyncResult
+
+The state of the last synchronization (remote etag, file_id, last_modified,
+content_length and local mtime, size, inode of each path) is kept in a SQLite
+database (by default '.nextcloud-sync.db' in the local folder). Each run
+compares both sides to this state to find what changed, and only transfers
+changed files :
+- changed on one side : upload or download
+- moved on one side (same file_id remotely, same inode/size/mtime locally) :
+  move on the other side (then download if the remote file was also modified)
+- deleted on one side and unchanged on the other : delete
+- changed on both sides : conflict, solved according to 'conflict' :
+  'keep_both' (default) renames the local file to
+  '<name> (conflict <local mtime>)<ext>' and uploads it, then downloads the
+  remote file ; 'remote' or 'local' keeps only one version ;
+  'newer' keeps the most recently modified (remote if equal, both if the
+  remote modification time is unknown).
+"""
+import os
+import sqlite3
+from collections import namedtuple
+from datetime import datetime
+
+from .api_wrappers.webdav import WebDAV, TREE_FIELDS, _makedirs
+from .common.concurrency import iter_results
+from .common.timestamping import timestamp_from_string
+from .compat import scandir
+
+STATE_FILENAME = '.nextcloud-sync.db'
+CONFLICT_POLICIES = ('keep_both', 'remote', 'local', 'newer')
+
+# Remote entry : is_dir, etag, file_id, last_modified, content_length
+RemoteEntry = namedtuple('RemoteEntry',
+                         ['is_dir', 'etag', 'file_id', 'last_modified', 'content_length'])
+# Local entry : is_dir, mtime, size, inode
+LocalEntry = namedtuple('LocalEntry', ['is_dir', 'mtime', 'size', 'inode'])
+# Last synchronized state of a path (a RemoteEntry and a LocalEntry)
+StateEntry = namedtuple('StateEntry', ['remote', 'local'])
+
+# An operation to apply :
+# kind : 'mkdir_local', 'mkdir_remote', 'move_local', 'move_remote', 'download',
+#        'upload', 'conflict', 'delete_local', 'delete_remote', 'record', 'forget'
+# path : '/' separated path relative to the synchronized folders
+# source : for moves, the previous path
+SyncAction = namedtuple('SyncAction', ['kind', 'path', 'source'])
+# Result of an operation (error is None if success)
+SyncResult = namedtuple('SyncResult', ['action', 'error'])
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    is_dir INTEGER NOT NULL,
+    etag TEXT,
+    file_id INTEGER,
+    last_modified TEXT,
+    content_length INTEGER,
+    local_mtime INTEGER,
+    local_size INTEGER,
+    local_inode INTEGER
+)
+"""
+
+
+# pylint: disable=useless-object-inheritance
+class SyncState(object):
+    """
+    SQLite state of the last synchronization
+
+    :param path: database file path
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute(_SCHEMA)
+        self.db.commit()
+
+    def load(self):
+        """ Return {path: StateEntry} """
+        rows = self.db.execute(
+            'SELECT path, is_dir, etag, file_id, last_modified, content_length,'
+            ' local_mtime, local_size, local_inode FROM files')
+        return {
+            row[0]: StateEntry(RemoteEntry(bool(row[1]), row[2], row[3], row[4], row[5]),
+                               LocalEntry(bool(row[1]), row[6], row[7], row[8]))
+            for row in rows
+        }
+
+    def save(self, path, remote, local):
+        """ Record the synchronized state of a path """
+        self.db.execute(
+            'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (path, int(local.is_dir), remote.etag, remote.file_id, remote.last_modified,
+             remote.content_length, local.mtime, local.size, local.inode))
+
+    def forget(self, path):
+        """ Remove a path (and its content) from the state """
+        self.db.execute('DELETE FROM files WHERE path = ? OR substr(path, 1, ?) = ?',
+                        (path, len(path) + 1, path + '/'))
+
+    def commit(self):
+        """ Write changes """
+        self.db.commit()
+
+    def close(self):
+        """ Close the database """
+        self.db.close()
+
+
+def _parent(path):
+    return path.rsplit('/', 1)[0] if '/' in path else ''
+
+
+def _depth(path):
+    return path.count('/')
+
+
+def _conflict_name(path, mtime):
+    """ Name of the local copy of a file in conflict (deterministic) """
+    base, ext = os.path.splitext(path)
+    date = datetime.utcfromtimestamp(mtime or 0).strftime('%Y-%m-%d %H%M%S')
+    return '{} (conflict {}){}'.format(base, date, ext)
+
+
+class SyncEngine(object):
+    """
+    Two-way synchronization engine (see module documentation)
+
+    :param client:     NextCloud client
+    :param local_dir:  local folder
+    :param remote_path: remote folder (created if needed)
+    :param state_path: SQLite database path (default: STATE_FILENAME in local_dir)
+    :param workers:    number of concurrent requests
+    :param conflict:   conflict policy ('keep_both', 'remote', 'local' or 'newer')
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, client, local_dir, remote_path, state_path=None,
+                 workers=None, conflict='keep_both'):
+        if conflict not in CONFLICT_POLICIES:
+            raise ValueError('Unknown conflict policy %r (expected one of %s)'
+                             % (conflict, ', '.join(CONFLICT_POLICIES)))
+        self.client = client
+        self.webdav = WebDAV(client)
+        self.local_dir = os.path.abspath(local_dir)
+        self.remote_root = (remote_path or '').strip('/')
+        self.state_path = state_path or os.path.join(self.local_dir, STATE_FILENAME)
+        self.workers = workers
+        self.conflict = conflict
+        self._remote = {}
+        self._local = {}
+        self._state = {}
+
+    # paths
+
+    def local_path(self, path):
+        """ Local path of a synchronized path """
+        return os.path.join(self.local_dir, *path.split('/'))
+
+    def remote_path(self, path):
+        """ Remote path (relative to user root) of a synchronized path """
+        return '/'.join(p for p in [self.remote_root, path] if p)
+
+    # scans
+
+    def scan_remote(self):
+        """ Return {path: RemoteEntry} of the remote folder """
+        if self.remote_root:
+            self.webdav.ensure_tree_exists(self.remote_root, raise_on_error=True)
+        root = '/' + self.remote_root
+        entries = {}
+        for file_data in self.webdav.iter_tree(self.remote_root, workers=self.workers):
+            path = file_data.get_relative_path()[len(root):].strip('/')
+            entries[path] = self._remote_entry(file_data)
+        return entries
+
+    @staticmethod
+    def _remote_entry(file_data):
+        length = file_data.content_length
+        return RemoteEntry(file_data.isdir(), file_data.etag, file_data.file_id,
+                           file_data.last_modified,
+                           int(length) if length not in (None, '') else None)
+
+    def scan_local(self):
+        """ Return {path: LocalEntry} of the local folder """
+        _makedirs(self.local_dir)
+        state_files = set([self.state_path, self.state_path + '-journal'])
+        entries = {}
+
+        def _scan(folder, prefix):
+            for entry in scandir(folder):
+                if entry.path in state_files:
+                    continue
+                path = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    entries[path] = LocalEntry(True, None, None, None)
+                    _scan(entry.path, path + '/')
+                elif entry.is_file():
+                    entries[path] = self._local_entry(entry.path)
+        _scan(self.local_dir, '')
+        return entries
+
+    @staticmethod
+    def _local_entry(local_path):
+        stat = os.stat(local_path)
+        return LocalEntry(False, int(stat.st_mtime), stat.st_size, stat.st_ino)
+
+    # reconciliation
+
+    def _remote_changed(self, path):
+        return self._remote[path].etag != self._state[path].remote.etag
+
+    def _local_changed(self, path):
+        local, known = self._local[path], self._state[path].local
+        return (local.mtime, local.size) != (known.mtime, known.size)
+
+    def _same_content(self, path):
+        """ True if the local and remote files look identical (size and mtime) """
+        local, remote = self._local[path], self._remote[path]
+        return (local.size == remote.content_length and
+                local.mtime == timestamp_from_string(remote.last_modified))
+
+    def _remote_edited(self, path, old):
+        """ True if the remote file moved from old to path was also modified """
+        remote, known = self._remote[path], self._state[old].remote
+        if remote.etag and known.etag:
+            return remote.etag != known.etag
+        return (remote.content_length, remote.last_modified) != (known.content_length, known.last_modified)
+
+    def _find_moves(self):
+        """ Detect moves : {new path: old path} for remote and local moves """
+        remote_moves, local_moves = {}, {}
+        gone_remote = {s.remote.file_id: p for p, s in self._state.items()
+                       if p not in self._remote and p in self._local
+                       and not self._local[p].is_dir and s.remote.file_id is not None}
+        gone_local = {(s.local.inode, s.local.size, s.local.mtime): p
+                      for p, s in self._state.items()
+                      if p not in self._local and p in self._remote
+                      and not s.local.is_dir and not self._remote[p].is_dir}
+        for path in sorted(self._remote):
+            remote = self._remote[path]
+            old = gone_remote.get(remote.file_id)
+            if (path not in self._state and path not in self._local and not remote.is_dir
+                    and old is not None and not self._local_changed(old)):
+                remote_moves[path] = gone_remote.pop(remote.file_id)
+        for path in sorted(self._local):
+            local = self._local[path]
+            old = gone_local.get((local.inode, local.size, local.mtime))
+            if (path not in self._state and path not in self._remote and not local.is_dir
+                    and old is not None and not self._remote_changed(old)):
+                local_moves[path] = gone_local.pop((local.inode, local.size, local.mtime))
+        return remote_moves, local_moves
+
+    # pylint: disable=too-many-branches
+    def _file_action(self, path):
+        """ Action for a path which is not a move """
+        remote, local = self._remote.get(path), self._local.get(path)
+        known = path in self._state
+        if remote is not None and local is not None:
+            if remote.is_dir or local.is_dir:
+                if remote.is_dir and local.is_dir:
+                    # keep folder etags up to date
+                    return 'record' if not known or self._remote_changed(path) else None
+                return 'conflict'
+            if not known:
+                return 'record' if self._same_content(path) else 'conflict'
+            remote_changed, local_changed = self._remote_changed(path), self._local_changed(path)
+            if remote_changed and local_changed:
+                return 'record' if self._same_content(path) else 'conflict'
+            if remote_changed:
+                return 'download'
+            if local_changed:
+                return 'upload'
+            return None
+        if remote is not None:
+            if remote.is_dir:
+                return 'delete_remote' if known else 'mkdir_local'
+            if known and not self._remote_changed(path):
+                return 'delete_remote'
+            return 'download'
+        if local is not None:
+            if local.is_dir:
+                return 'delete_local' if known else 'mkdir_remote'
+            if known and not self._local_changed(path):
+                return 'delete_local'
+            return 'upload'
+        return 'forget'
+
+    def plan(self):
+        """
+        Scan both sides and compute the actions to synchronize them
+
+        :returns: list of SyncAction (in execution order)
+        """
+        self._remote = self.scan_remote()
+        self._local = self.scan_local()
+        state = SyncState(self.state_path)
+        try:
+            self._state = state.load()
+        finally:
+            state.close()
+
+        remote_moves, local_moves = self._find_moves()
+        moved = set(remote_moves.values()) | set(local_moves.values())
+        actions = [SyncAction('move_local', path, old)
+                   for path, old in sorted(remote_moves.items())]
+        actions += [SyncAction('move_remote', path, old)
+                    for path, old in sorted(local_moves.items())]
+        # a remote file moved and modified : moved, then downloaded
+        by_kind = {'download': [path for path, old in sorted(remote_moves.items())
+                                if self._remote_edited(path, old)]}
+        paths = set(self._remote) | set(self._local) | set(self._state)
+        for path in sorted(paths - moved - set(remote_moves) - set(local_moves)):
+            kind = self._file_action(path)
+            if kind is not None:
+                by_kind.setdefault(kind, []).append(path)
+
+        # a folder deleted on one side is deleted at once, unless something
+        # changed in it on the other side (then it is created again)
+        for kind, side, recreate in (('delete_local', self._local, 'mkdir_remote'),
+                                     ('delete_remote', self._remote, 'mkdir_local')):
+            deleted = set(by_kind.get(kind, [])) | moved
+            kept_dirs = set(parent for path in side if path not in deleted
+                            for parent in _parents(path))
+            for path in by_kind.get(kind, []):
+                if path in kept_dirs:
+                    by_kind.setdefault(recreate, []).append(path)
+            deleted_dirs = set(path for path in by_kind.get(kind, [])
+                               if side[path].is_dir and path not in kept_dirs)
+            by_kind[kind] = [path for path in by_kind.get(kind, [])
+                             if path not in kept_dirs and
+                             not any(p in deleted_dirs for p in _parents(path))]
+
+        for kind in ('mkdir_local', 'mkdir_remote', 'download', 'upload', 'conflict',
+                     'record', 'delete_local', 'delete_remote', 'forget'):
+            paths = by_kind.get(kind, [])
+            if kind.startswith('mkdir'):
+                paths = sorted(paths, key=lambda p: (_depth(p), p))
+            elif kind.startswith('delete'):
+                paths = sorted(paths, key=lambda p: (-_depth(p), p))
+            actions += [SyncAction(kind, path, None) for path in paths]
+        return actions
+
+    # execution
+
+    def _record(self, state, path, remote=None):
+        """ Save the current state of a path (after an action) """
+        remote = remote or self._remote[path]
+        local_path = self.local_path(path)
+        if remote.is_dir:
+            local = LocalEntry(True, None, None, None)
+        else:
+            local = self._local_entry(local_path)
+        state.save(path, remote, local)
+
+    def _fetch_remote(self, path):
+        file_data = self.webdav.get_file(self.remote_path(path), fields=TREE_FIELDS)
+        if file_data is None:
+            raise ValueError('%s not found after upload' % path)
+        self._remote[path] = self._remote_entry(file_data)
+
+    def _download(self, path):
+        local_path = self.local_path(path)
+        _makedirs(os.path.dirname(local_path))
+        # pylint: disable=protected-access
+        self.webdav._download_to_path(self.remote_path(path), local_path,
+                                      self._remote[path].last_modified)
+
+    def _upload(self, path):
+        resp = self.webdav.upload_file(self.local_path(path), self.remote_path(path))
+        if not resp.is_ok:
+            self.webdav._raise_exception(resp, path)  # pylint: disable=protected-access
+        self._fetch_remote(path)
+
+    def _conflict(self, path):
+        """ Solve a conflict according to the conflict policy """
+        remote, local = self._remote[path], self._local.get(path)
+        policy = self.conflict
+        if remote.is_dir or local.is_dir:
+            raise ValueError('%s is a folder on one side and a file on the other' % path)
+        if policy == 'newer':
+            remote_mtime = timestamp_from_string(remote.last_modified)
+            if remote_mtime is None:  # unknown : no side can be lost
+                policy = 'keep_both'
+            else:
+                policy = 'local' if local.mtime > remote_mtime else 'remote'
+        if policy == 'remote':
+            self._download(path)
+        elif policy == 'local':
+            self._upload(path)
+        else:
+            copy_path = _conflict_name(path, local.mtime)
+            os.rename(self.local_path(path), self.local_path(copy_path))
+            self._upload(copy_path)
+            self._download(path)
+
+    def _apply(self, action):
+        """ Apply an action (in a worker thread) """
+        kind, path = action.kind, action.path
+        if kind == 'mkdir_local':
+            _makedirs(self.local_path(path))
+        elif kind == 'mkdir_remote':
+            self.webdav.ensure_folder_exists(self.remote_path(path), raise_on_error=True)
+            self._fetch_remote(path)
+        elif kind == 'move_local':
+            _makedirs(os.path.dirname(self.local_path(path)))
+            os.rename(self.local_path(action.source), self.local_path(path))
+        elif kind == 'move_remote':
+            resp = self.webdav.move_path(self.remote_path(action.source),
+                                         self.remote_path(path))
+            if not resp.is_ok:
+                self.webdav._raise_exception(resp, path)  # pylint: disable=protected-access
+            self._fetch_remote(path)
+        elif kind == 'download':
+            self._download(path)
+        elif kind == 'upload':
+            self._upload(path)
+        elif kind == 'conflict':
+            self._conflict(path)
+        elif kind == 'delete_local':
+            local_path = self.local_path(path)
+            if os.path.isdir(local_path):
+                _rmtree(local_path)
+            else:
+                os.remove(local_path)
+        elif kind == 'delete_remote':
+            resp = self.webdav.delete_path(self.remote_path(path))
+            if not resp.is_ok and resp.status_code != 404:
+                self.webdav._raise_exception(resp, path)  # pylint: disable=protected-access
+
+    def _save(self, state, action):
+        """ Update the state after a successful action (in main thread) """
+        kind, path = action.kind, action.path
+        if kind in ('delete_local', 'delete_remote', 'forget'):
+            state.forget(path)
+        elif kind == 'move_local' and self._remote_edited(path, action.source):
+            # the remote version is recorded by the download which follows
+            state.forget(action.source)
+            self._record(state, path, self._state[action.source].remote)
+        elif kind in ('move_local', 'move_remote'):
+            state.forget(action.source)
+            self._record(state, path)
+        elif kind == 'conflict' and self.conflict == 'keep_both':
+            self._record(state, path)
+            copy_path = _conflict_name(path, self._local[path].mtime)
+            if copy_path in self._remote:
+                self._record(state, copy_path)
+        else:
+            self._record(state, path)
+
+    def run(self, actions=None):
+        """
+        Synchronize : apply the actions (computed by plan() if not given).
+        Actions of a same phase run concurrently ; the state is saved
+        after each successful action.
+
+        :returns: list of SyncResult
+        """
+        if actions is None:
+            actions = self.plan()
+        results = []
+        state = SyncState(self.state_path)
+        try:
+            for phase in _phases(actions):
+                failed = set(r.action.path for r in results if r.error is not None)
+                phase = [a for a in phase
+                         if not any(p in failed for p in _parents(a.path))]
+                for action, _result, error in iter_results(self._apply, phase,
+                                                           workers=self.workers):
+                    if error is None:
+                        self._save(state, action)
+                    results.append(SyncResult(action, error))
+                state.commit()
+        finally:
+            state.close()
+        return results
+
+
+def _parents(path):
+    parents = []
+    while '/' in path:
+        path = _parent(path)
+        parents.append(path)
+    return parents
+
+
+def _phases(actions):
+    """
+    Split actions in groups that can be run concurrently :
+    folder creations (one group per depth), moves, transfers, deletions.
+    """
+    groups = {}
+    for action in actions:
+        kind = action.kind
+        if kind.startswith('mkdir'):
+            key = (0, _depth(action.path))
+        elif kind.startswith('move'):
+            key = (1, 0)
+        elif kind.startswith('delete'):
+            key = (3, 0)
+        else:
+            key = (2, 0)
+        groups.setdefault(key, []).append(action)
+    return [groups[key] for key in sorted(groups)]
+
+
+def _rmtree(path):
+    for root, dirs, files in os.walk(path, topdown=False):
+        for name in files:
+            os.remove(os.path.join(root, name))
+        for name in dirs:
+            os.rmdir(os.path.join(root, name))
+    os.rmdir(path)
+
+
+def sync(client, local_dir, remote_path, **kwargs):
+    """
+    Synchronize a local folder with a remote folder (see SyncEngine)
+
+    :returns: list of SyncResult
+    """
+    return SyncEngine(client, local_dir, remote_path, **kwargs).run()
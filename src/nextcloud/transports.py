@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Alternative transports for Session, based on httpx.
+
+Select the transport with session_kwargs:
+
+  >>> nxc = NextCloud(url, auth=auth, session_kwargs={'transport': 'http2'})
+
+- 'requests' (default) : HTTP/1.1, one connection per in-flight request
+- 'http2' : HTTP/2 when the server supports it (negotiated with TLS/ALPN) ;
+  concurrent requests (e.g. from a thread pool) are multiplexed as streams
+  over a few connections
+- 'httpx' : HTTP/1.1 with httpx
+
+The transport returns httpx responses, compatible with the response classes.
+Transport errors are converted to requests exceptions, so that the Session
+and the retry policies handle them as usual.
+
+Requires ``httpx`` (``pip install nextcloud-api-wrapper[http2]``).
+"""
+import requests
+from .retry import TransportConnectError  # pylint: disable=unused-import
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+DEFAULT_POOL_MAXSIZE = 20
+
+
+def httpx_auth(auth):
+    """ Convert a requests auth to an httpx one """
+    if isinstance(auth, requests.auth.HTTPBasicAuth):
+        return (auth.username, auth.password)
+    return auth
+
+
+def httpx_timeout(timeout):
+    """ Convert a requests timeout (float or (connect, read) tuple) """
+    if isinstance(timeout, tuple):
+        return httpx.Timeout(timeout[1], connect=timeout[0])
+    return timeout
+
+
+def httpx_request_kwargs(kwargs):
+    """
+    Convert requests.request arguments to httpx.Client.request ones
+
+    :param kwargs: dict (headers, params, data, auth, timeout…)
+    :returns: dict
+    """
+    ret = {}
+    if kwargs.get('headers'):
+        ret['headers'] = kwargs['headers']
+    params = kwargs.get('params')
+    if params:
+        # requests skip None values
+        ret['params'] = {k: v for k, v in params.items() if v is not None}
+    data = kwargs.get('data')
+    if data is not None:
+        if isinstance(data, dict):
+            ret['data'] = data
+        else:
+            ret['content'] = data
+    if kwargs.get('auth'):
+        ret['auth'] = httpx_auth(kwargs['auth'])
+    if kwargs.get('timeout') is not None:
+        ret['timeout'] = httpx_timeout(kwargs['timeout'])
+    if 'allow_redirects' in kwargs:
+        ret['follow_redirects'] = kwargs['allow_redirects']
+    return ret
+
+
+def send_kwargs(request_kwargs):
+    """
+    Split httpx.Client.request arguments for build_request() and send()
+
+    :returns: (build_request kwargs, send kwargs)
+    """
+    request_kwargs = dict(request_kwargs)
+    send = {k: request_kwargs.pop(k) for k in ('auth', 'follow_redirects')
+            if k in request_kwargs}
+    return request_kwargs, send
+
+
+def httpx_client_kwargs(session_kwargs, pool_kwargs, auth=None, http2=False):
+    """
+    Arguments of httpx.Client / httpx.AsyncClient from session options
+
+    :param session_kwargs: Session session_kwargs (verify, cert, headers, timeout…)
+    :param pool_kwargs:    pool options (pool_maxsize, pool_block)
+    :param auth:           requests auth
+    :param http2:          enable HTTP/2
+    :returns: dict
+    """
+    if httpx is None:
+        raise ImportError("httpx transports require 'httpx'"
+                          " (pip install nextcloud-api-wrapper[http2])")
+    pool_maxsize = pool_kwargs.get('pool_maxsize', DEFAULT_POOL_MAXSIZE)
+    return dict(
+        auth=httpx_auth(auth),
+        verify=session_kwargs.get('verify', True),
+        cert=session_kwargs.get('cert'),
+        headers=session_kwargs.get('headers'),
+        timeout=httpx_timeout(session_kwargs.get('timeout')),
+        trust_env=session_kwargs.get('trust_env', True),
+        http2=http2,
+        limits=httpx.Limits(
+            max_keepalive_connections=pool_maxsize,
+            max_connections=(pool_maxsize if pool_kwargs.get('pool_block') else None)
+        ),
+    )
+
+
+def as_requests_error(error, url):
+    """ Convert an httpx exception to the matching requests exception """
+    if isinstance(error, httpx.ConnectTimeout):
+        cls = requests.exceptions.ConnectTimeout
+    elif isinstance(error, httpx.TimeoutException):
+        cls = requests.exceptions.ReadTimeout
+    elif isinstance(error, httpx.ConnectError):
+        cls = TransportConnectError
+    elif isinstance(error, httpx.TransportError):
+        cls = requests.exceptions.ConnectionError
+    else:
+        cls = requests.RequestException
+    return cls(error, request=requests.Request(url=url))
+
+
+# pylint: disable=useless-object-inheritance
+class HTTPXTransport(object):
+    """
+    A requests.Session-like object requesting with an httpx.Client
+
+    :param session_kwargs: Session options
+    :param pool_kwargs:    pool options (pool_maxsize, pool_block)
+    :param auth:           requests auth
+    :param http2:          enable HTTP/2
+    """
+
+    def __init__(self, session_kwargs=None, pool_kwargs=None, auth=None, http2=False):
+        self.auth = auth
+        self.http2 = http2
+        self.client = httpx.Client(**httpx_client_kwargs(
+            session_kwargs or {}, pool_kwargs or {}, auth=auth, http2=http2))
+
+    def request(self, method, url, stream=False, **kwargs):
+        """ see requests.Session.request """
+        request_kwargs = httpx_request_kwargs(kwargs)
+        try:
+            if stream:
+                build, send = send_kwargs(request_kwargs)
+                return self.client.send(
+                    self.client.build_request(method.upper(), url, **build),
+                    stream=True, **send)
+            return self.client.request(method.upper(), url, **request_kwargs)
+        except httpx.HTTPError as error:
+            raise as_requests_error(error, url)
+
+    def close(self):
+        """ Close all connections """
+        self.client.close()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+from unittest import TestCase, skipIf
+
+from .base import (
+    BaseTestCase, NEXTCLOUD_URL, NEXTCLOUD_PASSWORD, NEXTCLOUD_SSL_ENABLED
+)
+from nextcloud.aio import AsyncNextCloud, AsyncSession, httpx
+from nextcloud.api_wrappers.webdav import File
+
+
+@skipIf(httpx is None, "httpx is not installed")
+class TestAsyncNextCloud(BaseTestCase):
+
+    def setUp(self):
+        super(TestAsyncNextCloud, self).setUp()
+        self.anxc = AsyncNextCloud(NEXTCLOUD_URL, self.username, NEXTCLOUD_PASSWORD,
+                                   session_kwargs={'verify': NEXTCLOUD_SSL_ENABLED})
+
+    def run_async(self, coro):
+        async def _run():
+            async with self.anxc:
+                return await coro()
+        return asyncio.run(_run())
+
+    def test_gather_get_user(self):
+        async def _gather():
+            return await asyncio.gather(*[self.anxc.get_user(self.username) for _ in range(20)])
+        resps = self.run_async(_gather)
+        assert len(resps) == 20
+        assert all(res.is_ok for res in resps)
+        assert all(res.data['id'] == self.username for res in resps)
+
+    def test_list_folders(self):
+        async def _list():
+            return await asyncio.gather(self.anxc.list_folders(), self.anxc.get_folder())
+        res, root = self.run_async(_list)
+        assert res.is_ok
+        assert isinstance(res.data[0], File)
+        assert root.isroot()
+
+
+class FakeClient(object):  # pylint: disable=useless-object-inheritance
+
+    def __init__(self):
+        self.closed_in = None
+
+    async def aclose(self):
+        self.closed_in = asyncio.get_running_loop()
+
+
+@skipIf(httpx is None, "httpx is not installed")
+class TestAsyncSessionBind(TestCase):
+
+    def setUp(self):
+        self.session = AsyncSession(url='https://cloud.example', user='admin', password='pwd')
+
+    def test_rebind_closes_client(self):
+        previous = asyncio.new_event_loop()
+        thread = threading.Thread(target=previous.run_forever)
+        thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self.session.bind(previous), previous).result()
+            client = self.session._client = FakeClient()  # pylint: disable=protected-access
+
+            async def _rebind():
+                await self.session.bind(asyncio.get_running_loop())
+            asyncio.run(_rebind())
+            assert client.closed_in is previous
+            assert self.session._client is None  # pylint: disable=protected-access
+        finally:
+            previous.call_soon_threadsafe(previous.stop)
+            thread.join()
+            previous.close()
+
+    def test_rebind_refused_if_open_in_stopped_loop(self):
+        async def _bind():
+            await self.session.bind(asyncio.get_running_loop())
+        asyncio.run(_bind())
+        self.session._client = FakeClient()  # pylint: disable=protected-access
+        with self.assertRaises(RuntimeError):
+            asyncio.run(_bind())
+
+
+@skipIf(httpx is None, "httpx is not installed")
+class TestAsyncWrapperCalls(TestCase):
+
+    USER = {'ocs': {'meta': {'statuscode': 100, 'message': 'OK'}, 'data': {'id': 'alice'}}}
+
+    def setUp(self):
+        self.anxc = AsyncNextCloud('https://cloud.example', 'admin', 'pwd')
+        self.requests = []
+        self.pending = 0
+        self.max_pending = 0
+
+        async def arequest(method, url, **kwargs):  # pylint: disable=unused-argument
+            self.requests.append(url)
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+            await asyncio.sleep(0.01)
+            self.pending -= 1
+            return httpx.Response(200, json=self.USER, request=httpx.Request(method, url))
+        self.anxc.session.arequest = arequest
+
+    def run_async(self, coro):
+        async def _run():
+            try:
+                return await coro()
+            finally:
+                await self.anxc.close()
+        return asyncio.run(_run())
+
+    def test_single_request_calls_in_loop(self):
+        async def _gather():
+            return await asyncio.gather(*[self.anxc.get_user('alice') for _ in range(200)])
+        resps = self.run_async(_gather)
+        assert all(res.data['id'] == 'alice' for res in resps)
+        # one request per call, all of them at once, without worker threads
+        assert len(self.requests) == 200
+        assert self.max_pending == 200
+        assert self.anxc._executor is None  # pylint: disable=protected-access
+
+    def test_several_requests_call_in_thread(self):
+        session = self.anxc.session
+        loop_thread = threading.get_ident()
+
+        def _two_requests():
+            first = session.request('get', 'https://cloud.example/first')
+            second = session.request('get', 'https://cloud.example/second')
+            return first, second, threading.get_ident()
+
+        async def _call():
+            return await self.anxc._run(_two_requests)  # pylint: disable=protected-access
+        first, second, thread = self.run_async(_call)
+        assert thread != loop_thread
+        # the response of the first request is not requested again
+        assert self.requests == ['https://cloud.example/first', 'https://cloud.example/second']
+        assert first.json() == second.json() == self.USER
+
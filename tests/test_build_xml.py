@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+from nextcloud.api_wrappers.webdav import File
+from nextcloud.common.build_xml import build_propfind_datas, build_propupdate_datas
+
+
+class TestBuildXML(TestCase):
+
+    def test_propfind_values(self):
+        for _ in range(2):  # built, then memoized
+            data = build_propfind_datas(instr='oc:filter-files', fields={'oc': ['fileid']},
+                                        filter_rules={'oc': {'favorite': 1, 'systemtag': u'é<&>'}})
+            assert data == (
+                b'<oc:filter-files xmlns:d="DAV:" xmlns:oc="http://owncloud.org/ns"'
+                b' xmlns:nc="http://nextcloud.org/ns"><d:prop><oc:fileid /></d:prop>'
+                b'<oc:filter-rules><oc:favorite>1</oc:favorite>'
+                b'<oc:systemtag>&#233;&lt;&amp;&gt;</oc:systemtag></oc:filter-rules></oc:filter-files>')
+        # only the values change
+        data = build_propfind_datas(instr='oc:filter-files', fields={'oc': ['fileid']},
+                                    filter_rules={'oc': {'favorite': 0, 'systemtag': 'a'}})
+        assert b'<oc:favorite>0</oc:favorite><oc:systemtag>a</oc:systemtag>' in data
+        # no value
+        assert b'<oc:favorite />' in build_propfind_datas(filter_rules={'oc': {'favorite': None}})
+        with self.assertRaises(TypeError):
+            build_propfind_datas(filter_rules={'oc': {'favorite': 1.5}})
+
+    def test_propupdate(self):
+        for favorite in [1, 0]:
+            assert build_propupdate_datas({'oc': {'favorite': favorite}}).endswith(
+                b'<d:set><d:prop><oc:favorite>%d</oc:favorite></d:prop></d:set></d:propertyupdate>'
+                % favorite)
+
+    def test_model_bodies(self):
+        data = File.build_xml_propfind(fields=['file_id', 'etag'])
+        assert data is File.build_xml_propfind(fields=['file_id', 'etag'])
+        assert data.endswith(b'<d:prop><d:getetag /><oc:fileid /></d:prop></d:propfind>')
+        assert File.build_xml_propfind(use_default=True) != File.build_xml_propfind()
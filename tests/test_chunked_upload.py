@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+from unittest import TestCase
+
+from .base import BaseTestCase, LocalNxcUserMixin
+from nextcloud.api_wrappers.chunked_upload import ChunkedUpload, _fileobj_reader, content_fingerprint
+from nextcloud.common.timestamping import timestamp_from_string
+
+
+def _reader(content):
+    return lambda offset, length: content[offset:offset + length]
+
+
+class TestChunkedUpload(LocalNxcUserMixin, BaseTestCase):
+
+    CHUNK_SIZE = 5 * 1024 * 1024
+
+    def test_upload_file_chunked(self):
+        file_name = 'test_file_chunked'
+        file_content = os.urandom(2 * self.CHUNK_SIZE + 7)
+        timestamp = 1500000000
+        res = self.nxc_local.upload_file_chunked(
+            io.BytesIO(file_content), file_name, timestamp=timestamp,
+            chunk_size=self.CHUNK_SIZE, workers=2)
+        assert res.is_ok
+        assert b''.join(self.nxc_local.iter_file_content(file_name)) == file_content
+        _file = self.nxc_local.get_file(file_name)
+        assert timestamp_from_string(_file.last_modified) == timestamp
+        self.nxc_local.delete_path(file_name)
+
+    def test_resume_upload(self):
+        file_name = 'test_file_chunked_resumed'
+        file_content = os.urandom(2 * self.CHUNK_SIZE + 7)
+        upload_id = self.nxc_local.get_upload_id(
+            file_name, len(file_content), 1500000000, self.CHUNK_SIZE,
+            fingerprint=content_fingerprint(_reader(file_content), len(file_content),
+                                            self.CHUNK_SIZE))
+        # first chunk uploaded by an interrupted upload
+        wrapper = self.nxc_local.list_upload_chunks.__self__
+        assert wrapper.requester.make_collection(wrapper._get_path(upload_id)).is_ok
+        assert wrapper.requester.put(wrapper._get_path(upload_id, '00001'),
+                                     data=file_content[:self.CHUNK_SIZE]).is_ok
+        assert len(self.nxc_local.list_upload_chunks(upload_id).data) == 1
+
+        res = self.nxc_local.upload_file_chunked(
+            io.BytesIO(file_content), file_name, timestamp=1500000000,
+            chunk_size=self.CHUNK_SIZE)
+        assert res.is_ok
+        assert b''.join(self.nxc_local.iter_file_content(file_name)) == file_content
+        assert not self.nxc_local.list_upload_chunks(upload_id).is_ok
+        self.nxc_local.delete_path(file_name)
+
+
+class TestUploadId(TestCase):
+
+    class Client(object):  # pylint: disable=useless-object-inheritance,too-few-public-methods
+        user = 'admin'
+
+    def test_upload_id(self):
+        wrapper = ChunkedUpload(self.Client())
+        content = b'a' * 10 + b'b' * 10 + b'c' * 5
+        fingerprint = content_fingerprint(_reader(content), len(content), 10)
+        upload_id = wrapper.get_upload_id('file', len(content), 1500000000, 10, fingerprint)
+        assert upload_id == wrapper.get_upload_id('file', len(content), 1500000000, 10, fingerprint)
+        # another content of the same size : other chunks
+        changed = content[:-1] + b'd'
+        assert content_fingerprint(_reader(changed), len(changed), 10) != fingerprint
+        assert content_fingerprint(_reader(b''), 0, 10) == content_fingerprint(_reader(b''), 0, 10)
+        # no timestamp : never resumed
+        assert wrapper.get_upload_id('file', len(content), None, 10, fingerprint) != \
+            wrapper.get_upload_id('file', len(content), None, 10, fingerprint)
+
+    def test_fileobj_reader(self):
+        fileobj = io.BytesIO(b'headercontent')
+        fileobj.seek(6)
+        read_chunk = _fileobj_reader(fileobj, fileobj.tell())
+        assert read_chunk(0, 4) == b'cont'
+        assert read_chunk(4, 10) == b'ent'
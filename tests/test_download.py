@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from nextcloud.api_wrappers.webdav import WebDAV, _tree_local_path
+
+
+def _content(broken):
+    def iter_file_content(path, chunk_size=None):  # pylint: disable=unused-argument
+        yield b'new'
+        if broken:
+            raise IOError('Connection reset')
+        yield b' content'
+    return iter_file_content
+
+
+class TestDownloadToPath(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.target = os.path.join(self.directory, 'file.txt')
+        with open(self.target, 'wb') as f:
+            f.write(b'old')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_broken_download_keeps_target(self):
+        webdav = WebDAV()
+        webdav.iter_file_content = _content(broken=True)
+        with self.assertRaises(IOError):
+            webdav._download_to_path('file.txt', self.target, None)  # pylint: disable=protected-access
+        with open(self.target, 'rb') as f:
+            assert f.read() == b'old'
+        assert os.listdir(self.directory) == ['file.txt']
+
+    def test_download_replaces_target(self):
+        webdav = WebDAV()
+        webdav.iter_file_content = _content(broken=False)
+        webdav._download_to_path('file.txt', self.target,  # pylint: disable=protected-access
+                                 'Mon, 20 Jan 2020 20:41:00 GMT')
+        with open(self.target, 'rb') as f:
+            assert f.read() == b'new content'
+        assert os.stat(self.target).st_mtime == 1579552860
+        assert os.listdir(self.directory) == ['file.txt']
+
+
+class TestTreeLocalPath(TestCase):
+
+    def test_inside_local_dir(self):
+        local_dir = os.path.join('local', 'dir')
+        assert _tree_local_path(local_dir, '/folder', '/folder') == local_dir
+        assert _tree_local_path(local_dir, '/folder', '/folder/sub/file.txt') == \
+            os.path.join(local_dir, 'sub', 'file.txt')
+        assert _tree_local_path(local_dir, '/', '/folder/file.txt') == \
+            os.path.join(local_dir, 'folder', 'file.txt')
+
+    def test_outside_local_dir(self):
+        local_dir = os.path.join('local', 'dir')
+        for path in ['/folder/../file.txt', '/folder/sub/../../file.txt', '/folder/./file.txt',
+                     '/folder/sub//file.txt', '/other/file.txt', '/folder2/file.txt',
+                     '/folder/sub' + os.sep + '..' + os.sep + '..' + os.sep + 'file.txt']:
+            assert _tree_local_path(local_dir, '/folder', path) is None, path
+
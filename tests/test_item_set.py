@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import xml.etree.ElementTree as ET
+from unittest import TestCase
+
+from nextcloud.api.item_set import ItemSet
+from nextcloud.api_wrappers.webdav import File
+
+from .test_model import RESPONSE
+
+
+def _file(file_id, etag=None):
+    file_data = File(xml_data=ET.fromstring(RESPONSE))
+    file_data.file_id, file_data.etag = file_id, etag
+    return file_data
+
+
+class TestItemSet(TestCase):
+
+    def test_single_item(self):
+        files = ItemSet(File, [_file(1)])
+        assert isinstance(files, list)
+        assert files.file_id == 1
+        assert files.isdir()
+        assert ItemSet(File, []).file_id is None
+        assert ItemSet(File, [_file(1), _file(2)]).file_id is None
+        with self.assertRaises(AttributeError):
+            files.unknown  # pylint: disable=pointless-statement
+
+    def test_list_operations(self):
+        files = ItemSet(File, [_file(3, 'b'), _file(1), _file(2, 'a')])
+        assert [f.file_id for f in files[1:]] == [1, 2]
+        assert isinstance(files + [_file(4)], ItemSet)
+        assert isinstance(files.copy(), ItemSet)
+        files.sort_by('file_id')
+        assert [f.file_id for f in files] == [1, 2, 3]
+        files.sort_by('etag')  # None last
+        assert [f.file_id for f in files] == [2, 3, 1]
+        files.sort_by('etag', 'file_id', reverse=True)
+        assert [f.file_id for f in files] == [1, 3, 2]
+        assert files.index_by('file_id')[3] is files[1]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import io
+import xml.etree.ElementTree as ET
+from unittest import TestCase
+
+from nextcloud.api.column_set import ColumnSet, MISSING, pyarrow, write_csv
+from nextcloud.common.parse_xml import iter_elements
+from nextcloud.api_wrappers.webdav import File
+from nextcloud.api_wrappers.systemtags import Tag
+
+RESPONSE = (
+    '<d:response xmlns:d="DAV:" xmlns:oc="http://owncloud.org/ns"'
+    ' xmlns:x="urn:other">'
+    '<d:href>/remote.php/dav/files/admin/a%20folder/</d:href>'
+    '<d:propstat><d:prop>'
+    '<d:getetag>"etag"</d:getetag>'
+    '<d:resourcetype><d:collection/></d:resourcetype>'
+    '<oc:fileid>42</oc:fileid>'
+    '<x:favorite>1</x:favorite>'
+    '<oc:unknown>?</oc:unknown>'
+    '</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat>'
+    '<d:propstat><d:prop><oc:size>12</oc:size></d:prop>'
+    '<d:status>HTTP/1.1 404 Not Found</d:status></d:propstat>'
+    '</d:response>'
+)
+
+
+class TestModelParsing(TestCase):
+
+    def test_parse_xml(self):
+        file_data = File(xml_data=ET.fromstring(RESPONSE))
+        assert file_data.href == '/remote.php/dav/files/admin/a folder/'
+        assert file_data.etag == '"etag"'
+        assert file_data.resource_type == 'collection'
+        assert file_data.file_id == 42
+        # matched by name whatever the namespace
+        assert file_data.favorite == '1'
+        # not found properties
+        assert file_data.size is None
+        assert file_data.content_length is None
+        assert not hasattr(file_data, 'unknown')
+
+    def test_parse_json(self):
+        tag = Tag(json_data={'id': '3', 'name': 'tag', 'userVisible': False, 'other': 1})
+        assert tag.id == 3
+        assert tag.display_name == 'tag'
+        assert tag.user_visible is False
+        assert tag.can_assign is None
+        assert not hasattr(tag, 'other')
+
+    def test_lazy(self):
+        eager = File(xml_data=ET.fromstring(RESPONSE))
+        lazy = File(xml_data=ET.fromstring(RESPONSE), lazy=True)
+        assert 'file_id' not in lazy.__dict__
+        assert lazy.file_id == 42
+        assert lazy.__dict__['file_id'] == 42
+        assert lazy.size is None
+        assert lazy.as_dict() == eager.as_dict()
+        # the response element is cleared once parsed by iter_elements
+        data = ('<d:multistatus xmlns:d="DAV:">' + RESPONSE + '</d:multistatus>').encode()
+        files = [File(xml_data=element, lazy=True)
+                 for element in iter_elements([data], '{DAV:}response')]
+        assert files[0].as_dict() == eager.as_dict()
+        tag = Tag(json_data={'id': '3', 'name': 'tag'}, lazy=True)
+        assert tag.id == 3
+        assert tag.display_name == 'tag'
+
+    def test_compact(self):
+        eager = File(xml_data=ET.fromstring(RESPONSE))
+        build = File._item_builder(compact=True)
+        compact, other = [build(xml_data=ET.fromstring(RESPONSE)) for _ in range(2)]
+        assert not hasattr(compact, '__dict__')
+        assert compact.as_dict() == eager.as_dict()
+        assert compact.href == eager.href
+        assert compact.isdir() and not compact.isfile()
+        # repeated values are shared
+        assert compact.resource_type is other.resource_type
+        assert compact._href_folder is other._href_folder
+
+    def test_compact_class_caches(self):
+        class CachedFile(File):  # pylint: disable=too-few-public-methods
+            """ a model whose caches are filled before its compact class is built """
+        CachedFile.build_xml_propfind(fields=['file_id'])
+        CachedFile.build_xml_propfind()
+        compact_attrs = vars(CachedFile.compact_class())
+        for cache in ['_xml_parsers', '_xml_parsers_by_name', '_json_parsers', '_empty_values',
+                      '_empty_raw_values', '_propfind_fields', '_propfind_bodies']:
+            assert cache in vars(CachedFile)
+            assert cache not in compact_attrs
+
+    def test_columns(self):
+        columns = ColumnSet.from_elements(File, [ET.fromstring(RESPONSE)] * 2)
+        assert len(columns) == 2
+        assert columns['href'] == ['/remote.php/dav/files/admin/a folder/'] * 2
+        assert list(columns['file_id']) == [42, 42]
+        assert list(columns['size']) == [MISSING, MISSING]
+        assert columns.missing('last_modified') == [0, 1]
+        assert list(columns.rows())[0] == (
+            '/remote.php/dav/files/admin/a folder/', 42, None, None, None, '"etag"')
+        output = io.StringIO()
+        assert write_csv([columns], output) == 2
+        assert output.getvalue().splitlines()[0] == 'href,file_id,size,content_length,last_modified,etag'
+        if pyarrow is None:
+            self.skipTest('pyarrow not installed')
+        table = columns.to_arrow()
+        assert table.column('file_id').to_pylist() == [42, 42]
+        assert table.column('size').null_count == 2
+        assert table.column('href').to_pylist() == columns['href']
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import xml.etree.ElementTree as ET
+from unittest import TestCase
+
+from nextcloud.common.parse_xml import etree_to_dict, iterparse_to_dict
+
+GROUP_FOLDER = (
+    b'<?xml version="1.0"?><ocs><meta><status>ok</status><statuscode>100</statuscode>'
+    b'<message/></meta><data><id>3</id><mount_point>shared</mount_point>'
+    b'<groups><element group_id="admin" permissions="31"/><element group_id="staff" permissions="1"/>'
+    b'</groups><quota>-3</quota><acl>0</acl>'
+    b'<manage><element><type>user</type><id>bob</id></element></manage></data></ocs>'
+)
+GROUP_FOLDERS = (
+    b'<?xml version="1.0"?><ocs><meta><statuscode>100</statuscode></meta><data>'
+    b'<element><id>1</id><groups><element group_id="admin" permissions="31"/></groups></element>'
+    b'<element><id>2</id><groups/></element></data></ocs>'
+)
+
+
+class TestEtreeToDict(TestCase):
+
+    def assert_converted(self, content, expected):
+        assert etree_to_dict(ET.fromstring(content)) == expected
+        # by chunks, cut anywhere
+        assert iterparse_to_dict(content[i:i + 7] for i in range(0, len(content), 7)) == expected
+
+    def test_group_folder(self):
+        self.assert_converted(GROUP_FOLDER, {'ocs': {
+            'meta': {'status': 'ok', 'statuscode': '100', 'message': []},
+            'data': {'id': '3', 'mount_point': 'shared', 'groups': {'admin': 31, 'staff': 1},
+                     'quota': '-3', 'acl': '0', 'manage': {'bob': {'type': 'user'}}}}})
+
+    def test_group_folders(self):
+        self.assert_converted(GROUP_FOLDERS, {'ocs': {
+            'meta': {'statuscode': '100'},
+            'data': {'1': {'groups': {'admin': {'permissions': '31'}}},
+                     '2': {'groups': []}}}})
+
+    def test_data(self):
+        for text, value in [(b'', False), (b'0', False), (b'1', True), (b'ok', 'ok')]:
+            self.assert_converted(b'<ocs><data>' + text + b'</data></ocs>', {'ocs': {'data': value}})
+        self.assert_converted(b'<ocs><data><element>a</element><element>b</element></data></ocs>',
+                              {'ocs': {'data': {'element': {}}}})
+        self.assert_converted(b'<ocs><users><element><element>a</element></element></users></ocs>',
+                              {'ocs': {'users': {'element': {'element': {}}}}})
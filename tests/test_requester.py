@@ -4,6 +4,7 @@ from unittest import TestCase
 from .base import BaseTestCase
 from nextcloud.base import BaseApiWrapper
 from nextcloud.session import NextCloudConnectionError
+from nextcloud.exceptions import NextCloudTimeoutError
 
 class DummyWrapper(BaseApiWrapper):
     API_URL = '/wrong'
@@ -25,3 +26,38 @@ class TestRequester(BaseTestCase):
             assert wrong_url in str(e)
         assert exception_raised
 
+    def test_pooled_without_login(self):
+        self.nxc.logout()
+        nxc = self.nxc.with_attr(session_kwargs={'pool_maxsize': 2, 'pool_block': True})
+        for _ in range(3):
+            assert nxc.get_user(self.username).is_ok
+        stats = nxc.session.pool_stats
+        assert stats['opened'] == 1
+        assert stats['reused'] == 2
+        assert nxc.session.session.get_adapter(nxc.url).poolmanager.connection_pool_kw['maxsize'] == 2
+
+    def test_httpx_transports(self):
+        try:
+            import httpx  # noqa
+        except ImportError:
+            self.skipTest('httpx is not installed')
+        for transport in ('httpx', 'http2'):
+            nxc = self.nxc.with_attr(session_kwargs={'transport': transport})
+            assert nxc.get_user(self.username).is_ok
+            assert nxc.list_folders('', depth=0).is_ok
+            nxc.logout()
+
+    def test_deadline(self):
+        with self.nxc.deadline(60) as deadline:
+            assert self.nxc.get_user(self.username).is_ok
+            assert 0 < deadline.remaining() < 60
+            # nested deadline only shortens the current one
+            with self.nxc.deadline(0) as short_deadline:
+                assert short_deadline.expired()
+                exception_raised = False
+                try:
+                    self.nxc.get_user(self.username)
+                except NextCloudTimeoutError:
+                    exception_raised = True
+                assert exception_raised
+            assert self.nxc.list_folders().is_ok
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from unittest import TestCase
+
+import requests
+
+from nextcloud.api_wrappers.webdav import File
+from nextcloud.codes import ProvisioningCode, WebDAVCode
+from nextcloud.common import parse_json
+from nextcloud.response import ProvisioningApiResponse, WebDAVResponse
+
+from .test_model import RESPONSE
+
+MULTISTATUS = '<d:multistatus xmlns:d="DAV:">' + RESPONSE + '</d:multistatus>'
+
+
+def raw_response(status_code, content, content_type=None):
+    raw = requests.Response()
+    raw.status_code = status_code
+    if content_type:
+        raw.headers['Content-Type'] = content_type
+    raw._content = content  # pylint: disable=protected-access
+    return raw
+
+
+class TestResponse(TestCase):
+
+    def test_ocs_json(self):
+        raw = raw_response(200, b'{"ocs": {"meta": {"statuscode": 100, "message": "OK"},'
+                                b' "data": {"users": ["admin"]}}}', 'application/json')
+        resp = ProvisioningApiResponse(raw, success_code=ProvisioningCode.SUCCESS)
+        assert resp.content_format == 'json'
+        assert resp.is_ok
+        assert resp.data == {'users': ['admin']}
+        assert resp.get_xml_content() is None
+
+    def test_webdav_xml(self):
+        for content, content_type in [(MULTISTATUS.encode(), 'application/xml; charset=utf-8'),
+                                      (('<?xml version="1.0"?>' + MULTISTATUS).encode(), None)]:
+            resp = WebDAVResponse(raw_response(207, content, content_type),
+                                  success_code=WebDAVCode.MULTISTATUS)
+            assert resp.is_xml()
+            # the data is parsed from bytes, the content is not decoded
+            files = File.from_response(resp).data
+            assert resp.get_xml_content() is None
+            assert files[0].file_id == 42
+        resp = WebDAVResponse(raw_response(201, b'', 'text/html'), success_code=201)
+        assert not resp.is_xml()
+        assert resp.data == ''
+
+    def test_json_backend(self):
+        assert parse_json.loads(b'{"a": [1, 2]}') == {'a': [1, 2]}
+        assert parse_json.loads(b'{"quota": 9223372036854775807}') == {'quota': 2 ** 63 - 1}
+        assert parse_json.loads(u'{"a": NaN}'.encode('utf-16'))['a'] != 0
+        with self.assertRaises(ValueError):
+            parse_json.loads(b'<html>')
+
+    def test_lean(self):
+        raw = raw_response(200, b'{"ocs": {"meta": {"statuscode": 100, "message": "OK"},'
+                                b' "data": {"users": ["admin"]}}}', 'application/json')
+        raw.request = requests.Request('GET', 'https://cloud.example/ocs').prepare()
+        resp = ProvisioningApiResponse(raw, success_code=ProvisioningCode.SUCCESS, lean=True)
+        assert resp.data == {'users': ['admin']}
+        assert resp.full_data is None
+        assert resp.raw.request.method == 'GET'
+        assert resp.raw.headers['Content-Type'] == 'application/json'
+        with self.assertRaises(ValueError):
+            resp.content_data  # pylint: disable=pointless-statement
+
+        raw = raw_response(207, MULTISTATUS.encode(), 'application/xml')
+        raw.request = requests.Request('PROPFIND', 'https://cloud.example/dav').prepare()
+        resp = WebDAVResponse(raw, success_code=WebDAVCode.MULTISTATUS, lean=True)
+        # released once parsed
+        assert resp.raw is raw
+        files = File.from_response(resp).data
+        assert resp.raw is not raw and resp.status_code == 207
+        assert files[0].file_id == 42
+
+        # failed responses keep their content for the error message
+        raw = raw_response(404, b'{"message": "Not found"}', 'application/json')
+        resp = WebDAVResponse(raw, success_code=WebDAVCode.MULTISTATUS, lean=True)
+        assert resp.get_error_message() == 'Not found'
+
+    def test_invalid_xml(self):
+        for content in [b'', b'<html><body>Internal Server Error']:
+            resp = WebDAVResponse(raw_response(500, content, 'application/xml; charset=utf-8'),
+                                  success_code=WebDAVCode.MULTISTATUS)
+            assert resp.json_data == {'message': 'Unable to parse JSON response'}
+            assert resp.get_error_message() == 'Unable to parse JSON response'
+            resp = ProvisioningApiResponse(raw_response(500, content, 'text/xml'),
+                                           success_code=ProvisioningCode.SUCCESS)
+            assert not resp.is_ok
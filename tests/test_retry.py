@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import io
+from unittest import TestCase
+
+import requests
+
+from nextcloud import retry
+from nextcloud.retry import RetryPolicy, RetryBudget, TransportConnectError, is_connect_error
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class TestRetryPolicy(TestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=3, backoff_factor=1, jitter=False)
+
+    def test_idempotent_methods_only(self):
+        resp = FakeResponse(503)
+        assert self.policy.next_delay('GET', 0, response=resp) == 1
+        assert self.policy.next_delay('PROPFIND', 1, response=resp) == 2
+        assert self.policy.next_delay('POST', 0, response=resp) is None
+        assert self.policy.next_delay('MKCOL', 0, response=resp) is None
+        assert self.policy.next_delay('GET', 3, response=resp) is None
+        assert self.policy.next_delay('GET', 0, response=FakeResponse(500)) is None
+
+    def test_put_body(self):
+        resp = FakeResponse(423)
+        assert self.policy.next_delay('PUT', 0, response=resp, data=b'content') == 1
+        assert self.policy.next_delay('PUT', 0, response=resp, data=io.BytesIO(b'c')) == 1
+        assert self.policy.next_delay('PUT', 0, response=resp,
+                                      data=(b'c' for _ in range(2))) is None
+
+    def test_retry_after(self):
+        resp = FakeResponse(429, {'Retry-After': '5'})
+        assert self.policy.next_delay('POST', 0, response=resp) == 5
+        resp = FakeResponse(503, {'Retry-After': '120'})
+        assert self.policy.next_delay('GET', 0, response=resp) is None
+
+    def test_deadline_and_budget(self):
+        policy = RetryPolicy(max_retries=10, backoff_factor=1, jitter=False, deadline=5,
+                             budget=RetryBudget(ratio=0.5, burst=2))
+        resp = FakeResponse(502)
+        assert policy.next_delay('GET', 2, elapsed=0, response=resp) == 4
+        assert policy.next_delay('GET', 2, elapsed=2, response=resp) is None
+        assert policy.next_delay('GET', 0, response=resp) == 1
+        assert policy.next_delay('GET', 0, response=resp) is None
+        policy.on_request()
+        policy.on_request()
+        assert policy.next_delay('GET', 0, response=resp) == 1
+
+    def test_jitter(self):
+        policy = RetryPolicy(backoff_factor=1, backoff_max=3)
+        delays = [policy.backoff(5) for _ in range(50)]
+        assert all(0 <= delay <= 3 for delay in delays)
+
+    def test_from_delays(self):
+        policy = RetryPolicy.from_delays([20, 60])
+        assert policy.get_delay(0) == 20
+        assert policy.get_delay(1) == 60
+        assert policy.get_delay(2) is None
+
+    def test_connect_errors(self):
+        # POST not sent : retried
+        assert self.policy.next_delay('POST', 0, error=TransportConnectError()) == 1
+        assert is_connect_error(requests.exceptions.ConnectTimeout())
+        assert not is_connect_error(requests.exceptions.ReadTimeout())
+        # not changed by the optional modules
+        connect_errors = retry.CONNECT_ERRORS
+        from nextcloud import transports  # pylint: disable=unused-import,import-outside-toplevel
+        assert retry.CONNECT_ERRORS is connect_errors
+        assert transports.TransportConnectError is TransportConnectError
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from .base import BaseTestCase, LocalNxcUserMixin
+from nextcloud.sync import LocalEntry, RemoteEntry, SyncAction, SyncEngine, SyncState
+
+
+class TestSync(LocalNxcUserMixin, BaseTestCase):
+
+    def setUp(self):
+        super(TestSync, self).setUp()
+        self.local_dir = tempfile.mkdtemp()
+        self.engine = SyncEngine(self.nxc_local, self.local_dir, 'synced', workers=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.local_dir)
+        self.nxc_local.delete_path('synced')
+        super(TestSync, self).tearDown()
+
+    def _write(self, path, content):
+        with open(os.path.join(self.local_dir, path), 'wb') as f:
+            f.write(content)
+
+    def _kinds(self, results):
+        assert all(r.error is None for r in results)
+        return sorted((r.action.kind, r.action.path) for r in results
+                      if r.action.kind != 'record')
+
+    def test_sync(self):
+        self._write('local', b'local')
+        self.nxc_local.ensure_tree_exists('synced/folder')
+        self.nxc_local.upload_file_contents(b'remote', 'synced/folder/remote')
+        assert self._kinds(self.engine.run()) == [
+            ('download', 'folder/remote'), ('mkdir_local', 'folder'), ('upload', 'local')]
+        with open(os.path.join(self.local_dir, 'folder', 'remote'), 'rb') as f:
+            assert f.read() == b'remote'
+        assert b''.join(self.nxc_local.iter_file_content('synced/local')) == b'local'
+        # nothing changed
+        assert self.engine.plan() == []
+
+        # move on one side, delete on the other
+        os.rename(os.path.join(self.local_dir, 'local'), os.path.join(self.local_dir, 'moved'))
+        self.nxc_local.delete_path('synced/folder')
+        assert self._kinds(self.engine.run()) == [
+            ('delete_local', 'folder'), ('move_remote', 'moved')]
+        assert not os.path.exists(os.path.join(self.local_dir, 'folder'))
+        assert self.nxc_local.get_file('synced/moved') is not None
+        assert self.nxc_local.get_file('synced/local') is None
+
+    def test_sync_conflict(self):
+        self._write('file', b'v1')
+        self.engine.run()
+        self._write('file', b'local v2')
+        self.nxc_local.upload_file_contents(b'remote v2', 'synced/file')
+        assert [kind for kind, _ in self._kinds(self.engine.run())] == ['conflict']
+        names = sorted(os.listdir(self.local_dir))
+        assert names[:2] == ['.nextcloud-sync.db', 'file']
+        conflict_copy = names[2]
+        assert conflict_copy.startswith('file (conflict ')
+        with open(os.path.join(self.local_dir, 'file'), 'rb') as f:
+            assert f.read() == b'remote v2'
+        assert b''.join(self.nxc_local.iter_file_content(
+            'synced/' + conflict_copy)) == b'local v2'
+        assert self.engine.plan() == []
+
+
+class TestConflictPolicy(TestCase):
+
+    def setUp(self):
+        self.local_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.local_dir, 'file'), 'wb') as f:
+            f.write(b'local')
+        self.engine = SyncEngine(None, self.local_dir, 'synced', conflict='newer')
+        self.transfers = []
+        self.engine._download = lambda path: self.transfers.append(('download', path))
+        self.engine._upload = lambda path: self.transfers.append(('upload', path))
+
+    def tearDown(self):
+        shutil.rmtree(self.local_dir)
+
+    def _conflict(self, last_modified):
+        # pylint: disable=protected-access
+        self.engine._remote['file'] = RemoteEntry(False, 'etag', 1, last_modified, 6)
+        self.engine._local['file'] = LocalEntry(False, 1500000000, 5, 1)
+        self.engine._conflict('file')
+        return self.transfers
+
+    def test_newer(self):
+        assert self._conflict('Mon, 20 Jan 2020 20:41:00 GMT') == [('download', 'file')]
+
+    def test_older(self):
+        assert self._conflict('Sun, 20 Jan 2002 20:41:00 GMT') == [('upload', 'file')]
+
+    def test_unknown_remote_mtime(self):
+        for last_modified in [None, 'yesterday']:
+            self.transfers[:] = []
+            transfers = self._conflict(last_modified)
+            # both kept : the local file is uploaded as a conflict copy
+            assert [kind for kind, _ in transfers] == ['upload', 'download']
+            assert transfers[0][1] != 'file' and transfers[1][1] == 'file'
+            assert os.path.exists(os.path.join(self.local_dir, transfers[0][1]))
+            os.rename(os.path.join(self.local_dir, transfers[0][1]),
+                      os.path.join(self.local_dir, 'file'))
+
+
+class TestRemoteMove(TestCase):
+
+    LAST_MODIFIED = 'Mon, 20 Jan 2020 20:41:00 GMT'
+
+    def setUp(self):
+        self.local_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.local_dir, 'old'), 'wb') as f:
+            f.write(b'local')
+        self.engine = SyncEngine(None, self.local_dir, 'synced')
+        self.local = self.engine._local_entry(os.path.join(self.local_dir, 'old'))  # pylint: disable=protected-access
+        self.known = RemoteEntry(False, 'etag', 1, self.LAST_MODIFIED, 5)
+        state = SyncState(self.engine.state_path)
+        state.save('old', self.known, self.local)
+        state.commit()
+        state.close()
+        self.engine.scan_local = lambda: {'old': self.local}
+
+    def tearDown(self):
+        shutil.rmtree(self.local_dir)
+
+    def test_moved(self):
+        self.engine.scan_remote = lambda: {'new': self.known}
+        assert self.engine.plan() == [SyncAction('move_local', 'new', 'old')]
+
+    def test_moved_and_modified(self):
+        modified = RemoteEntry(False, 'etag2', 1, 'Tue, 21 Jan 2020 20:41:00 GMT', 8)
+        self.engine.scan_remote = lambda: {'new': modified}
+        actions = self.engine.plan()
+        assert actions == [SyncAction('move_local', 'new', 'old'), SyncAction('download', 'new', None)]
+        # until downloaded, the previous remote version is recorded
+        self.engine._apply(actions[0])  # pylint: disable=protected-access
+        state = SyncState(self.engine.state_path)
+        try:
+            self.engine._save(state, actions[0])  # pylint: disable=protected-access
+            assert state.load() == {'new': (self.known, self.local)}
+        finally:
+            state.close()
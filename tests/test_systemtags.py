@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 import os
+from unittest import TestCase
+
+import requests
 
 from .base import BaseTestCase, LocalNxcUserMixin
+from nextcloud.api_wrappers.systemtags import SystemTags
+from nextcloud.codes import WebDAVCode
+from nextcloud.exceptions import NextCloudError
+from nextcloud.response import WebDAVResponse
 
 
 class TestSystemTags(LocalNxcUserMixin, BaseTestCase):
@@ -24,3 +31,21 @@ class TestSystemTags(LocalNxcUserMixin, BaseTestCase):
         tags = _nxc.get_systemtags()
         assert tag_name not in [t.display_name for t in tags]
 
+
+class TestIterSystemtags(TestCase):
+
+    class Requester(object):  # pylint: disable=useless-object-inheritance,too-few-public-methods
+
+        @staticmethod
+        def propfind(**kwargs):  # pylint: disable=unused-argument
+            raw = requests.Response()
+            raw.status_code = 401
+            raw.request = requests.Request('PROPFIND', 'https://cloud/remote.php/dav/systemtags').prepare()
+            raw._content = b''  # pylint: disable=protected-access
+            return WebDAVResponse(raw, success_code=WebDAVCode.MULTISTATUS)
+
+    def test_failed_request(self):
+        wrapper = SystemTags()
+        wrapper.requester = self.Requester()
+        with self.assertRaises(NextCloudError):
+            list(wrapper.iter_systemtags())
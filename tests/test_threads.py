@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import ThreadPoolExecutor
+
+from .base import BaseTestCase, NextCloud, NEXTCLOUD_URL, NEXTCLOUD_PASSWORD
+from nextcloud.api_wrappers.webdav import File
+
+
+class TestThreadSafety(BaseTestCase):
+    """ One client shared by a pool of workers """
+
+    WORKERS = 48
+    CALLS = 500
+
+    def setUp(self):
+        super(TestThreadSafety, self).setUp()
+        self.shared_nxc = NextCloud(
+            NEXTCLOUD_URL, self.username, NEXTCLOUD_PASSWORD,
+            session_kwargs={'pool_maxsize': self.WORKERS, 'pool_block': True})
+
+    def tearDown(self):
+        self.shared_nxc.logout()
+        super(TestThreadSafety, self).tearDown()
+
+    def _call(self, idx):
+        if idx % 2:
+            res = self.shared_nxc.get_user(self.username)
+            return res.is_ok and res.data['id'] == self.username
+        res = self.shared_nxc.list_folders()
+        return res.is_ok and isinstance(res.data[0], File) and res.data[0].isroot()
+
+    def test_hammer_get_user_and_list_folders(self):
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as executor:
+            results = list(executor.map(self._call, range(self.CALLS)))
+        assert all(results)
+        stats = self.shared_nxc.session.pool_stats
+        assert stats['opened'] + stats['reused'] == self.CALLS
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from unittest import TestCase
+
+from nextcloud.common.timestamping import (
+    datetime_from_string,
+    timestamp_from_string,
+    timestamps_from_strings
+)
+
+
+class TestTimestamping(TestCase):
+
+    def test_parse(self):
+        assert timestamp_from_string('Thu, 01 Dec 1994 16:00:00 GMT') == 786297600
+        assert datetime_from_string('Thu, 01 Dec 1994 16:00:00 GMT') == datetime(1994, 12, 1, 16)
+        # cached
+        assert timestamp_from_string('Thu, 01 Dec 1994 16:00:00 GMT') == 786297600
+        for invalid in ['Mon, 31 Feb 2020 10:00:00 GMT', 'Thu, 01 Dec 1994 16:00:00 UTM',
+                        '2007-03-01T13:00:00Z', '', None]:
+            assert timestamp_from_string(invalid) is None
+            assert datetime_from_string(invalid) is None
+
+    def test_batch(self):
+        dates = ['Fri, 14 Jul 2017 02:40:00 GMT', None, 'broken', 'Fri, 14 Jul 2017 02:40:00 GMT']
+        assert timestamps_from_strings(dates) == [1500000000, None, None, 1500000000]
+        assert timestamps_from_strings([]) == []
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
+import io
 import os
+import shutil
+import tempfile
 # from requests.utils import quote  # url are always unquotted
 from datetime import datetime
 
 from .base import BaseTestCase, LocalNxcUserMixin
 from nextcloud.api_wrappers import WebDAV
 from nextcloud.api_wrappers.webdav import timestamp_from_string, File
+from nextcloud.exceptions import NextCloudError
 
 
 class TestWebDAV(LocalNxcUserMixin, BaseTestCase):
@@ -36,6 +40,15 @@ class TestWebDAV(LocalNxcUserMixin, BaseTestCase):
         assert isinstance(res.data[0], File)
         assert isinstance(res.data[0].href, str)
 
+    def test_iter_folders(self):
+        files = list(self.nxc_local.iter_folders(all_properties=True))
+        assert all(isinstance(f, File) for f in files)
+        res = self.nxc_local.list_folders(all_properties=True)
+        assert [f.href for f in files] == [f.href for f in res.data]
+        assert [f.file_id for f in files] == [f.file_id for f in res.data]
+        with self.assertRaises(NextCloudError):
+            list(self.nxc_local.iter_folders('unknown_folder'))
+
     def test_upload_download_file(self):
         file_name = "test_file"
         file_content = "test file content"
@@ -67,6 +80,117 @@ class TestWebDAV(LocalNxcUserMixin, BaseTestCase):
         self.nxc_local.delete_path(file_name)
         os.remove(file_local_path)
 
+    def test_download_file_streamed(self):
+        file_name = "test_file_streamed"
+        file_content = os.urandom(3 * 1024 + 7)
+        assert self.nxc_local.upload_file_contents(file_content, file_name).is_ok
+        # iterator of chunks
+        chunks = list(self.nxc_local.iter_file_content(file_name, chunk_size=1024))
+        assert b''.join(chunks) == file_content
+        assert max(len(chunk) for chunk in chunks) <= 1024
+        # writable file object
+        target = io.BytesIO()
+        self.nxc_local.download_file(file_name, target=target, chunk_size=1024)
+        assert target.getvalue() == file_content
+        # File object
+        _file = self.nxc_local.get_file(file_name)
+        assert b''.join(_file.iter_content()) == file_content
+        # unknown file
+        with self.assertRaises(NextCloudError):
+            self.nxc_local.iter_file_content(file_name + '_unknown')
+        self.nxc_local.delete_path(file_name)
+
+    def test_upload_file_streamed(self):
+        file_name = "test_file_streamed_upload"
+        file_content = os.urandom(3 * 1024 + 7)
+        sources = [
+            io.BytesIO(file_content),
+            memoryview(file_content),
+            (file_content[i:i + 1000] for i in range(0, len(file_content), 1000)),
+        ]
+        for source in sources:
+            assert self.nxc_local.upload_file_contents(source, file_name).is_ok
+            assert b''.join(self.nxc_local.iter_file_content(file_name)) == file_content
+        self.nxc_local.delete_path(file_name)
+
+    def test_download_tree(self):
+        local_dir = tempfile.mkdtemp()
+        self.nxc_local.ensure_tree_exists('tree/a/b')
+        files = {'tree/f0': b'0', 'tree/a/f1': b'1', 'tree/a/b/f2': b'2'}
+        for path, content in files.items():
+            assert self.nxc_local.upload_file_contents(content, path, timestamp=1500000000).is_ok
+        try:
+            results = self.nxc_local.download_tree('tree', local_dir, workers=2)
+            assert sorted(r.status for r in results) == ['downloaded'] * 3
+            for path, content in files.items():
+                local_path = os.path.join(local_dir, *path.split('/')[1:])
+                with open(local_path, 'rb') as f:
+                    assert f.read() == content
+                assert os.path.getmtime(local_path) == 1500000000
+            # nothing changed
+            results = self.nxc_local.download_tree('tree', local_dir, workers=2)
+            assert sorted(r.status for r in results) == ['skipped'] * 3
+        finally:
+            shutil.rmtree(local_dir)
+            self.nxc_local.delete_path('tree')
+
+    def test_iter_tree_walk(self):
+        self.nxc_local.ensure_tree_exists('walked/a/b')
+        for path in ['walked/f0', 'walked/a/f1', 'walked/a/b/f2']:
+            assert self.nxc_local.upload_file_contents(b'0', path).is_ok
+        try:
+            paths = [f.get_relative_path() for f in self.nxc_local.iter_tree('walked', workers=2)]
+            assert sorted(paths) == ['/walked/a/', '/walked/a/b/', '/walked/a/b/f2',
+                                     '/walked/a/f1', '/walked/f0']
+            # a folder is listed before its content
+            assert paths.index('/walked/a/') < paths.index('/walked/a/b/')
+            walked = [(folder, sorted(d.basename() for d in dirs), sorted(f.basename() for f in files))
+                      for folder, dirs, files in self.nxc_local.walk('walked')]
+            assert walked == [('walked', ['a'], ['f0']), ('walked/a', ['b'], ['f1']),
+                              ('walked/a/b', [], ['f2'])]
+        finally:
+            self.nxc_local.delete_path('walked')
+
+    def test_scan_changes(self):
+        self.nxc_local.ensure_tree_exists('scanned/a/b')
+        for path in ['scanned/f0', 'scanned/a/f1', 'scanned/a/b/f2']:
+            assert self.nxc_local.upload_file_contents(b'0', path).is_ok
+        try:
+            changes = self.nxc_local.scan_changes('scanned')
+            assert len(changes.added) == 5
+            assert set(changes.snapshot) == set(
+                ['scanned', 'scanned/f0', 'scanned/a', 'scanned/a/f1',
+                 'scanned/a/b', 'scanned/a/b/f2'])
+            # nothing changed
+            changes = self.nxc_local.scan_changes('scanned', changes.snapshot)
+            assert changes.added == changes.removed == changes.modified == []
+            self.nxc_local.upload_file_contents(b'1', 'scanned/a/f1')
+            self.nxc_local.delete_path('scanned/a/b')
+            changes = self.nxc_local.scan_changes('scanned', changes.snapshot)
+            assert changes.added == []
+            assert sorted(changes.removed) == ['scanned/a/b', 'scanned/a/b/f2']
+            assert (sorted(f.get_relative_path().strip('/') for f in changes.modified)
+                    == ['scanned/a', 'scanned/a/f1'])
+        finally:
+            self.nxc_local.delete_path('scanned')
+
+    def test_upload_tree(self):
+        local_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(local_dir, 'a', 'b'))
+        files = {'f0': b'0', 'a/f1': b'1', 'a/b/f2': b'2'}
+        for path, content in files.items():
+            with open(os.path.join(local_dir, *path.split('/')), 'wb') as f:
+                f.write(content)
+        try:
+            results = self.nxc_local.upload_tree(local_dir, 'uploaded/tree', workers=2)
+            assert sorted(r.status for r in results) == ['uploaded'] * 3
+            for path, content in files.items():
+                remote_path = 'uploaded/tree/' + path
+                assert b''.join(self.nxc_local.iter_file_content(remote_path)) == content
+        finally:
+            shutil.rmtree(local_dir)
+            self.nxc_local.delete_path('uploaded')
+
     def test_upload_download_file_with_timestamp(self):
         file_name = "test_file_1579520460"
         file_content = "Test file: Mon, 20 Jan 2020 20:41:00 GMT"